@@ -0,0 +1,39 @@
+"""Parsed VivaTech agenda and the queries the agents run on it"""
+
+from .index import AGENDA_PATH, AgendaIndex, Session, Speaker, parse_agenda, parse_day
+from .planner import BlockedRange, Plan, PlannedSession, SchedulePlanner, parse_blocked, profile_weights, topic_weights
+from .retrieval import AgendaSection, BM25Index, SectionRetriever, format_sections, split_sections
+from .snapshot import (
+    AgendaSnapshot, build_snapshot, load_agenda, load_planner, load_snapshot, load_speaker_index, snapshot_cache
+)
+from .speakers import SpeakerIndex, SpeakerMatch
+
+__all__ = [
+    "AGENDA_PATH",
+    "AgendaIndex",
+    "AgendaSection",
+    "AgendaSnapshot",
+    "BM25Index",
+    "BlockedRange",
+    "Plan",
+    "PlannedSession",
+    "SchedulePlanner",
+    "SectionRetriever",
+    "Session",
+    "Speaker",
+    "SpeakerIndex",
+    "SpeakerMatch",
+    "build_snapshot",
+    "format_sections",
+    "load_agenda",
+    "load_planner",
+    "load_snapshot",
+    "load_speaker_index",
+    "parse_agenda",
+    "parse_blocked",
+    "parse_day",
+    "profile_weights",
+    "snapshot_cache",
+    "split_sections",
+    "topic_weights",
+]
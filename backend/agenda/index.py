@@ -0,0 +1,317 @@
+import bisect
+import logging
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import date, datetime, time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AGENDA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "vivatech_agenda.md")
+
+CONFERENCE_YEAR = 2025
+DAY_HEADING = re.compile(r"^# .*?-\s*(?P<day>\w+ \d{1,2}, \d{4})\s*$")
+TIME_RANGE = re.compile(r"(?P<start>\d{1,2}:\d{2}\s*[AP]M)\s*-\s*(?P<end>\d{1,2}:\d{2}\s*[AP]M)", re.IGNORECASE)
+SPEAKER = re.compile(r"^(?P<name>.+?)\s*\((?P<organization>.+)\)\s*$")
+EXTRA_SPEAKERS = re.compile(r"^\+(?P<count>\d+) speakers?$")
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class Speaker(NamedTuple):
+    """A session speaker and their organization, as listed in the agenda"""
+    name: str
+    organization: Optional[str]
+
+
+class Session(NamedTuple):
+    """One session of the agenda; start and end are None while the timeslot is TBA"""
+    day: date
+    stage: str
+    title: str
+    start: Optional[time]
+    end: Optional[time]
+    speakers: Tuple[Speaker, ...] = ()
+    extra_speakers: int = 0  # Speakers not named in the agenda ("+3 speakers")
+    track: Optional[str] = None
+    description: Optional[str] = None
+
+    def slot(self) -> str:
+        """Render when and where the session takes place, with its title"""
+        when = f"{self.start:%H:%M}-{self.end:%H:%M}" if self.start is not None else "time TBA"
+        return f"{self.day:%b %d} {when} | {self.stage} | {self.title}"
+
+    def to_line(self) -> str:
+        """Render the session as one compact line for the model"""
+        parts = [self.slot()]
+        if self.speakers or self.extra_speakers:
+            names = [f"{s.name} ({s.organization})" if s.organization else s.name for s in self.speakers]
+            if self.extra_speakers:
+                names.append(f"+{self.extra_speakers} more")
+            parts.append("Speakers: " + ", ".join(names))
+        if self.track:
+            parts.append(f"Track: {self.track}")
+        if self.description:
+            parts.append(self.description)
+        return " | ".join(parts)
+
+
+def normalize(text: str) -> str:
+    """Lowercase words without accents, separated by single spaces"""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(WORD.findall(text))
+
+
+def parse_clock(value: str) -> time:
+    """
+    Parse a time of day such as "14:30", "2:30 PM", "2pm" or "9"
+
+    Raises:
+        ValueError: If the value is not a time of day
+    """
+    match = re.fullmatch(r"\s*(\d{1,2})(?:[:h.](\d{2}))?\s*([ap]\.?m\.?)?\s*(?:cet|cest)?\s*", value, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Unrecognized time: {value!r}")
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").lower().replace(".", "")
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    return time(hour, minute)
+
+
+def parse_day(value: str, days: Iterable[date] = ()) -> date:
+    """
+    Parse a conference day such as "2025-06-11", "June 11", "11 juin", "11" or "Wednesday"
+
+    Args:
+        value: The day as written by the user or the model
+        days: The agenda's days, to resolve weekday names and bare day numbers
+
+    Raises:
+        ValueError: If the value is not a day
+    """
+    text = normalize(value)
+    try:
+        return date.fromisoformat(value.strip())
+    except ValueError:
+        pass
+    for agenda_day in days:
+        if text in (f"{agenda_day:%A}".lower(), str(agenda_day.day)):
+            return agenda_day
+    for pattern in ("%B %d %Y", "%B %d", "%b %d %Y", "%b %d", "%d %B %Y", "%d %B", "%d %b"):
+        try:
+            parsed = datetime.strptime(text, pattern)
+        except ValueError:
+            continue
+        return parsed.date().replace(year=parsed.year if "%Y" in pattern else CONFERENCE_YEAR)
+    french = re.fullmatch(r"(\d{1,2}) juin(?: (\d{4}))?", text)
+    if french:
+        return date(int(french.group(2) or CONFERENCE_YEAR), 6, int(french.group(1)))
+    raise ValueError(f"Unrecognized day: {value!r}")
+
+
+def _parse_speaker(text: str) -> Optional[Speaker]:
+    text = text.strip()
+    if not text or text.upper() == "TBA":
+        return None
+    match = SPEAKER.match(text)
+    if match:
+        return Speaker(match.group("name").strip(), match.group("organization").strip())
+    return Speaker(text, None)
+
+
+def parse_agenda(text: str) -> List[Session]:
+    """
+    Parse the agenda markdown into sessions
+
+    The agenda has a "# ... - June 11, 2025" heading per day, a "## Stage"
+    heading per stage and a "### Title" heading per session, followed by
+    "- Date", "- Time", "- Track", "- Description" and "- Speakers" bullets.
+    Speakers are listed inline or as nested bullets.
+
+    Args:
+        text: Contents of the agenda file
+
+    Returns:
+        Sessions in file order
+    """
+    sessions: List[Session] = []
+    day: Optional[date] = None
+    stage: Optional[str] = None
+    current: Optional[dict] = None
+
+    def finish() -> None:
+        if current is not None and current["day"] is not None:
+            sessions.append(Session(**{**current, "speakers": tuple(current["speakers"])}))
+
+    for raw_line in text.splitlines():
+        line = raw_line.rstrip()
+        if line.startswith("### "):
+            finish()
+            current = {
+                "day": day, "stage": stage or "", "title": line[4:].strip(), "start": None, "end": None,
+                "speakers": [], "extra_speakers": 0, "track": None, "description": None,
+            }
+        elif line.startswith("## "):
+            finish()
+            current, stage = None, line[3:].strip()
+        elif line.startswith("# "):
+            finish()
+            current, stage = None, None
+            match = DAY_HEADING.match(line)
+            day = datetime.strptime(match.group("day"), "%B %d, %Y").date() if match else None
+        elif current is None:
+            continue
+        elif line.startswith("- "):
+            key, _, value = line[2:].partition(":")
+            key, value = key.strip().lower(), value.strip()
+            if key == "date" and value:
+                current["day"] = datetime.strptime(value, "%B %d, %Y").date()
+            elif key == "time":
+                match = TIME_RANGE.search(value)
+                if match:
+                    current["start"] = parse_clock(match.group("start"))
+                    current["end"] = parse_clock(match.group("end"))
+            elif key == "track":
+                current["track"] = value or None
+            elif key == "description":
+                current["description"] = value or None
+            elif key == "speakers" and value:
+                speaker = _parse_speaker(value)
+                if speaker is not None:
+                    current["speakers"].append(speaker)
+        elif line.startswith("  - "):
+            value = line[4:].strip()
+            extra = EXTRA_SPEAKERS.match(value)
+            if extra:
+                current["extra_speakers"] = int(extra.group("count"))
+            else:
+                speaker = _parse_speaker(value)
+                if speaker is not None:
+                    current["speakers"].append(speaker)
+    finish()
+    return sessions
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+class AgendaIndex:
+    """Agenda sessions indexed by day, stage and start time
+
+    Sessions of each day are kept sorted by start time, so time-window
+    queries are a bisect plus a scan of the matching slice. Sessions with a
+    TBA timeslot only match queries without a time filter.
+    """
+
+    def __init__(self, sessions: Iterable[Session]):
+        """
+        Build the indexes
+
+        Args:
+            sessions: Parsed agenda sessions
+        """
+        self.sessions = sorted(
+            sessions, key=lambda s: (s.day, s.start is None, s.start or time.min, s.stage, s.title)
+        )
+        self.days: List[date] = sorted({s.day for s in self.sessions})
+        self.stages: List[str] = list(dict.fromkeys(s.stage for s in self.sessions))
+        self.by_day: Dict[date, List[Session]] = defaultdict(list)
+        self.by_stage: Dict[str, List[Session]] = defaultdict(list)
+        for session in self.sessions:
+            self.by_day[session.day].append(session)
+            self.by_stage[normalize(session.stage)].append(session)
+        # Timed sessions of each day and their start minutes, for bisect
+        self._timed: Dict[date, List[Session]] = {
+            day: [s for s in sessions if s.start is not None] for day, sessions in self.by_day.items()
+        }
+        self._start_minutes: Dict[date, List[int]] = {
+            day: [_minutes(s.start) for s in sessions] for day, sessions in self._timed.items()
+        }
+        self._speaker_text = {s: normalize(self._speaker_names(s)) for s in self.sessions}
+        self._words = {
+            s: set(normalize(" ".join(filter(None, [s.title, s.track, s.description, self._speaker_names(s)]))).split())
+            for s in self.sessions
+        }
+
+    @staticmethod
+    def _speaker_names(session: Session) -> str:
+        return " ".join(f"{s.name} {s.organization or ''}" for s in session.speakers)
+
+    def _has_words(self, session: Session, words: List[str]) -> bool:
+        """Whether every word starts a word of the session, so "robot" matches "Robotics" """
+        session_words = self._words[session]
+        return all(any(w.startswith(word) for w in session_words) for word in words)
+
+    @classmethod
+    def from_file(cls, path: str = AGENDA_PATH) -> "AgendaIndex":
+        """Parse and index an agenda markdown file"""
+        with open(path, "r", encoding="utf-8") as f:
+            index = cls(parse_agenda(f.read()))
+        logger.info(f"Indexed {len(index.sessions)} agenda sessions from {path}")
+        return index
+
+    def match_stages(self, stage: str) -> List[str]:
+        """Get the normalized names of the stages containing the given name, e.g. "blue" or "dome" """
+        wanted = normalize(stage)
+        return [key for key in self.by_stage if wanted and wanted in key]
+
+    def find_sessions(
+        self,
+        day: Optional[str] = None,
+        stage: Optional[str] = None,
+        start_after: Optional[str] = None,
+        end_before: Optional[str] = None,
+        speaker: Optional[str] = None,
+        keyword: Optional[str] = None,
+    ) -> List[Session]:
+        """
+        Find sessions matching all of the given filters
+
+        Args:
+            day: Conference day, e.g. "2025-06-11", "June 12" or "Thursday"
+            stage: Stage name or part of it, e.g. "Stage One" or "blue"
+            start_after: Only sessions starting at or after this time, e.g. "14:00" or "2 PM"
+            end_before: Only sessions ending at or before this time
+            speaker: Speaker or organization name, or part of it
+            keyword: Words that must all appear in the title, track, description or speakers
+
+        Returns:
+            Matching sessions ordered by day and start time
+
+        Raises:
+            ValueError: If day, start_after or end_before cannot be parsed
+        """
+        days = [parse_day(day, self.days)] if day else self.days
+        after = _minutes(parse_clock(start_after)) if start_after else None
+        before = _minutes(parse_clock(end_before)) if end_before else None
+        stages = set(self.match_stages(stage)) if stage else None
+        if stages is not None and not stages:
+            return []
+        speaker_text = normalize(speaker) if speaker else None
+        keywords = normalize(keyword).split() if keyword else []
+
+        results = []
+        for agenda_day in days:
+            if after is None and before is None:
+                candidates = self.by_day.get(agenda_day, [])
+            else:
+                starts = self._start_minutes.get(agenda_day, [])
+                low = bisect.bisect_left(starts, after) if after is not None else 0
+                candidates = self._timed.get(agenda_day, [])[low:]
+            for session in candidates:
+                if before is not None and _minutes(session.end) > before:
+                    continue
+                if stages is not None and normalize(session.stage) not in stages:
+                    continue
+                if speaker_text and speaker_text not in self._speaker_text[session]:
+                    continue
+                if keywords and not self._has_words(session, keywords):
+                    continue
+                results.append(session)
+        return results
@@ -0,0 +1,261 @@
+import bisect
+import logging
+import math
+import re
+from collections import defaultdict
+from datetime import date, time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .index import AGENDA_PATH, AgendaIndex, Session, parse_clock, parse_day
+from .retrieval import terms
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+# Weight of each term taken from the user profile, against 1.0 for an explicit topic
+PROFILE_WEIGHT = 0.5
+CLOCK = r"\d{1,2}(?:[:h.]\d{2})?\s*(?:[ap]\.?m\.?)?"
+TIME_RANGE = re.compile(
+    rf"\s*(?:(?P<day>.*?)[\s,]+)?(?P<start>{CLOCK})\s*(?:-|–|to)\s*(?P<end>{CLOCK})\s*", re.IGNORECASE
+)
+WEIGHTED_TOPIC = re.compile(r"^(?P<topic>.+?)\s*[:=]\s*(?P<weight>\d+(?:\.\d+)?)$")
+
+
+class BlockedRange(NamedTuple):
+    """A time range the user is not available; day None blocks it on every day"""
+    day: Optional[date]
+    start: time
+    end: time
+
+
+class PlannedSession(NamedTuple):
+    """A session picked for the schedule, with its interest score and the terms it matched"""
+    session: Session
+    score: float
+    matched: Tuple[str, ...]
+
+
+class Plan(NamedTuple):
+    """A conflict-free schedule in time order and its total interest score"""
+    sessions: Tuple[PlannedSession, ...]
+    score: float
+
+
+def parse_blocked(value: str, days: Iterable[date] = ()) -> BlockedRange:
+    """
+    Parse a blocked time range such as "June 11 12:00-13:30", "12pm-2pm" or "Thursday"
+
+    Args:
+        value: The range as written by the user or the model; a day alone blocks the whole day
+        days: The agenda's days, to resolve weekday names and bare day numbers
+
+    Raises:
+        ValueError: If the value is not a time range or a day
+    """
+    match = TIME_RANGE.fullmatch(value)
+    if match is None:
+        return BlockedRange(parse_day(value, days), time.min, time.max)
+    day = match.group("day")
+    return BlockedRange(
+        parse_day(day, days) if day else None, parse_clock(match.group("start")), parse_clock(match.group("end"))
+    )
+
+
+def topic_weights(topics: Iterable[str], weight: float = 1.0) -> Dict[str, float]:
+    """
+    Turn topics into term weights
+
+    Args:
+        topics: Topics such as "AI", "climate tech" or "robotics:2" (a suffix sets the topic's weight)
+        weight: Weight of topics without a suffix
+
+    Returns:
+        Dict mapping each term to its weight, the highest when several topics share a term
+    """
+    weights: Dict[str, float] = {}
+    for topic in topics:
+        topic_weight = weight
+        match = WEIGHTED_TOPIC.match(topic.strip())
+        if match:
+            topic, topic_weight = match.group("topic"), float(match.group("weight"))
+        for term in terms(topic):
+            weights[term] = max(weights.get(term, 0.0), topic_weight)
+    return weights
+
+
+def profile_weights(profile: Optional[Dict[str, Any]], weight: float = PROFILE_WEIGHT) -> Dict[str, float]:
+    """
+    Derive term weights from a stored LinkedIn profile (user.json)
+
+    The headline, job title, company, about section and the titles and
+    companies of the three latest experiences are used.
+
+    Args:
+        profile: Profile as saved by the user storage, or None
+        weight: Weight of each profile term
+
+    Returns:
+        Dict mapping each profile term to the weight
+    """
+    if not profile:
+        return {}
+    texts = [profile.get(field) or "" for field in ("headline", "jobTitle", "companyName", "about")]
+    for experience in (profile.get("experiences") or [])[:3]:
+        texts.extend([experience.get("title") or "", experience.get("subtitle") or ""])
+    return topic_weights([text for text in texts if text], weight)
+
+
+def _minute_of(day_index: int, value: time) -> int:
+    return day_index * MINUTES_PER_DAY + value.hour * 60 + value.minute
+
+
+class SchedulePlanner:
+    """Builds the highest-scoring conflict-free schedule for a user's interests
+
+    A session's score is the sum, over the interest terms it mentions (in
+    its title, track, description or speakers), of the term's weight times
+    its inverse document frequency across the agenda, so rarer topics count
+    more than words every session shares. A term also matches the words it
+    starts, so "robot" matches "robotics".
+
+    The schedule is a weighted interval scheduling problem with a walking
+    time between sessions on different stages, solved exactly by dynamic
+    programming over sessions sorted by end time. A session can follow the
+    best schedule ending before its start minus the walking time, or the
+    best one ending on the same stage before its start, both found by
+    bisection, so planning is O(n log n).
+    """
+
+    def __init__(self, sessions: Iterable[Session]):
+        """
+        Index the timed sessions
+
+        Args:
+            sessions: Parsed agenda sessions; sessions with a TBA timeslot are left out
+        """
+        self.sessions = [s for s in sessions if s.start is not None]
+        self.days = sorted({s.day for s in self.sessions})
+        day_index = {day: i for i, day in enumerate(self.days)}
+        self._span = [(_minute_of(day_index[s.day], s.start), _minute_of(day_index[s.day], s.end)) for s in self.sessions]
+        self._terms: List[Set[str]] = [
+            set(terms(" ".join(filter(None, [
+                s.title, s.track, s.description,
+                " ".join(f"{sp.name} {sp.organization or ''}" for sp in s.speakers),
+            ]))))
+            for s in self.sessions
+        ]
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        for i, session_terms in enumerate(self._terms):
+            for term in session_terms:
+                self._postings[term].add(i)
+        self.vocabulary = sorted(self._postings)
+
+    @classmethod
+    def from_file(cls, path: str = AGENDA_PATH) -> "SchedulePlanner":
+        """Plan over the sessions of an agenda markdown file"""
+        return cls(AgendaIndex.from_file(path).sessions)
+
+    def _matching(self, term: str) -> Set[int]:
+        """Sessions mentioning the term or, for terms of four letters or more, a word it starts"""
+        if len(term) < 4:
+            return set(self._postings.get(term, ()))
+        matches: Set[int] = set()
+        position = bisect.bisect_left(self.vocabulary, term)
+        while position < len(self.vocabulary) and self.vocabulary[position].startswith(term):
+            matches |= self._postings[self.vocabulary[position]]
+            position += 1
+        return matches
+
+    def score_sessions(self, weights: Dict[str, float]) -> List[Tuple[float, Tuple[str, ...]]]:
+        """
+        Score every session against interest term weights
+
+        Args:
+            weights: Interest term weights, e.g. from topic_weights and profile_weights
+
+        Returns:
+            (score, matched terms) per session, in the planner's session order
+        """
+        scores = [0.0] * len(self.sessions)
+        matched: List[List[str]] = [[] for _ in self.sessions]
+        for term, weight in weights.items():
+            sessions = self._matching(term)
+            if not sessions or weight <= 0:
+                continue
+            idf = math.log(1 + len(self.sessions) / len(sessions))
+            for i in sessions:
+                scores[i] += weight * idf
+                matched[i].append(term)
+        return [(score, tuple(terms_matched)) for score, terms_matched in zip(scores, matched)]
+
+    def plan(
+        self,
+        weights: Dict[str, float],
+        days: Optional[Sequence[date]] = None,
+        blocked: Sequence[BlockedRange] = (),
+        walking_minutes: int = 10,
+    ) -> Plan:
+        """
+        Find the conflict-free schedule with the highest total interest score
+
+        Args:
+            weights: Interest term weights
+            days: Days to plan (None plans every day)
+            blocked: Ranges the user is not available; overlapping sessions are left out
+            walking_minutes: Minimum time between sessions on different stages
+
+        Returns:
+            The schedule in time order; sessions matching no interest are never picked
+        """
+        scored = self.score_sessions(weights)
+        wanted_days = set(days) if days is not None else None
+        candidates = [
+            i for i, (score, _) in enumerate(scored)
+            if score > 0
+            and (wanted_days is None or self.sessions[i].day in wanted_days)
+            and not any(self._overlaps(self.sessions[i], block) for block in blocked)
+        ]
+        candidates.sort(key=lambda i: (self._span[i][1], self._span[i][0], i))
+
+        # best[k] is the score of the best schedule ending with candidates[k];
+        # the prefix maxima over end times answer "best schedule ending by t"
+        ends: List[int] = []
+        prefix_best: List[Tuple[float, int]] = []  # (score, candidate position) of the best schedule so far
+        stage_ends: Dict[str, List[int]] = defaultdict(list)
+        stage_best: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+        previous: List[int] = []
+        best: List[float] = []
+        for k, i in enumerate(candidates):
+            start, end = self._span[i]
+            stage = self.sessions[i].stage
+            before = (0.0, -1)
+            position = bisect.bisect_right(ends, start - walking_minutes)
+            if position:
+                before = max(before, prefix_best[position - 1])
+            position = bisect.bisect_right(stage_ends[stage], start)
+            if position:
+                before = max(before, stage_best[stage][position - 1])
+            best.append(before[0] + scored[i][0])
+            previous.append(before[1])
+
+            ends.append(end)
+            entry = (best[k], k)
+            prefix_best.append(max(prefix_best[-1], entry) if prefix_best else entry)
+            stage_ends[stage].append(end)
+            stage_best[stage].append(max(stage_best[stage][-1], entry) if stage_best[stage] else entry)
+
+        if not best:
+            return Plan((), 0.0)
+        total, k = prefix_best[-1]
+        picked = []
+        while k >= 0:
+            i = candidates[k]
+            picked.append(PlannedSession(self.sessions[i], scored[i][0], scored[i][1]))
+            k = previous[k]
+        return Plan(tuple(reversed(picked)), total)
+
+    @staticmethod
+    def _overlaps(session: Session, block: BlockedRange) -> bool:
+        if block.day is not None and block.day != session.day:
+            return False
+        return session.start < block.end and block.start < session.end
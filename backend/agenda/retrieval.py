@@ -0,0 +1,193 @@
+import logging
+import math
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .index import AGENDA_PATH, DAY_HEADING, normalize
+
+logger = logging.getLogger(__name__)
+
+# Words too common in questions to tell sections apart (English and French)
+STOPWORDS = frozenset(
+    "a about am an and any are at be can could do does for from give have how i in is it me my of on or "
+    "please show tell that the there this to want was what when where which who will with would you "
+    "au aux avec ce de des du en est et je la le les me moi mon ou par pour quand que quel quelle qui "
+    "sur un une".split()
+)
+
+
+class AgendaSection(NamedTuple):
+    """A "##" stage block of one day of the agenda"""
+    day: str
+    stage: str
+    text: str
+
+    @property
+    def title(self) -> str:
+        return f"{self.stage} - {self.day}"
+
+    def to_markdown(self) -> str:
+        """Render the section under a heading naming its stage and day"""
+        return f"## {self.title}\n{self.text}"
+
+
+def terms(text: str) -> List[str]:
+    """Split text into ranking terms: normalized words without stopwords, plurals folded"""
+    return [
+        word[:-1] if len(word) > 3 and word.endswith("s") else word
+        for word in normalize(text).split()
+        if word not in STOPWORDS
+    ]
+
+
+def split_sections(text: str) -> List[AgendaSection]:
+    """
+    Split the agenda markdown into its stage blocks
+
+    Args:
+        text: Contents of the agenda file
+
+    Returns:
+        One section per "##" heading, in file order, each with the day of its "#" heading
+    """
+    sections: List[AgendaSection] = []
+    day = ""
+    stage: Optional[str] = None
+    lines: List[str] = []
+
+    def finish() -> None:
+        body = "\n".join(lines).strip()
+        if stage is not None and body:
+            sections.append(AgendaSection(day, stage, body))
+
+    for line in text.splitlines():
+        if line.startswith("## "):
+            finish()
+            stage, lines = line[3:].strip(), []
+        elif line.startswith("# "):
+            finish()
+            stage, lines = None, []
+            match = DAY_HEADING.match(line.rstrip())
+            day = match.group("day") if match else line[2:].strip()
+        elif line.strip() == "---":
+            # Closing rule before the event footer
+            finish()
+            stage, lines = None, []
+        elif stage is not None:
+            lines.append(line)
+    finish()
+    return sections
+
+
+class BM25Index:
+    """Okapi BM25 ranking over a fixed set of documents
+
+    Documents are stored as postings (term -> [(document, term frequency)]),
+    so a query only scores the documents sharing one of its terms.
+    """
+
+    def __init__(self, documents: Sequence[List[str]], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the postings
+
+        Args:
+            documents: Terms of each document
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self.lengths = [len(document) for document in documents]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, document in enumerate(documents):
+            for term, count in Counter(document).items():
+                self.postings.setdefault(term, []).append((doc_id, count))
+        total = len(documents)
+        self.idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, query: Sequence[str], k: int) -> List[Tuple[int, float]]:
+        """
+        Rank the documents for a query
+
+        Args:
+            query: Query terms
+            k: Maximum number of documents to return
+
+        Returns:
+            (document index, score) pairs of the best k documents with a positive score, best first
+        """
+        scores: Dict[int, float] = {}
+        for term in set(query):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, count in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(doc_id, score) for doc_id, score in ranked[:k] if score > 0]
+
+
+class SectionRetriever:
+    """Picks the agenda sections relevant to a user message with BM25
+
+    A section is indexed with its stage and day (including the weekday), so
+    "Stage One on Thursday" ranks that block first, alongside the titles,
+    tracks, descriptions and speakers of its sessions.
+    """
+
+    def __init__(self, sections: Sequence[AgendaSection]):
+        """
+        Index the sections
+
+        Args:
+            sections: Agenda sections, e.g. from split_sections
+        """
+        self.sections = list(sections)
+        self.index = BM25Index([terms(self._indexed_text(section)) for section in self.sections])
+
+    @staticmethod
+    def _indexed_text(section: AgendaSection) -> str:
+        heading = f"{section.stage} {section.day}"
+        try:
+            heading += " " + datetime.strptime(section.day, "%B %d, %Y").strftime("%A")
+        except ValueError:
+            pass
+        # Dates and times are left out, so "11" matches the June 11 heading rather than every 11 AM slot
+        content = "\n".join(
+            line for line in section.text.splitlines() if not line.startswith(("- Date:", "- Time:"))
+        )
+        # The heading is repeated so stage and day names outweigh a passing mention in a description
+        return f"{heading} {heading} {content}"
+
+    @classmethod
+    def from_file(cls, path: str = AGENDA_PATH) -> "SectionRetriever":
+        """Split and index an agenda markdown file"""
+        with open(path, "r", encoding="utf-8") as f:
+            retriever = cls(split_sections(f.read()))
+        logger.info(f"Indexed {len(retriever.sections)} agenda sections from {path} for retrieval")
+        return retriever
+
+    def retrieve(self, query: str, k: int = 3) -> List[AgendaSection]:
+        """
+        Get the sections most relevant to a query
+
+        Args:
+            query: The user message
+            k: Maximum number of sections
+
+        Returns:
+            Up to k sections sharing terms with the query, most relevant first
+        """
+        return [self.sections[doc_id] for doc_id, _ in self.index.search(terms(query), k)]
+
+
+def format_sections(sections: Sequence[AgendaSection]) -> str:
+    """Render sections as markdown, separated by blank lines"""
+    return "\n\n".join(section.to_markdown() for section in sections)
+
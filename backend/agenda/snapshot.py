@@ -0,0 +1,228 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .index import AGENDA_PATH, AgendaIndex, parse_agenda
+from .planner import SchedulePlanner
+from .retrieval import SectionRetriever, split_sections
+from .speakers import SpeakerIndex
+
+logger = logging.getLogger(__name__)
+
+# Bump when the pickled classes change, so older snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot"
+
+# (mtime_ns, size) of the agenda file
+SourceSignature = Tuple[int, int]
+
+
+class AgendaSnapshot(NamedTuple):
+    """Every structure built from one version of the agenda file"""
+    source_hash: str  # SHA-256 of the agenda file
+    index: AgendaIndex
+    speakers: SpeakerIndex
+    planner: SchedulePlanner
+    retriever: SectionRetriever
+
+
+def snapshot_path_for(source: str) -> str:
+    """Get the default snapshot file of an agenda file, next to it"""
+    return source + SNAPSHOT_SUFFIX
+
+
+def source_signature(source: str) -> SourceSignature:
+    """
+    Get the modification time and size of the agenda file
+
+    Raises:
+        FileNotFoundError: If the agenda file does not exist
+    """
+    stat = os.stat(source)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def compile_agenda(text: str) -> AgendaSnapshot:
+    """
+    Parse the agenda and build every index on it
+
+    Args:
+        text: Contents of the agenda file
+
+    Returns:
+        The snapshot of the agenda
+    """
+    index = AgendaIndex(parse_agenda(text))
+    return AgendaSnapshot(
+        source_hash=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        index=index,
+        speakers=SpeakerIndex(index.sessions),
+        planner=SchedulePlanner(index.sessions),
+        retriever=SectionRetriever(split_sections(text)),
+    )
+
+
+def write_snapshot(snapshot: AgendaSnapshot, path: str, signature: SourceSignature) -> None:
+    """
+    Write a snapshot atomically: a header identifying the source, then the snapshot
+
+    Args:
+        snapshot: Snapshot to write
+        path: Snapshot file
+        signature: Signature of the agenda file the snapshot was built from
+    """
+    header = {"version": SNAPSHOT_VERSION, "signature": signature, "source_hash": snapshot.source_hash}
+    # A temporary file per process, so concurrent rebuilds never interleave
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def read_snapshot(path: str, source: str, signature: SourceSignature) -> Optional[AgendaSnapshot]:
+    """
+    Read a snapshot if it was built from the current agenda file
+
+    The header is checked before the snapshot is unpickled. A snapshot whose
+    source modification time changed but whose content hash still matches
+    (e.g. after a fresh checkout) is kept, and its header is refreshed.
+
+    Args:
+        path: Snapshot file
+        source: Agenda file
+        signature: Current signature of the agenda file
+
+    Returns:
+        The snapshot, or None if it is missing, stale or unreadable
+    """
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if header.get("version") != SNAPSHOT_VERSION:
+                return None
+            if tuple(header.get("signature") or ()) != signature:
+                with open(source, "rb") as source_file:
+                    if hashlib.sha256(source_file.read()).hexdigest() != header.get("source_hash"):
+                        return None
+                snapshot = pickle.load(f)
+                try:
+                    write_snapshot(snapshot, path, signature)
+                except OSError as e:
+                    logger.warning(f"Failed to refresh agenda snapshot {path}: {e}")
+                return snapshot
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable agenda snapshot {path}: {e}")
+        return None
+
+
+def build_snapshot(source: str = AGENDA_PATH, path: Optional[str] = None) -> AgendaSnapshot:
+    """
+    Compile the agenda file and write its snapshot
+
+    Args:
+        source: Agenda markdown file
+        path: Snapshot file (defaults to the agenda file plus .snapshot)
+
+    Returns:
+        The new snapshot
+    """
+    path = path or snapshot_path_for(source)
+    signature = source_signature(source)
+    start = time.perf_counter()
+    with open(source, "r", encoding="utf-8") as f:
+        snapshot = compile_agenda(f.read())
+    try:
+        write_snapshot(snapshot, path, signature)
+    except OSError as e:
+        # A read-only data directory only costs the parse in every process
+        logger.warning(f"Failed to write agenda snapshot {path}: {e}")
+    logger.info(
+        f"Compiled agenda snapshot of {len(snapshot.index.sessions)} sessions from {source} "
+        f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    return snapshot
+
+
+class SnapshotCache:
+    """The loaded agenda snapshots of this process, reloaded when the agenda changes
+
+    Every lookup compares the agenda file's modification time and size with
+    those of the loaded snapshot, so an edited agenda is picked up on the next
+    call without a restart. A stale or missing snapshot file is rebuilt from
+    the agenda once and shared by every worker through the file.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, Tuple[SourceSignature, AgendaSnapshot]] = {}
+        self.builds = 0
+
+    def get(self, source: str = AGENDA_PATH, path: Optional[str] = None) -> AgendaSnapshot:
+        """
+        Get the snapshot of an agenda file
+
+        Args:
+            source: Agenda markdown file
+            path: Snapshot file (defaults to the agenda file plus .snapshot)
+
+        Returns:
+            The snapshot of the current agenda
+
+        Raises:
+            FileNotFoundError: If the agenda file does not exist
+        """
+        signature = source_signature(source)
+        loaded = self._loaded.get(source)
+        if loaded is not None and loaded[0] == signature:
+            return loaded[1]
+
+        with self._lock:
+            loaded = self._loaded.get(source)
+            if loaded is not None and loaded[0] == signature:
+                return loaded[1]
+            path = path or snapshot_path_for(source)
+            start = time.perf_counter()
+            snapshot = read_snapshot(path, source, signature)
+            if snapshot is not None:
+                logger.info(f"Loaded agenda snapshot {path} in {(time.perf_counter() - start) * 1000:.1f} ms")
+            else:
+                snapshot = build_snapshot(source, path)
+                self.builds += 1
+            self._loaded[source] = (signature, snapshot)
+            return snapshot
+
+
+# Global instance shared by the agents and the prompt registry
+snapshot_cache = SnapshotCache()
+
+
+def load_snapshot(source: str = AGENDA_PATH) -> AgendaSnapshot:
+    """Get the snapshot of the agenda file, loading or rebuilding it if the file changed"""
+    return snapshot_cache.get(source)
+
+
+def load_agenda(path: str = AGENDA_PATH) -> AgendaIndex:
+    """Get the agenda index of the current agenda file"""
+    return load_snapshot(path).index
+
+
+def load_speaker_index(path: str = AGENDA_PATH) -> SpeakerIndex:
+    """Get the speaker index of the current agenda file"""
+    return load_snapshot(path).speakers
+
+
+def load_planner(path: str = AGENDA_PATH) -> SchedulePlanner:
+    """Get the schedule planner of the current agenda file"""
+    return load_snapshot(path).planner
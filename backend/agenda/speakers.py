@@ -0,0 +1,171 @@
+import bisect
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .index import AGENDA_PATH, AgendaIndex, Session, Speaker, normalize
+from .retrieval import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+# Match quality of a query word, by how it matched a word of a name or organization
+EXACT, PREFIX, FUZZY = 1.0, 0.9, 0.7
+
+
+def max_edits(word: str) -> int:
+    """Typos tolerated in a word: none below four letters, one up to seven, two beyond"""
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def deletes(word: str, distance: int) -> Set[str]:
+    """Every string obtained by removing up to distance characters from the word"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (insertions, deletions, substitutions and
+    adjacent transpositions), or limit + 1 once it exceeds limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SpeakerMatch(NamedTuple):
+    """A speaker matching a query, with their sessions in agenda order"""
+    speaker: Speaker
+    sessions: Tuple[Session, ...]
+    score: float
+
+
+class SpeakerIndex:
+    """Inverted index from the words of speaker names and organizations to sessions
+
+    Words are normalized (lowercase, no accents), so "Levy" finds "Maurice
+    Lévy". A query word also matches the words it starts ("Andre" finds
+    "Andréanne") and words within one or two typos, found through a
+    precomputed table of deletion variants (symmetric delete) rather than
+    by comparing against every word. Every query word matching some
+    speaker has to match the speaker's name or organization; words matching
+    no speaker at all ("someone from ...") are ignored but lower the score.
+    """
+
+    def __init__(self, sessions: Iterable[Session]):
+        """
+        Build the index
+
+        Args:
+            sessions: Parsed agenda sessions, in the order they should be listed
+        """
+        sessions_by_speaker: Dict[Tuple[str, str], List[Session]] = defaultdict(list)
+        speakers: Dict[Tuple[str, str], Speaker] = {}
+        for session in sessions:
+            for speaker in session.speakers:
+                key = (normalize(speaker.name), normalize(speaker.organization or ""))
+                speakers.setdefault(key, speaker)
+                if session not in sessions_by_speaker[key]:
+                    sessions_by_speaker[key].append(session)
+
+        self.speakers: List[Speaker] = list(speakers.values())
+        self.sessions: List[Tuple[Session, ...]] = [tuple(sessions_by_speaker[key]) for key in speakers]
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        for speaker_id, (name, organization) in enumerate(speakers):
+            for word in f"{name} {organization}".split():
+                self.postings[word].add(speaker_id)
+        self.vocabulary = sorted(self.postings)
+        deletes_table: Dict[str, List[str]] = defaultdict(list)
+        for word in self.vocabulary:
+            for variant in deletes(word, max_edits(word)):
+                deletes_table[variant].append(word)
+        # Tuples keep the table compact in memory and in the agenda snapshot
+        self._deletes: Dict[str, Tuple[str, ...]] = {variant: tuple(words) for variant, words in deletes_table.items()}
+
+    @classmethod
+    def from_file(cls, path: str = AGENDA_PATH) -> "SpeakerIndex":
+        """Index the speakers of an agenda markdown file"""
+        index = cls(AgendaIndex.from_file(path).sessions)
+        logger.info(f"Indexed {len(index.speakers)} speakers and {len(index.vocabulary)} words from {path}")
+        return index
+
+    def expand(self, word: str) -> Dict[str, float]:
+        """
+        Find the indexed words a query word matches
+
+        Args:
+            word: A normalized query word
+
+        Returns:
+            Dict mapping each matching indexed word to its match quality; typos
+            are only tolerated when no word is spelled out or started by it
+        """
+        matches: Dict[str, float] = {}
+        if len(word) >= 3:
+            position = bisect.bisect_left(self.vocabulary, word)
+            while position < len(self.vocabulary) and self.vocabulary[position].startswith(word):
+                matches[self.vocabulary[position]] = PREFIX
+                position += 1
+        if word in self.postings:
+            matches[word] = EXACT
+        limit = max_edits(word)
+        if matches or not limit:
+            return matches
+        for variant in deletes(word, limit):
+            for candidate in self._deletes.get(variant, ()):
+                if candidate not in matches and edit_distance(word, candidate, limit) <= limit:
+                    matches[candidate] = FUZZY
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> List[SpeakerMatch]:
+        """
+        Find the speakers whose name or organization matches the words of the query
+
+        Args:
+            query: Speaker name, organization, or both, e.g. "Jensen Huang", "renault" or "maurice levy"
+            limit: Maximum number of speakers to return
+
+        Returns:
+            Matching speakers, best match first
+        """
+        words = [word for word in normalize(query).split() if word not in STOPWORDS]
+        scores: Optional[Dict[int, float]] = None
+        for word in words:
+            best: Dict[int, float] = {}
+            for candidate, quality in self.expand(word).items():
+                for speaker_id in self.postings[candidate]:
+                    if quality > best.get(speaker_id, 0.0):
+                        best[speaker_id] = quality
+            if not best:
+                continue
+            if scores is None:
+                scores = best
+            else:
+                scores = {speaker_id: score + best[speaker_id] for speaker_id, score in scores.items() if speaker_id in best}
+            if not scores:
+                return []
+        if not scores:
+            return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.speakers[item[0]].name))
+        return [
+            SpeakerMatch(self.speakers[speaker_id], self.sessions[speaker_id], score / len(words))
+            for speaker_id, score in ranked[:limit]
+        ]
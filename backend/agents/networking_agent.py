@@ -1,7 +1,43 @@
-from agents import Agent
+from agents import Agent, function_tool
+import os
+import sys
+
+# Add the backend directory to the path to access the agenda index
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from agenda import load_speaker_index
+
+# Speakers returned per call
+MAX_SPEAKERS = 10
+
+
+@function_tool
+def find_speaker_sessions(query: str) -> str:
+    """
+    Find the VivaTech Conference speakers matching a name or organization, with the sessions they speak at.
+    Accents, letter case and small typos are ignored.
+
+    Args:
+        query: Speaker name, organization, or both, e.g. "Jensen Huang", "Renault" or "Maurice Levy".
+    """
+    matches = load_speaker_index().search(query, limit=MAX_SPEAKERS + 1)
+    if not matches:
+        return f"No speaker or organization matches {query!r}."
+    lines = []
+    for match in matches[:MAX_SPEAKERS]:
+        speaker = match.speaker
+        lines.append(f"{speaker.name} ({speaker.organization})" if speaker.organization else speaker.name)
+        lines.extend(f"  - {session.slot()}" for session in match.sessions)
+    if len(matches) > MAX_SPEAKERS:
+        lines.append("... more speakers match; use a more specific name.")
+    return "\n".join(lines)
+
 
 networking_agent = Agent(
     name="Networking Agent",
     handoff_description="Specialist agent for networking",
-    instructions="You provide assistance with networking. You can help answer questions about individuals attending the conference.",
+    instructions="You provide assistance with networking. You can help answer questions about individuals attending the conference. Use find_speaker_sessions to look up when and where a person, or someone from a company, is speaking.",
+    tools=[find_speaker_sessions],
 )
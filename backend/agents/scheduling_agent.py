@@ -1,21 +1,104 @@
 from agents import Agent, function_tool, WebSearchTool
+from typing import List, Optional
+import json
 import os
+import sys
 
-PATH_TO_SCHEDULE = os.path.join(os.path.dirname(__file__), "..", "data", "vivatech_agenda.md")
+# Add the backend directory to the path to access the agenda index
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+
+from agenda import load_agenda, load_planner, parse_blocked, parse_day, profile_weights, topic_weights
+
+# Sessions returned per call; narrower filters are needed beyond this
+MAX_SESSIONS = 30
+# LinkedIn profile saved by the backend, used for interests when no topics are given
+USER_PROFILE_PATH = os.path.join(BACKEND_DIR, "user.json")
+
+
+def load_user_profile() -> Optional[dict]:
+    """Load the stored LinkedIn profile, or None if there is none"""
+    try:
+        with open(USER_PROFILE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f) or None
+    except (OSError, ValueError):
+        return None
 
 
 @function_tool
-def get_full_schedule() -> str:  # TODO: maybe add an option for day/time?
+def find_sessions(
+    day: Optional[str] = None,
+    stage: Optional[str] = None,
+    start_after: Optional[str] = None,
+    end_before: Optional[str] = None,
+    speaker: Optional[str] = None,
+    keyword: Optional[str] = None,
+) -> str:
+    """
+    Find VivaTech Conference sessions matching all of the given filters, one session per line.
+
+    Args:
+        day: Conference day, e.g. "2025-06-11", "June 12" or "Thursday".
+        stage: Stage name or part of it, e.g. "Stage One", "Blue" or "Dome".
+        start_after: Only sessions starting at or after this time, e.g. "14:00" or "2 PM".
+        end_before: Only sessions ending at or before this time, e.g. "17:30".
+        speaker: Speaker or company name, or part of it.
+        keyword: Words that must all appear in the session title, track or speakers.
     """
-    Get the full schedule for the VivaTech Conference.
+    agenda = load_agenda()
+    try:
+        sessions = agenda.find_sessions(day, stage, start_after, end_before, speaker, keyword)
+    except ValueError as e:
+        return f"{e}. Days: {', '.join(f'{d:%Y-%m-%d}' for d in agenda.days)}. Stages: {', '.join(agenda.stages)}."
+    if not sessions:
+        return "No sessions match these filters."
+    lines = [session.to_line() for session in sessions[:MAX_SESSIONS]]
+    if len(sessions) > MAX_SESSIONS:
+        lines.append(f"... {len(sessions) - MAX_SESSIONS} more sessions match; add filters to narrow them down.")
+    return "\n".join(lines)
+
+
+@function_tool
+def plan_schedule(
+    topics: Optional[List[str]] = None,
+    day: Optional[str] = None,
+    blocked: Optional[List[str]] = None,
+    walking_minutes: int = 10,
+    use_profile: bool = True,
+) -> str:
+    """
+    Build the conflict-free VivaTech schedule that best matches the user's interests.
+
+    Args:
+        topics: Interests such as "AI", "climate tech" or "robotics:2" (a suffix weighs a topic more; default 1).
+        day: Only plan this day, e.g. "June 11" or "Thursday"; all days if omitted.
+        blocked: Times the user is not available, e.g. "June 11 12:00-13:30", "12pm-2pm" (every day) or "June 12" (whole day).
+        walking_minutes: Minimum minutes between sessions on different stages.
+        use_profile: Also use the interests in the user's LinkedIn profile.
     """
-    with open(PATH_TO_SCHEDULE, "r") as f:
-        return f.read()
+    planner = load_planner()
+    weights = profile_weights(load_user_profile()) if use_profile else {}
+    for term, weight in topic_weights(topics or []).items():
+        weights[term] = max(weights.get(term, 0.0), weight)
+    if not weights:
+        return "No interests to plan for: pass topics, since no user profile is stored."
+    try:
+        days = [parse_day(day, planner.days)] if day else None
+        blocked_ranges = [parse_blocked(value, planner.days) for value in blocked or []]
+    except ValueError as e:
+        return f"{e}. Days: {', '.join(f'{d:%Y-%m-%d}' for d in planner.days)}."
+    plan = planner.plan(weights, days=days, blocked=blocked_ranges, walking_minutes=max(walking_minutes, 0))
+    if not plan.sessions:
+        return "No sessions match these interests in the available time."
+    lines = [f"{p.session.slot()} (matches: {', '.join(p.matched)})" for p in plan.sessions]
+    lines.append(f"{len(plan.sessions)} sessions, no overlaps, at least {walking_minutes} minutes to change stages.")
+    return "\n".join(lines)
 
 
 scheduling_agent = Agent(
     name="Scheduling Agent",
     handoff_description="Specialist agent for creating a personalized schedule for the conference",
-    instructions="You provide assistance with creating a personalized agenda and scheduling them. Make sure you understand the user's preferences and constraints. Be well-organized and avoid overwhelming the user with too many options.",
-    tools=[get_full_schedule],
+    instructions="You provide assistance with creating a personalized agenda and scheduling them. Make sure you understand the user's preferences and constraints. Be well-organized and avoid overwhelming the user with too many options. Look up sessions with find_sessions, filtering by day, stage, time, speaker or topic, instead of guessing. To build a schedule, call plan_schedule with the user's interests and unavailable times, and present its result rather than assembling one yourself.",
+    tools=[find_sessions, plan_schedule],
 )
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Measure the latency the VivaTech input guardrail adds to a turn
+
+Runs the same on-topic prompts through the ConversationManager with
+main_agent in three modes, interleaved so they see the same API conditions:
+
+- none: no input guardrail
+- concurrent: the guardrail runs alongside the agent's first model call (production)
+- serial: the guardrail has to pass before the agent starts
+
+Each turn opens a new conversation, so every run sends the same context.
+Use --simulate to replace both models with fixed delays and measure the
+orchestration overhead alone, without an API key.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from agents import Model, ModelResponse, Usage, trace
+from openai.types.responses import ResponseOutputMessage, ResponseOutputText
+
+from config import settings
+from conference_agent.agent import VivaTechConference, guardrail_agent, main_agent
+from memory.context_manager import ConversationManager
+from memory.input_guardrails import InputGuardrailCheck
+from services.prompt_registry import PromptRegistry
+
+PROMPTS = [
+    "What talks are on the main stage on June 11?",
+    "Who is speaking about AI regulation at VivaTech?",
+    "Help me plan my afternoon at the conference tomorrow",
+    "Which sessions cover climate tech?",
+    "When does the keynote start on the first day?",
+]
+
+MODES = ("none", "concurrent", "serial")
+
+
+class SimulatedModel(Model):
+    """A model answering after a fixed delay, for measuring orchestration overhead"""
+
+    def __init__(self, latency_seconds: float):
+        self.latency_seconds = latency_seconds
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs,
+                           tracing, *, previous_response_id=None) -> ModelResponse:
+        await asyncio.sleep(self.latency_seconds)
+        if output_schema is not None and not output_schema.is_plain_text():
+            text = VivaTechConference(is_viva_tech_conference=True, reasoning="simulated").model_dump_json()
+        else:
+            text = "Simulated answer about VivaTech."
+        message = ResponseOutputMessage(
+            id="msg_simulated",
+            type="message",
+            role="assistant",
+            status="completed",
+            content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+        )
+        return ModelResponse(output=[message], usage=Usage(requests=1), response_id=None)
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError("The guardrail benchmark only runs non-streamed turns")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_benchmark(runs: int) -> Dict[str, List[float]]:
+    """
+    Time runs turns per mode
+
+    Args:
+        runs: Number of timed turns per mode
+
+    Returns:
+        Dict mapping each mode to its turn latencies in seconds
+    """
+    unguarded = ConversationManager(agent=main_agent.clone(input_guardrails=[]), workflow_name="GuardrailBenchmark")
+    guarded = ConversationManager(agent=main_agent, workflow_name="GuardrailBenchmark")
+
+    async def serial(prompt: str, group_id: str) -> str:
+        with trace(workflow_name="GuardrailBenchmark", group_id=group_id):
+            await InputGuardrailCheck(main_agent, main_agent.input_guardrails, prompt).wait()
+        return await unguarded.execute(prompt, group_id)
+
+    turns = {"none": unguarded.execute, "concurrent": guarded.execute, "serial": serial}
+    latencies: Dict[str, List[float]] = {mode: [] for mode in MODES}
+
+    # One untimed turn per mode warms up connections
+    for i in range(runs + 1):
+        prompt = PROMPTS[i % len(PROMPTS)]
+        for mode in MODES:
+            start = time.perf_counter()
+            await turns[mode](prompt, f"benchmark-{mode}-{i}")
+            if i > 0:
+                latencies[mode].append(time.perf_counter() - start)
+        print(f"Turn {i}/{runs}", end="\r", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    return latencies
+
+
+def report(latencies: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """Print p50/p95 latency per mode and the p50 overhead over no guardrail"""
+    baseline = statistics.median(latencies["none"])
+    summary = {}
+    print(f"{'mode':<12}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}{'p50 overhead ms':>18}")
+    for mode in MODES:
+        p50 = statistics.median(latencies[mode])
+        summary[mode] = {
+            "p50_ms": p50 * 1000,
+            "p95_ms": percentile(latencies[mode], 95) * 1000,
+            "mean_ms": statistics.mean(latencies[mode]) * 1000,
+            "p50_overhead_ms": (p50 - baseline) * 1000,
+        }
+        row = summary[mode]
+        print(f"{mode:<12}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['mean_ms']:>10.1f}"
+              f"{row['p50_overhead_ms']:>18.1f}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="Timed turns per mode")
+    parser.add_argument("--model", default="", help="Model for the main agent (defaults to the SDK default)")
+    parser.add_argument("--guardrail-model", default=settings.input_guardrail_model,
+                        help="Model for the guardrail agent (defaults to INPUT_GUARDRAIL_MODEL)")
+    parser.add_argument("--simulate", nargs=2, type=float, metavar=("MAIN_MS", "GUARDRAIL_MS"),
+                        help="Replace the models with fixed delays instead of calling the API")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    if args.simulate:
+        main_agent.model = SimulatedModel(args.simulate[0] / 1000)
+        guardrail_agent.model = SimulatedModel(args.simulate[1] / 1000)
+    else:
+        if not os.getenv("OPENAI_API_KEY") and settings.openai_api_key:
+            os.environ["OPENAI_API_KEY"] = settings.openai_api_key
+        if args.model:
+            main_agent.model = args.model
+        if args.guardrail_model:
+            guardrail_agent.model = args.guardrail_model
+        # Production instructions, so the first model call sees the same context
+        main_agent.instructions = PromptRegistry(
+            top_k=settings.prompt_retrieval_top_k if settings.prompt_retrieval_enabled else None
+        ).dynamic_instructions
+
+    summary = report(asyncio.run(run_benchmark(args.runs)))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
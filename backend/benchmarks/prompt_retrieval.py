@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Compare the main agent's prompt with the whole agenda and with retrieved sections
+
+For each benchmark question, the instructions are assembled twice by the
+PromptRegistry: with the whole agenda (as when instructions.txt embedded it)
+and with only the top-k agenda sections BM25 ranks for the question. The
+script reports instruction tokens, the time to assemble them and, as a
+retrieval quality check, how often the section holding a session is
+retrieved when its title or a speaker is asked about.
+
+With --live, every question is also sent to main_agent in both modes,
+interleaved, and the p50 turn latency and input tokens billed per turn are
+compared. This needs an OpenAI API key.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from agenda import load_agenda
+from config import settings
+from conference_agent.agent import main_agent
+from memory.context_manager import ConversationManager
+from memory.context_policy import TokenCounter
+from services.prompt_registry import PromptRegistry
+
+PROMPTS = [
+    "What talks are on Stage One on June 11?",
+    "Who is speaking about AI regulation at VivaTech?",
+    "Is there anything about FemTech or women's health?",
+    "Which sessions cover climate tech and sustainability?",
+    "When is the Nvidia keynote?",
+    "What happens at the Founders Lounge on Thursday?",
+    "Are there robotics talks?",
+    "Where is VivaTech this year?",
+]
+
+MODES = ("full", "retrieval")
+
+
+def instructions_for(registry: PromptRegistry, prompt: str) -> str:
+    """Resolve the registry's dynamic instructions as the runner does for a turn"""
+    return registry.dynamic_instructions(SimpleNamespace(context=SimpleNamespace(prompt=prompt)), main_agent)
+
+
+def measure_prompts(registries: Dict[str, PromptRegistry], counter: TokenCounter) -> Dict[str, Dict[str, float]]:
+    """
+    Count instruction tokens and assembly time per mode
+
+    Returns:
+        Dict mapping each mode to its mean tokens and mean assembly time in microseconds
+    """
+    summary = {}
+    for mode, registry in registries.items():
+        # Load the files first, so only the per-turn work is timed
+        registry.get_instructions()
+        tokens, seconds = [], []
+        for prompt in PROMPTS:
+            start = time.perf_counter()
+            instructions = instructions_for(registry, prompt)
+            seconds.append(time.perf_counter() - start)
+            tokens.append(counter.count_text(instructions))
+        summary[mode] = {"mean_tokens": statistics.mean(tokens), "mean_assembly_us": statistics.mean(seconds) * 1e6}
+    return summary
+
+
+def measure_recall(registry: PromptRegistry) -> Dict[str, float]:
+    """
+    Check that asking about a session retrieves the section holding it
+
+    Every session is asked about by its title, and by its first speaker when
+    it has one; a hit is a retrieved section on the session's day and stage.
+
+    Returns:
+        Dict with the hit rate of title and speaker questions
+    """
+    hits = {"title": [], "speaker": []}
+    for session in load_agenda().sessions:
+        queries = {"title": session.title}
+        if session.speakers:
+            queries["speaker"] = f"When is {session.speakers[0].name} speaking?"
+        for kind, query in queries.items():
+            sections = registry.select_sections(query)
+            hits[kind].append(any(
+                s.stage == session.stage and s.day == f"{session.day:%B} {session.day.day}, {session.day.year}"
+                for s in sections
+            ))
+    return {f"{kind}_recall": sum(found) / len(found) for kind, found in hits.items() if found}
+
+
+async def run_live(registries: Dict[str, PromptRegistry], runs: int) -> Dict[str, Dict[str, List[float]]]:
+    """
+    Send the benchmark questions to main_agent in both modes, interleaved
+
+    Args:
+        registries: Prompt registry per mode
+        runs: Number of timed turns per mode
+
+    Returns:
+        Dict mapping each mode to its turn latencies in seconds and input tokens
+    """
+    managers = {
+        mode: ConversationManager(
+            agent=main_agent.clone(input_guardrails=[], instructions=registry.dynamic_instructions),
+            workflow_name="PromptRetrievalBenchmark",
+        )
+        for mode, registry in registries.items()
+    }
+    results: Dict[str, Dict[str, List[float]]] = {mode: {"latency": [], "input_tokens": []} for mode in MODES}
+
+    # One untimed turn per mode warms up connections
+    for i in range(runs + 1):
+        prompt = PROMPTS[i % len(PROMPTS)]
+        for mode, manager in managers.items():
+            group_id = f"benchmark-{mode}-{i}"
+            start = time.perf_counter()
+            await manager.execute(prompt, group_id)
+            if i > 0:
+                results[mode]["latency"].append(time.perf_counter() - start)
+                results[mode]["input_tokens"].append(manager.get_turn_usage(group_id)["input_tokens"])
+        print(f"Turn {i}/{runs}", end="\r", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=settings.prompt_retrieval_top_k,
+                        help="Agenda sections retrieved per turn (defaults to PROMPT_RETRIEVAL_TOP_K)")
+    parser.add_argument("--live", action="store_true", help="Also time real turns against the OpenAI API")
+    parser.add_argument("--runs", type=int, default=16, help="Timed turns per mode with --live")
+    parser.add_argument("--model", default="", help="Model for the main agent with --live (defaults to the SDK default)")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    args = parser.parse_args()
+
+    registries = {"full": PromptRegistry(top_k=None), "retrieval": PromptRegistry(top_k=args.top_k)}
+    counter = TokenCounter(settings.default_model)
+    summary = {"prompt": measure_prompts(registries, counter), "recall": measure_recall(registries["retrieval"])}
+
+    print("Instruction tokens per turn:")
+    print(f"{'mode':<12}{'mean tokens':>13}{'assembly us':>13}")
+    for mode in MODES:
+        row = summary["prompt"][mode]
+        print(f"{mode:<12}{row['mean_tokens']:>13.0f}{row['mean_assembly_us']:>13.1f}")
+    saved = 1 - summary["prompt"]["retrieval"]["mean_tokens"] / summary["prompt"]["full"]["mean_tokens"]
+    print(f"Retrieval sends {saved:.1%} fewer instruction tokens (top {args.top_k} sections)")
+    print("Section recall: " + ", ".join(f"{name} {value:.1%}" for name, value in summary["recall"].items()))
+
+    if args.live:
+        if not os.getenv("OPENAI_API_KEY") and settings.openai_api_key:
+            os.environ["OPENAI_API_KEY"] = settings.openai_api_key
+        if args.model:
+            main_agent.model = args.model
+        results = asyncio.run(run_live(registries, args.runs))
+        summary["live"] = {}
+        print(f"{'mode':<12}{'p50 ms':>10}{'mean ms':>10}{'input tokens':>14}")
+        for mode in MODES:
+            latency, tokens = results[mode]["latency"], results[mode]["input_tokens"]
+            summary["live"][mode] = {
+                "p50_ms": statistics.median(latency) * 1000,
+                "mean_ms": statistics.mean(latency) * 1000,
+                "mean_input_tokens": statistics.mean(tokens),
+            }
+            row = summary["live"][mode]
+            print(f"{mode:<12}{row['p50_ms']:>10.1f}{row['mean_ms']:>10.1f}{row['mean_input_tokens']:>14.0f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
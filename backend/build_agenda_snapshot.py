@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Compile the agenda into the snapshot the backend and the agents load
+
+Parses data/vivatech_agenda.md once and pickles the session index, speaker
+index, schedule planner and prompt retrieval sections, with their time
+indexes, next to it. Processes load the snapshot instead of parsing the
+markdown, and rebuild it themselves when the agenda's modification time
+and content hash no longer match, so running this is only needed to pay
+the build ahead of time, e.g. in a deploy step or a Docker image.
+"""
+
+import argparse
+import time
+
+from agenda import AGENDA_PATH, build_snapshot
+from agenda.snapshot import SNAPSHOT_VERSION, read_snapshot, snapshot_path_for, source_signature
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=AGENDA_PATH, help="Agenda markdown file")
+    parser.add_argument("--output", help="Snapshot file (defaults to the agenda file plus .snapshot)")
+    parser.add_argument("--check", action="store_true", help="Only report whether the snapshot is up to date")
+    args = parser.parse_args()
+    output = args.output or snapshot_path_for(args.source)
+
+    start = time.perf_counter()
+    snapshot = read_snapshot(output, args.source, source_signature(args.source))
+    load_ms = (time.perf_counter() - start) * 1000
+    if args.check:
+        if snapshot is None:
+            raise SystemExit(f"{output} is missing or stale")
+        print(f"{output} is up to date (version {SNAPSHOT_VERSION}, loaded in {load_ms:.1f} ms)")
+    else:
+        start = time.perf_counter()
+        snapshot = build_snapshot(args.source, output)
+        build_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        read_snapshot(output, args.source, source_signature(args.source))
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"Wrote {output}: {len(snapshot.index.sessions)} sessions, {len(snapshot.speakers.speakers)} speakers, "
+              f"{len(snapshot.retriever.sections)} sections")
+        print(f"Parsing and indexing took {build_ms:.1f} ms; loading the snapshot takes {load_ms:.1f} ms")
@@ -16,6 +16,7 @@ class Settings(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_reload: bool = True
+    api_workers: int = 1  # >1 runs several worker processes; disables reload
     
     # CORS Configuration
     allowed_origins: List[str] = ["*"]
@@ -26,6 +27,60 @@ class Settings(BaseSettings):
     default_max_tokens: int = 2048
     default_top_p: float = 1.0
     
+    # Chat Storage Configuration
+    chat_storage_backend: str = "json"  # "json", "log" or "sqlite"
+    chat_json_path: str = "chats.json"
+    chat_log_dir: str = "chat_log"
+    chat_log_segment_max_bytes: int = 16 * 1024 * 1024
+    chat_log_fsync: bool = True
+    chat_sqlite_path: str = "chats.db"
+    chat_archive_enabled: bool = True
+    chat_archive_dir: str = "chat_archive"
+    chat_archive_idle_hours: float = 24.0
+    chat_compaction_interval_seconds: float = 600.0
+    chat_write_flush_interval_ms: float = 5.0
+    chat_write_max_batch_size: int = 64
+    chat_search_enabled: bool = True
+    chat_search_path: str = "chat_search.db"
+    storage_io_max_workers: int = 4
+
+    # Conversation State Cache Configuration
+    conversation_cache_max_entries: int = 1000
+    conversation_cache_max_bytes: int = 64 * 1024 * 1024
+    conversation_cache_ttl_seconds: float = 6 * 3600
+    conversation_rehydrate_max_messages: int = 50
+
+    # Agent Turn Scheduling Configuration
+    agent_max_concurrent_runs: int = 8
+    agent_max_queued_runs: int = 32
+    agent_max_queued_per_conversation: int = 2
+    agent_queue_timeout_seconds: float = 30.0  # 0 waits indefinitely
+
+    # First-Turn Response Cache Configuration
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 1000
+    response_cache_ttl_seconds: float = 3600.0  # 0 disables expiry
+    response_cache_similarity_threshold: float = 0.0  # TF-IDF cosine for near-duplicate prompts; 0 disables
+
+    # Context Window Configuration
+    context_token_budget: int = 6000  # History tokens above which older turns are summarized
+    context_keep_last_turns: int = 4
+    context_summarization_enabled: bool = True
+    context_summary_model: str = ""  # Defaults to default_model
+
+    # Prompt Retrieval Configuration
+    prompt_retrieval_enabled: bool = True  # False includes the whole agenda in every turn's instructions
+    prompt_retrieval_top_k: int = 3  # Agenda sections included per turn
+
+    # Input Guardrail Configuration
+    input_guardrail_enabled: bool = True
+    input_guardrail_model: str = ""  # Defaults to the SDK's default model
+
+    # Intent Router Configuration
+    intent_router_enabled: bool = True
+    intent_router_model_path: str = "intent_router.json"  # Trained classifier; rules only if missing
+    intent_router_min_confidence: float = 0.9
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
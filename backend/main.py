@@ -1,8 +1,11 @@
 from contextlib import asynccontextmanager
+import asyncio
+import json
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from datetime import datetime
 import uuid
 from agents.mcp import MCPServerStdio
@@ -10,9 +13,14 @@ from config import settings
 from models import (
     MessageRequest, MessageResponse, HealthResponse, ErrorResponse,
     ChatMessage, ChatHistoryResponse, PaginationParams, ConversationListResponse,
+    ChatHistoryCursorResponse, ConversationCursorResponse, ChatSearchResponse,
+    ConversationUsageResponse, UsageSummaryResponse, WorkerUsageSummaryResponse,
     LinkedInProfileRequest, LinkedInProfileResponse, CompleteUserProfileResponse
 )
-from services import conversation_service, chat_storage, linkedin_service, user_storage
+from services import conversation_service, async_chat_storage, async_user_storage, linkedin_service
+from services.chat_storage import InvalidCursorError, ConversationVersionConflictError
+from services.turn_scheduler import TurnRejectedError
+from services.metrics import RequestMetricsMiddleware, metrics_registry
 
 # Configure logging
 logging.basicConfig(level=getattr(logging, settings.log_level))
@@ -20,7 +28,8 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: fail now rather than on the first turn if the tokenizer is unavailable
+    conversation_service.load_tokenizer()
     async with MCPServerStdio(
         params={
             "command": "node",
@@ -35,7 +44,17 @@ async def lifespan(app: FastAPI):
     ) as google_calendar_server:
         # Store the resource in app state so routes can access it
         app.state.google_calendar_server = google_calendar_server
+        # Move idle conversations to the compressed archive in the background
+        compaction_task = asyncio.create_task(
+            async_chat_storage.run_compaction(
+                settings.chat_compaction_interval_seconds,
+                settings.chat_archive_idle_hours * 3600
+            )
+        )
         yield
+        compaction_task.cancel()
+    # Shutdown: persist any writes still queued for a group commit
+    await async_chat_storage.close()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -43,7 +62,8 @@ app = FastAPI(
     description="A FastAPI backend for chatbot application with OpenAI integration",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -55,12 +75,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms for GET /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"status": "healthy", "message": "Chatbot Backend API is running"}
 
-@app.post("/messages", response_model=MessageResponse, responses={500: {"model": ErrorResponse}})
+@app.post(
+    "/messages",
+    response_model=MessageResponse,
+    responses={
+        409: {"model": ErrorResponse},
+        429: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse}
+    }
+)
 async def create_message(request: MessageRequest):
     """
     Create a new message or continue existing conversation
@@ -77,33 +109,42 @@ async def create_message(request: MessageRequest):
         
         logger.info(f"Processing message request. Conversation ID: {conversation_id}")
         
-        # Save user message to storage
+        # Fail fast if the agent is saturated or the client's version is stale
+        conversation_service.check_turn_admission(conversation_id)
+        await async_chat_storage.check_version(conversation_id, request.expected_version)
+        
         user_message = ChatMessage(
             role="user",
             content=request.message,
             openai_id=None
         )
-        chat_storage.save_message(conversation_id, user_message)
+        
+        async def persist_turn(result: Dict[str, Any]) -> None:
+            # Runs inside the turn's scheduler slot, so concurrent turns of the
+            # conversation are stored in order, and a rejected turn stores nothing
+            assistant_message = ChatMessage(
+                role="assistant",
+                content=result["message"],
+                openai_id=result["response_id"],
+                usage=result.get("usage")
+            )
+            await async_chat_storage.save_turn(
+                conversation_id, [user_message, assistant_message], request.expected_version
+            )
         
         # Call conversation service
         result = await conversation_service.create_response(
             message=request.message,
             conversation_id=conversation_id,
-            google_calendar_server=app.state.google_calendar_server
-        )
-        
-        # Save assistant response to storage
-        assistant_message = ChatMessage(
-            role="assistant",
-            content=result["message"],
-            openai_id=result["response_id"]
+            google_calendar_server=app.state.google_calendar_server,
+            persist_turn=persist_turn
         )
-        chat_storage.save_message(conversation_id, assistant_message)
         
         response = MessageResponse(
             id=conversation_id,
             openai_id=result["response_id"],
-            message=result["message"]
+            message=result["message"],
+            usage=result.get("usage")
         )
         
         logger.info(f"Message processed successfully. Response ID: {response.openai_id}")
@@ -111,6 +152,11 @@ async def create_message(request: MessageRequest):
         
     except HTTPException:
         raise
+    except ConversationVersionConflictError as e:
+        logger.info(f"Rejected stale message for conversation {e.conversation_id}: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except TurnRejectedError as e:
+        raise turn_rejected_exception(e)
     except Exception as e:
         logger.error(f"Error processing message: {str(e)}")
         raise HTTPException(
@@ -118,6 +164,124 @@ async def create_message(request: MessageRequest):
             detail=f"Failed to process message: {str(e)}"
         )
 
+def turn_rejected_exception(error: TurnRejectedError) -> HTTPException:
+    """Map a scheduler rejection to a 429/503 response telling the client when to retry"""
+    return HTTPException(
+        status_code=error.status_code,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_message_events(
+    request: MessageRequest, conversation_id: str, user_message: ChatMessage
+) -> AsyncIterator[str]:
+    """Run the agent for a message and relay its events as SSE, persisting the turn once it completes"""
+    yield sse_event("conversation", {"id": conversation_id})
+    try:
+        async for event in conversation_service.create_response_stream(
+            message=request.message,
+            conversation_id=conversation_id,
+            google_calendar_server=app.state.google_calendar_server
+        ):
+            event_type = event.pop("type")
+            if event_type != "done":
+                yield sse_event(event_type, event)
+                continue
+            
+            # Persist the user message and the reply together before announcing completion,
+            # so a failed or abandoned stream leaves no unanswered message in the history
+            assistant_message = ChatMessage(
+                role="assistant",
+                content=event["message"],
+                openai_id=event["response_id"],
+                usage=event.get("usage")
+            )
+            await async_chat_storage.save_turn(
+                conversation_id, [user_message, assistant_message], request.expected_version
+            )
+            response = MessageResponse(
+                id=conversation_id,
+                openai_id=event["response_id"],
+                message=event["message"],
+                usage=assistant_message.usage
+            )
+            logger.info(f"Streamed message processed successfully. Response ID: {response.openai_id}")
+            yield sse_event("done", response.model_dump())
+    except TurnRejectedError as e:
+        yield sse_event("error", {"detail": str(e), "retry_after": e.retry_after})
+    except ConversationVersionConflictError as e:
+        logger.info(f"Rejected stale streamed message for conversation {e.conversation_id}: {e}")
+        # The turn was not stored; rebuild the context from storage next time
+        conversation_service.clear_conversation(conversation_id)
+        yield sse_event("error", {"detail": str(e)})
+    except Exception as e:
+        logger.error(f"Error streaming message: {str(e)}")
+        yield sse_event("error", {"detail": f"Failed to process message: {str(e)}"})
+
+@app.post(
+    "/messages/stream",
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        409: {"model": ErrorResponse},
+        429: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+        503: {"model": ErrorResponse}
+    }
+)
+async def create_message_stream(request: MessageRequest):
+    """
+    Create a new message or continue existing conversation, streaming the response as Server-Sent Events
+    
+    Events, in order: "conversation" with the conversation ID, then any number
+    of "agent", "handoff", "tool_call", "tool_output" and "token" events as the
+    agents run, and finally "done" with the same body as POST /messages, or
+    "error" if the run failed.
+    
+    Args:
+        request: MessageRequest containing message and optional id
+        
+    Returns:
+        StreamingResponse with text/event-stream content
+    """
+    try:
+        conversation_id = request.id or str(uuid.uuid4())
+        
+        logger.info(f"Processing streamed message request. Conversation ID: {conversation_id}")
+        
+        conversation_service.check_turn_admission(conversation_id)
+        
+        # Report stale versions before streaming starts; the message itself is
+        # only saved with the reply, once the stream completes
+        await async_chat_storage.check_version(conversation_id, request.expected_version)
+        user_message = ChatMessage(
+            role="user",
+            content=request.message,
+            openai_id=None
+        )
+        
+    except ConversationVersionConflictError as e:
+        logger.info(f"Rejected stale message for conversation {e.conversation_id}: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
+    except TurnRejectedError as e:
+        raise turn_rejected_exception(e)
+    except Exception as e:
+        logger.error(f"Error processing message: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process message: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        stream_message_events(request, conversation_id, user_message),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the client as they are generated
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/linkedin-profile", response_model=LinkedInProfileResponse, responses={500: {"model": ErrorResponse}})
 async def scrape_linkedin_profile(request: LinkedInProfileRequest):
     """
@@ -136,7 +300,7 @@ async def scrape_linkedin_profile(request: LinkedInProfileRequest):
         profile_data = await linkedin_service.scrape_profile(request.linkedinUrl)
         
         # Save all profile data to user.json
-        user_storage.save_profile(request.linkedinUrl, profile_data)
+        await async_user_storage.save_profile(request.linkedinUrl, profile_data)
         
         # Extract firstName and lastName for the response
         first_name = profile_data.get("firstName", "")
@@ -160,10 +324,17 @@ async def scrape_linkedin_profile(request: LinkedInProfileRequest):
             detail=f"Failed to scrape LinkedIn profile: {str(e)}"
         )
 
-@app.get("/chat", response_model=ConversationListResponse, responses={500: {"model": ErrorResponse}})
+@app.get(
+    "/chat",
+    response_model=Union[ConversationListResponse, ConversationCursorResponse],
+    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}}
+)
 async def get_all_conversations(
     page: int = Query(1, ge=1, description="Page number, minimum 1"),
-    limit: int = Query(10, ge=1, le=100, description="Number of conversations per page, 1-100")
+    limit: int = Query(10, ge=1, le=100, description="Number of conversations per page, 1-100"),
+    latest: bool = Query(False, description="Cursor mode: return the most recently active conversations"),
+    before: Optional[str] = Query(None, description="Cursor mode: return conversations older than this cursor"),
+    after: Optional[str] = Query(None, description="Cursor mode: return conversations newer than this cursor")
 ):
     """
     Get all conversations with pagination, ordered from latest to oldest
@@ -171,22 +342,34 @@ async def get_all_conversations(
     Args:
         page: Page number (default: 1, minimum: 1)
         limit: Conversations per page (default: 10, minimum: 1, maximum: 100)
+        latest: Use cursor mode starting from the most recently active conversations
+        before: Opaque cursor; return conversations older than it (cursor mode)
+        after: Opaque cursor; return conversations newer than it (cursor mode)
         
     Returns:
-        ConversationListResponse with paginated conversations and metadata
+        ConversationListResponse with paginated conversations and metadata, or
+        ConversationCursorResponse with cursors when in cursor mode
     """
     try:
+        if latest or before is not None or after is not None:
+            logger.info(f"Retrieving conversations by cursor - limit: {limit}")
+            conversations_response = await async_chat_storage.get_conversations_by_cursor(limit, before, after)
+            logger.info(f"Retrieved {len(conversations_response.conversations)} conversations")
+            return conversations_response
+        
         logger.info(f"Retrieving all conversations - page: {page}, limit: {limit}")
         
         pagination = PaginationParams(page=page, limit=limit)
         
         # Get conversations from storage
-        conversations_response = chat_storage.get_all_conversations(pagination)
+        conversations_response = await async_chat_storage.get_all_conversations(pagination)
         
         logger.info(f"Retrieved {len(conversations_response.conversations)} conversations")
         
         return conversations_response
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving conversations: {str(e)}")
         raise HTTPException(
@@ -194,11 +377,81 @@ async def get_all_conversations(
             detail=f"Failed to retrieve conversations: {str(e)}"
         )
 
-@app.get("/chat/{conversation_id}", response_model=ChatHistoryResponse, responses={500: {"model": ErrorResponse}})
+@app.get("/chat/export", responses={200: {"content": {"application/x-ndjson": {}}}})
+async def export_conversations(
+    conversation_id: Optional[List[str]] = Query(None, description="Only export these conversations (repeatable)"),
+    since: Optional[datetime] = Query(None, description="Only export messages at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only export messages before this time")
+):
+    """
+    Stream conversations and messages as NDJSON
+    
+    Each conversation is emitted as a {"type": "conversation"} line followed by
+    one {"type": "message"} line per message. The store is read incrementally,
+    so memory use does not grow with its size.
+    
+    Args:
+        conversation_id: Optional conversation IDs to restrict the export to
+        since: Optional inclusive lower bound on message timestamps
+        until: Optional exclusive upper bound on message timestamps
+        
+    Returns:
+        StreamingResponse with application/x-ndjson content
+    """
+    logger.info(f"Exporting conversations - ids: {conversation_id}, since: {since}, until: {until}")
+    return StreamingResponse(
+        async_chat_storage.export_ndjson(conversation_id, since, until),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=chats.ndjson"}
+    )
+
+@app.get(
+    "/chat/search",
+    response_model=ChatSearchResponse,
+    responses={500: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
+)
+async def search_chats(
+    q: str = Query(..., min_length=1, description="Words to search for in message content"),
+    page: int = Query(1, ge=1, description="Page number, minimum 1"),
+    limit: int = Query(10, ge=1, le=100, description="Number of results per page, 1-100")
+):
+    """
+    Search all stored messages, best matches first
+    
+    Args:
+        q: Free-text query; every word must appear in a matching message
+        page: Page number (default: 1, minimum: 1)
+        limit: Results per page (default: 10, minimum: 1, maximum: 100)
+        
+    Returns:
+        ChatSearchResponse with ranked conversation IDs and message snippets
+    """
+    if not async_chat_storage.search_enabled:
+        raise HTTPException(status_code=503, detail="Chat search is disabled")
+    try:
+        logger.info(f"Searching chats - q: {q!r}, page: {page}, limit: {limit}")
+        results = await async_chat_storage.search(q, PaginationParams(page=page, limit=limit))
+        logger.info(f"Chat search matched {results.total_results} messages")
+        return results
+    except Exception as e:
+        logger.error(f"Error searching chats: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to search chats: {str(e)}"
+        )
+
+@app.get(
+    "/chat/{conversation_id}",
+    response_model=Union[ChatHistoryResponse, ChatHistoryCursorResponse],
+    responses={400: {"model": ErrorResponse}, 500: {"model": ErrorResponse}}
+)
 async def get_chat_history(
     conversation_id: str,
     page: int = Query(1, ge=1, description="Page number, minimum 1"),
-    limit: int = Query(10, ge=1, le=100, description="Number of messages per page, 1-100")
+    limit: int = Query(10, ge=1, le=100, description="Number of messages per page, 1-100"),
+    latest: bool = Query(False, description="Cursor mode: return the newest messages"),
+    before: Optional[str] = Query(None, description="Cursor mode: return messages older than this cursor"),
+    after: Optional[str] = Query(None, description="Cursor mode: return messages newer than this cursor")
 ):
     """
     Get chat history for a specific conversation with pagination
@@ -207,22 +460,33 @@ async def get_chat_history(
         conversation_id: The conversation ID
         page: Page number (default: 1, minimum: 1)
         limit: Messages per page (default: 10, minimum: 1, maximum: 100)
+        latest: Use cursor mode starting from the newest messages
+        before: Opaque cursor; return messages older than it (cursor mode)
+        after: Opaque cursor; return messages newer than it (cursor mode)
         
     Returns:
-        ChatHistoryResponse with paginated messages and metadata
+        ChatHistoryResponse with paginated messages and metadata, or
+        ChatHistoryCursorResponse with cursors when in cursor mode
     """
     try:
         logger.info(f"Retrieving chat history for conversation: {conversation_id}")
         
-        pagination = PaginationParams(page=page, limit=limit)
-        
-        # Get messages from storage
-        chat_history = chat_storage.get_conversation_messages(conversation_id, pagination)
+        if latest or before is not None or after is not None:
+            chat_history = await async_chat_storage.get_conversation_messages_by_cursor(
+                conversation_id, limit, before, after
+            )
+        else:
+            pagination = PaginationParams(page=page, limit=limit)
+            
+            # Get messages from storage
+            chat_history = await async_chat_storage.get_conversation_messages(conversation_id, pagination)
         
         logger.info(f"Retrieved {len(chat_history.messages)} messages for conversation {conversation_id}")
         
         return chat_history
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving chat history: {str(e)}")
         raise HTTPException(
@@ -240,6 +504,73 @@ async def health_check():
         timestamp=datetime.utcnow()
     )
 
+@app.get("/chat/{conversation_id}/usage", response_model=ConversationUsageResponse, responses={500: {"model": ErrorResponse}})
+async def get_chat_usage(conversation_id: str):
+    """
+    Get the token usage of a conversation
+    
+    Args:
+        conversation_id: The conversation ID
+        
+    Returns:
+        ConversationUsageResponse with input, cached and output tokens in total and per agent
+    """
+    try:
+        return await async_chat_storage.get_conversation_usage(conversation_id)
+    except Exception as e:
+        logger.error(f"Error retrieving chat usage: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve chat usage: {str(e)}"
+        )
+
+@app.get("/usage", response_model=UsageSummaryResponse, responses={500: {"model": ErrorResponse}})
+async def get_usage_summary():
+    """
+    Get the token usage of all conversations
+    
+    Returns:
+        UsageSummaryResponse with the usage stored on every assistant message, in total and per agent
+    """
+    try:
+        return await async_chat_storage.get_usage_summary()
+    except Exception as e:
+        logger.error(f"Error retrieving usage summary: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve usage summary: {str(e)}"
+        )
+
+@app.get("/usage/worker", response_model=WorkerUsageSummaryResponse)
+async def get_worker_usage_summary():
+    """Token usage of the turns handled by this worker process since it started, in total and per agent"""
+    return conversation_service.get_worker_usage_summary()
+
+@app.get("/conversations/cache/metrics")
+async def get_conversation_cache_metrics():
+    """Hit, miss and eviction counters of the in-memory conversation state cache"""
+    return conversation_service.get_cache_stats()
+
+@app.get("/conversations/router/metrics")
+async def get_intent_router_metrics():
+    """Turns routed straight to a specialist agent, fallbacks to the main agent and the time saved"""
+    return conversation_service.get_routing_stats()
+
+@app.get("/conversations/scheduler/metrics")
+async def get_turn_scheduler_metrics():
+    """Running and queued agent turns, rejections and queue wait times"""
+    return conversation_service.get_scheduler_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Latency histograms and counters in the Prometheus text format"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/storage/metrics")
+async def get_storage_metrics():
+    """Group-commit batch size and flush latency metrics for message writes"""
+    return async_chat_storage.writer.metrics.snapshot()
+
 @app.get("/user-profile", response_model=CompleteUserProfileResponse, responses={404: {"model": ErrorResponse}, 500: {"model": ErrorResponse}})
 async def get_user_profile():
     """
@@ -252,7 +583,7 @@ async def get_user_profile():
         logger.info("Retrieving user profile data")
         
         # Get profile data from storage
-        profile_data = user_storage.get_profile()
+        profile_data = await async_user_storage.get_profile()
         
         if not profile_data:
             raise HTTPException(
@@ -284,7 +615,8 @@ async def http_exception_handler(request, exc):
     )
     return JSONResponse(
         status_code=exc.status_code,
-        content=error_response.model_dump(mode="json")
+        content=error_response.model_dump(mode="json"),
+        headers=exc.headers
     )
 
 if __name__ == "__main__":
@@ -1,12 +1,67 @@
-from agents import Agent, handoff, Runner, trace
+from agents import Agent, handoff, InputGuardrailTripwireTriggered, Runner, trace
+from agents.items import HandoffOutputItem, ToolCallItem, ToolCallOutputItem
 import asyncio
-from typing import List, Dict, Any, Optional
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Any, NamedTuple, Optional
+
+from memory.state_cache import ConversationState, ConversationStateCache
+from memory.context_policy import ContextPolicy, TokenCounter, ITEM_TOKEN_OVERHEAD, render_turns
+from memory.response_cache import ResponseCache, context_fingerprint
+from memory.usage_tracking import UsageHooks, empty_turn_usage
+from memory.input_guardrails import GuardedUsageHooks, InputGuardrailCheck, hold_until_passed
+from memory.intent_router import IntentRouter
+
+logger = logging.getLogger(__name__)
+
+
+class TurnInput(NamedTuple):
+    """The runner input of a turn and what it was built from."""
+    input: Any
+    base_state: Optional[ConversationState]
+    stats: Dict[str, Any]
+
+
+class TurnContext(NamedTuple):
+    """Run context of a turn, passed to dynamic instructions and tools."""
+    prompt: str
+    group_id: str
+
+
+class CachedRunResult:
+    """Stands in for a runner result when a turn is answered from the response cache."""
+
+    def __init__(self, prompt: str, answer: str):
+        self.final_output = answer
+        self._prompt = prompt
+
+    def to_input_list(self) -> List[Dict[str, str]]:
+        return [
+            {"role": "user", "content": self._prompt},
+            {"role": "assistant", "content": self.final_output},
+        ]
 
 
 class ConversationManager:
     """
     A class to manage conversations with an agent, maintaining history and providing
     a clean interface for executing prompts and getting responses.
+
+    Per-group state lives in a bounded LRU cache. When a group's state has been
+    evicted (or the process restarted), it is rebuilt on the next turn from the
+    stored messages returned by history_loader.
+
+    The context policy caps the input sent on each turn: once a group's history
+    exceeds its token budget, the older turns are folded into a running summary
+    in the background, after the turn's response has been returned.
+
+    First turns of new groups are answered from the response cache when the
+    same question was already answered under the same instructions.
+
+    The agent's input guardrails run alongside its first model call instead of
+    before it, and a tripped guardrail cancels the run.
+
+    With an intent router, turns it is confident about start directly with the
+    specialist agent the main agent would have handed off to.
     """
 
     def __init__(
@@ -14,6 +69,12 @@ class ConversationManager:
         agent: Agent,
         workflow_name: str = "Conversation",
         default_group_id: str = "1",
+        state_cache: Optional[ConversationStateCache] = None,
+        history_loader: Optional[Callable[[str], Awaitable[List[Dict[str, str]]]]] = None,
+        context_policy: Optional[ContextPolicy] = None,
+        response_cache: Optional[ResponseCache] = None,
+        instructions_fingerprint: Optional[Callable[[], str]] = None,
+        intent_router: Optional[IntentRouter] = None,
     ):
         """
         Initialize the conversation manager.
@@ -22,16 +83,33 @@ class ConversationManager:
             agent: The Agent instance to use for conversations
             workflow_name: Name for the trace workflow
             default_group_id: Default group ID for the trace when none is specified
+            state_cache: Cache holding per-group state (defaults to an unconfigured ConversationStateCache)
+            history_loader: Async callable returning a group's stored {"role", "content"} messages,
+                oldest first, used to rehydrate groups missing from the cache
+            context_policy: Token budget and summarization policy (defaults to counting
+                tokens without ever summarizing)
+            response_cache: Cache of first-turn answers (None disables caching)
+            instructions_fingerprint: Callable returning a hash of the agent's current
+                instructions, needed when they are dynamic (defaults to hashing agent.instructions)
+            intent_router: Router dispatching turns straight to the agent's handoff
+                agents (None always starts with the agent)
         """
         self.agent = agent
         self.workflow_name = workflow_name
         self.default_group_id = default_group_id
-        # Dictionary to store conversation history for each group_id
-        self.conversation_histories: Dict[str, List[Dict[str, str]]] = {}
-        # Dictionary to store last result for each group_id
-        self.last_results: Dict[str, any] = {}
-        # Dictionary to track initialization status for each group_id
-        self.group_initialized: Dict[str, bool] = {}
+        # Bounded cache of conversation state for each group_id
+        self.state_cache = state_cache if state_cache is not None else ConversationStateCache()
+        self.history_loader = history_loader
+        self.rehydrations = 0
+        self.context_policy = context_policy if context_policy is not None else ContextPolicy(TokenCounter())
+        # Background summarization task per group, at most one at a time
+        self._fold_tasks: Dict[str, asyncio.Task] = {}
+        self.context_totals = {"turns": 0, "tokens_sent": 0, "tokens_saved": 0, "folds": 0, "failed_folds": 0}
+        self.response_cache = response_cache
+        self.instructions_fingerprint = instructions_fingerprint or (
+            lambda: context_fingerprint(str(self.agent.instructions))
+        )
+        self.intent_router = intent_router
 
     async def execute(self, prompt: str, group_id: str = None) -> str:
         """
@@ -46,52 +124,412 @@ class ConversationManager:
             The agent's response as a string
 
         Raises:
+            InputGuardrailTripwireTriggered: If an input guardrail rejected the prompt
             Exception: If there's an error during execution
         """
         # Use default group_id if none provided
         if group_id is None:
             group_id = self.default_group_id
-            
-        print(group_id, self.last_results)
-
-        # Initialize group-specific storage if needed
-        if group_id not in self.conversation_histories:
-            self.conversation_histories[group_id] = []
-            self.last_results[group_id] = None
-            self.group_initialized[group_id] = False
 
         try:
             with trace(workflow_name=self.workflow_name, group_id=group_id):
-                if not self.group_initialized[group_id]:
-                    # First turn for this group - use prompt directly
-                    result = await Runner.run(self.agent, prompt)
-                    self.group_initialized[group_id] = True
-                else:
-                    # Subsequent turns - build conversation history + new input
-                    conversation_input = self.last_results[group_id].to_input_list() + [
-                        {"role": "user", "content": prompt}
-                    ]
-                    result = await Runner.run(
-                        self.agent,
-                        conversation_input,
-                    )
-
-                # Store the result for next turn in this group
-                self.last_results[group_id] = result
-
-                # Add to our internal history for this group
-                self.conversation_histories[group_id].append(
-                    {"role": "user", "content": prompt}
+                turn = await self._build_input(prompt, group_id)
+                cached = self._get_cached_answer(prompt, turn)
+                if cached is not None:
+                    self._record_turn(prompt, group_id, CachedRunResult(prompt, cached), turn, empty_turn_usage())
+                    return cached
+
+                check = self._start_input_guardrails(turn.input)
+                hooks = GuardedUsageHooks(check) if check is not None else UsageHooks()
+                agent = self._starting_agent(prompt, check)
+                run = asyncio.ensure_future(
+                    Runner.run(agent, turn.input, context=TurnContext(prompt, group_id), hooks=hooks)
                 )
-                self.conversation_histories[group_id].append(
-                    {"role": "assistant", "content": result.final_output}
-                )
-
+                try:
+                    if check is not None:
+                        # Raises as soon as a guardrail trips; the run is cancelled below
+                        await asyncio.gather(check.wait(), run)
+                    result = await run
+                finally:
+                    self._stop_run(run, check)
+                self._record_routing(agent, hooks)
+                self._record_turn(prompt, group_id, result, turn, hooks.turn_usage(result.context_wrapper.usage))
+                self._cache_answer(prompt, turn, result)
                 return result.final_output
 
+        except InputGuardrailTripwireTriggered:
+            raise
+        except Exception as e:
+            raise Exception(f"Error executing prompt for group {group_id}: {e}")
+
+    async def execute_streamed(self, prompt: str, group_id: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a prompt with the streamed runner, yielding events as the agent produces them.
+        Conversation history is updated once the run completes, exactly as with execute().
+
+        Args:
+            prompt: The user prompt/message
+            group_id: Group ID for the trace and conversation history (optional)
+
+        Yields:
+            Event dicts with a "type" key:
+            - "token": {"delta"} text generated by the current agent
+            - "agent": {"name"} an agent started handling the turn
+            - "handoff": {"from", "to"} control was handed to another agent
+            - "tool_call": {"name", "arguments"} a tool was called
+            - "tool_output": {"output"} a tool returned
+            - "done": {"message", "usage"} the final response and the turn's token
+              usage; always the last event
+
+        Raises:
+            InputGuardrailTripwireTriggered: If an input guardrail rejected the prompt;
+                no event generated for the prompt is yielded
+            Exception: If there's an error during execution
+        """
+        if group_id is None:
+            group_id = self.default_group_id
+
+        try:
+            with trace(workflow_name=self.workflow_name, group_id=group_id):
+                turn = await self._build_input(prompt, group_id)
+                cached = self._get_cached_answer(prompt, turn)
+                if cached is not None:
+                    usage = empty_turn_usage()
+                    self._record_turn(prompt, group_id, CachedRunResult(prompt, cached), turn, usage)
+                    yield {"type": "token", "delta": cached}
+                    yield {"type": "done", "message": cached, "usage": usage}
+                    return
+
+                check = self._start_input_guardrails(turn.input)
+                hooks = GuardedUsageHooks(check) if check is not None else UsageHooks()
+                agent = self._starting_agent(prompt, check)
+                result = Runner.run_streamed(agent, turn.input, context=TurnContext(prompt, group_id), hooks=hooks)
+                events = result.stream_events()
+                if check is not None:
+                    events = hold_until_passed(events, check)
+                try:
+                    async for event in events:
+                        converted = self._convert_stream_event(event)
+                        if converted is not None:
+                            yield converted
+                finally:
+                    # Stop the background run if the consumer went away mid-stream
+                    # or a guardrail tripped
+                    if not result.is_complete:
+                        result.cancel()
+                    if check is not None:
+                        check.cancel()
+
+                usage = hooks.turn_usage(result.context_wrapper.usage)
+                self._record_routing(agent, hooks)
+                self._record_turn(prompt, group_id, result, turn, usage)
+                self._cache_answer(prompt, turn, result)
+                yield {"type": "done", "message": result.final_output, "usage": usage}
+
+        except InputGuardrailTripwireTriggered:
+            raise
         except Exception as e:
             raise Exception(f"Error executing prompt for group {group_id}: {e}")
 
+    def _start_input_guardrails(self, turn_input: Any) -> Optional[InputGuardrailCheck]:
+        """Start the agent's input guardrails on a turn's input, or return None if it has none"""
+        if not self.agent.input_guardrails:
+            return None
+        return InputGuardrailCheck(self.agent, self.agent.input_guardrails, turn_input)
+
+    def _starting_agent(self, prompt: str, check: Optional[InputGuardrailCheck]) -> Agent:
+        """
+        Pick the agent that starts a turn.
+
+        Args:
+            prompt: The user prompt
+            check: The input guardrails already running for the turn, if any
+
+        Returns:
+            The handoff agent chosen by the intent router, or the main agent
+            without the input guardrails that are already being checked
+        """
+        if self.intent_router is not None:
+            decision = self.intent_router.route(prompt)
+            specialist = next(
+                (agent for agent in self.agent.handoffs if getattr(agent, "name", None) == decision.agent), None
+            )
+            if specialist is not None:
+                logger.info(
+                    f"Routed turn to {specialist.name} by {decision.source} (confidence {decision.confidence:.2f})"
+                )
+                return specialist
+        if check is None:
+            return self.agent
+        return self.agent.clone(input_guardrails=[])
+
+    def _record_routing(self, agent: Agent, hooks: UsageHooks) -> None:
+        """Record how long the main agent took to hand off, the time a routed turn saves"""
+        if self.intent_router is not None and agent.name == self.agent.name and hooks.first_handoff_seconds:
+            self.intent_router.record_handoff(hooks.first_handoff_seconds)
+
+    @staticmethod
+    def _stop_run(run: asyncio.Future, check: Optional[InputGuardrailCheck]) -> None:
+        """Cancel whatever is still running of a turn"""
+        if check is not None:
+            check.cancel()
+        if not run.done():
+            run.cancel()
+        elif not run.cancelled():
+            # Consume the run's exception when a tripped guardrail is reported instead
+            run.exception()
+
+    @staticmethod
+    def _convert_stream_event(event: Any) -> Optional[Dict[str, Any]]:
+        """Convert an Agents SDK stream event into a plain event dict, or None to skip it"""
+        if event.type == "raw_response_event":
+            if event.data.type == "response.output_text.delta":
+                return {"type": "token", "delta": event.data.delta}
+        elif event.type == "agent_updated_stream_event":
+            return {"type": "agent", "name": event.new_agent.name}
+        elif event.type == "run_item_stream_event":
+            item = event.item
+            if isinstance(item, HandoffOutputItem):
+                return {"type": "handoff", "from": item.source_agent.name, "to": item.target_agent.name}
+            if isinstance(item, ToolCallItem):
+                return {
+                    "type": "tool_call",
+                    "name": getattr(item.raw_item, "name", item.raw_item.type),
+                    "arguments": getattr(item.raw_item, "arguments", None),
+                }
+            if isinstance(item, ToolCallOutputItem):
+                return {"type": "tool_output", "output": str(item.output)}
+        return None
+
+    async def _load_state(self, group_id: str) -> Optional[ConversationState]:
+        """
+        Get a group's state from the cache, rehydrating it from stored messages on a miss.
+
+        Args:
+            group_id: Group ID of the conversation
+
+        Returns:
+            The group's state, or None if it has no previous turns
+        """
+        state = self.state_cache.get(group_id)
+        if state is not None or self.history_loader is None:
+            return state
+
+        history = [
+            {"role": message["role"], "content": message["content"]}
+            for message in await self.history_loader(group_id)
+        ]
+        if not history:
+            return None
+
+        # Tool calls and handoffs are not stored, so the text turns become the model input
+        input_items = [dict(turn) for turn in history]
+        state = ConversationState(
+            input_items=input_items,
+            history=history,
+            tokens=self.context_policy.token_counter.count_items(input_items),
+        )
+        self.state_cache.put(group_id, state)
+        self.rehydrations += 1
+        return state
+
+    async def _build_input(self, prompt: str, group_id: str) -> TurnInput:
+        """Build the runner input for a new turn: the prompt alone, or appended to the group's history"""
+        state = await self._load_state(group_id)
+        prompt_tokens = self.context_policy.token_counter.count_text(prompt) + ITEM_TOKEN_OVERHEAD
+        if state is None:
+            # First turn for this group - use prompt directly
+            return TurnInput(prompt, None, self._turn_stats(prompt_tokens, prompt_tokens, 0))
+
+        # Subsequent turns - build conversation history + new input, with folded
+        # turns replaced by their summary
+        prefix = [self.context_policy.summary_item(state.summary)] if state.summary else []
+        conversation_input = prefix + state.input_items + [
+            {"role": "user", "content": prompt}
+        ]
+        stats = self._turn_stats(
+            tokens_sent=state.summary_tokens + state.tokens + prompt_tokens,
+            tokens_full=state.folded_tokens + state.tokens + prompt_tokens,
+            summarized_turns=state.folded_turns,
+        )
+        return TurnInput(conversation_input, state, stats)
+
+    def _get_cached_answer(self, prompt: str, turn: TurnInput) -> Optional[str]:
+        """Look up the answer to a first turn in the response cache"""
+        if self.response_cache is None or turn.base_state is not None:
+            return None
+        return self.response_cache.get(prompt, self.instructions_fingerprint())
+
+    def _cache_answer(self, prompt: str, turn: TurnInput, result: Any) -> None:
+        """Cache the answer to a first turn, unless the run called function tools"""
+        if self.response_cache is None or turn.base_state is not None:
+            return
+        # Function tools (the calendar MCP server) have side effects that a replayed answer would skip
+        if any(
+            isinstance(item, ToolCallItem) and getattr(item.raw_item, "type", None) == "function_call"
+            for item in result.new_items
+        ):
+            return
+        self.response_cache.put(prompt, self.instructions_fingerprint(), str(result.final_output))
+
+    def _turn_stats(self, tokens_sent: int, tokens_full: int, summarized_turns: int) -> Dict[str, Any]:
+        """Build the context statistics of a turn"""
+        return {
+            "tokens_sent": tokens_sent,
+            "tokens_full_history": tokens_full,
+            "tokens_saved": tokens_full - tokens_sent,
+            "summarized_turns": summarized_turns,
+        }
+
+    def _record_turn(self, prompt: str, group_id: str, result: Any, turn: TurnInput, usage: Dict[str, Any]) -> None:
+        """Store a completed run as the latest state of the group's conversation"""
+        sent_items = 1 if isinstance(turn.input, str) else len(turn.input)
+        new_items = [{"role": "user", "content": prompt}] + result.to_input_list()[sent_items:]
+
+        # Append to the current state, which a background summarization may have
+        # compacted while this turn was running
+        previous = self.state_cache.pop(group_id) or turn.base_state
+        history = previous.history if previous is not None else []
+        history = history + [
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": result.final_output},
+        ]
+        # Only the input items are kept, not the whole run result
+        state = ConversationState(
+            input_items=(previous.input_items if previous is not None else []) + new_items,
+            history=history,
+            tokens=(previous.tokens if previous is not None else 0)
+            + self.context_policy.token_counter.count_items(new_items),
+            summary=previous.summary if previous is not None else None,
+            summary_tokens=previous.summary_tokens if previous is not None else 0,
+            folded_tokens=previous.folded_tokens if previous is not None else 0,
+            folded_turns=previous.folded_turns if previous is not None else 0,
+            last_turn_stats=turn.stats,
+            last_turn_usage=usage,
+        )
+        self.state_cache.put(group_id, state)
+
+        self.context_totals["turns"] += 1
+        self.context_totals["tokens_sent"] += turn.stats["tokens_sent"]
+        self.context_totals["tokens_saved"] += turn.stats["tokens_saved"]
+        self._schedule_fold(group_id, state)
+
+    def _schedule_fold(self, group_id: str, state: ConversationState) -> None:
+        """Start summarizing the group's older turns in the background if its history is over budget"""
+        turns = self.context_policy.foldable_turns(state.input_items, state.tokens)
+        if not turns or group_id in self._fold_tasks:
+            return
+        task = asyncio.create_task(self._fold(group_id, state, turns))
+        self._fold_tasks[group_id] = task
+        task.add_done_callback(lambda _: self._fold_tasks.pop(group_id, None))
+
+    async def _fold(self, group_id: str, state: ConversationState, turns: List[List[Any]]) -> None:
+        """
+        Fold turns into the group's running summary.
+
+        Args:
+            group_id: Group ID of the conversation
+            state: The state the turns were taken from
+            turns: The oldest turns of state.input_items to fold
+        """
+        folded_items = [item for turn in turns for item in turn]
+        try:
+            summary = await self.context_policy.summarizer(state.summary, render_turns(turns))
+        except Exception as e:
+            self.context_totals["failed_folds"] += 1
+            logger.error(f"Failed to summarize conversation {group_id}: {e}")
+            return
+
+        current = self.state_cache.peek(group_id)
+        if current is None or current.input_items[:len(folded_items)] != folded_items:
+            # The state was evicted, cleared or rebuilt meanwhile
+            return
+        counter = self.context_policy.token_counter
+        folded_tokens = counter.count_items(folded_items)
+        self.state_cache.put(group_id, ConversationState(
+            input_items=current.input_items[len(folded_items):],
+            history=current.history,
+            tokens=current.tokens - folded_tokens,
+            summary=summary,
+            summary_tokens=counter.count_items([self.context_policy.summary_item(summary)]),
+            folded_tokens=current.folded_tokens + folded_tokens,
+            folded_turns=current.folded_turns + len(turns),
+            last_turn_stats=current.last_turn_stats,
+            last_turn_usage=current.last_turn_usage,
+        ))
+        self.context_totals["folds"] += 1
+        logger.info(f"Folded {len(turns)} turns ({folded_tokens} tokens) of conversation {group_id} into its summary")
+
+    def get_turn_stats(self, group_id: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the context statistics of a group's latest turn.
+
+        Args:
+            group_id: Group ID (optional, uses default if not provided)
+
+        Returns:
+            Dict with tokens_sent, tokens_full_history, tokens_saved and summarized_turns,
+            or None if the group has no cached state
+        """
+        if group_id is None:
+            group_id = self.default_group_id
+        state = self.state_cache.peek(group_id)
+        return dict(state.last_turn_stats) if state is not None and state.last_turn_stats else None
+
+    def get_response_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the response cache counters.
+
+        Returns:
+            Dict with hits, misses and hit_rate, or None if response caching is disabled
+        """
+        return self.response_cache.stats() if self.response_cache is not None else None
+
+    def get_routing_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the intent router's counters.
+
+        Returns:
+            Dict with routed and fallback turns and the estimated time saved,
+            or None if routing is disabled
+        """
+        return self.intent_router.snapshot() if self.intent_router is not None else None
+
+    def get_turn_usage(self, group_id: str = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the token usage of a group's latest turn.
+
+        Args:
+            group_id: Group ID (optional, uses default if not provided)
+
+        Returns:
+            Dict with requests, input_tokens, cached_input_tokens, output_tokens and
+            total_tokens, plus "agents" with each agent's share, or None if the group
+            has no cached state
+        """
+        if group_id is None:
+            group_id = self.default_group_id
+        state = self.state_cache.peek(group_id)
+        return state.last_turn_usage if state is not None else None
+
+    def get_context_stats(self) -> Dict[str, Any]:
+        """
+        Get context policy totals across all turns.
+
+        Returns:
+            Dict with turns, tokens_sent, tokens_saved, folds and failed_folds
+        """
+        return dict(self.context_totals)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit, miss and eviction counters of the conversation state cache.
+
+        Returns:
+            Dict of cache counters, including how many groups were rehydrated from storage
+        """
+        return {**self.state_cache.stats(), "rehydrations": self.rehydrations}
+
     def get_history(self, group_id: str = None) -> List[Dict[str, str]]:
         """
         Get the full conversation history for a specific group.
@@ -105,7 +543,8 @@ class ConversationManager:
         if group_id is None:
             group_id = self.default_group_id
 
-        return self.conversation_histories.get(group_id, []).copy()
+        state = self.state_cache.peek(group_id)
+        return state.history.copy() if state is not None else []
 
     def get_all_histories(self) -> Dict[str, List[Dict[str, str]]]:
         """
@@ -115,13 +554,14 @@ class ConversationManager:
             Dictionary mapping group_id to conversation history
         """
         return {
-            group_id: history.copy()
-            for group_id, history in self.conversation_histories.items()
+            group_id: state.history.copy()
+            for group_id, state in self.state_cache.items()
         }
 
     def clear_history(self, group_id: str = None):
         """
         Clear the conversation history and reset the manager for a specific group.
+        With a history loader configured, the next turn rebuilds the context from stored messages.
 
         Args:
             group_id: Group ID to clear (optional, uses default if not provided)
@@ -129,16 +569,11 @@ class ConversationManager:
         if group_id is None:
             group_id = self.default_group_id
 
-        if group_id in self.conversation_histories:
-            self.conversation_histories[group_id] = []
-            self.last_results[group_id] = None
-            self.group_initialized[group_id] = False
+        self.state_cache.pop(group_id)
 
     def clear_all_histories(self):
         """Clear all conversation histories and reset the manager completely."""
-        self.conversation_histories = {}
-        self.last_results = {}
-        self.group_initialized = {}
+        self.state_cache.clear()
 
     def get_last_response(self, group_id: str = None) -> Optional[str]:
         """
@@ -153,19 +588,19 @@ class ConversationManager:
         if group_id is None:
             group_id = self.default_group_id
 
-        history = self.conversation_histories.get(group_id, [])
+        history = self.get_history(group_id)
         if history and history[-1]["role"] == "assistant":
             return history[-1]["content"]
         return None
 
     def get_active_groups(self) -> List[str]:
         """
-        Get a list of all group IDs that have conversation history.
+        Get a list of all group IDs whose conversation state is currently cached.
 
         Returns:
             List of group IDs with active conversations
         """
-        return list(self.conversation_histories.keys())
+        return self.state_cache.keys()
 
     async def interactive_loop(self, initial_prompt: str = None, group_id: str = None):
         """
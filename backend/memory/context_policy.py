@@ -0,0 +1,242 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import tiktoken
+from agents import Agent, Runner
+
+logger = logging.getLogger(__name__)
+
+# Per-item overhead of the chat format (role, separators)
+ITEM_TOKEN_OVERHEAD = 4
+# Encoding of models tiktoken does not know yet
+DEFAULT_ENCODING = "o200k_base"
+# Maximum characters of a tool output kept when rendering turns for the summarizer
+TOOL_OUTPUT_PREVIEW_CHARS = 500
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARIZER_INSTRUCTIONS = """You maintain a running summary of a conversation between a user and the VivaTech 2025 assistant.
+You are given the previous summary (possibly empty) and the turns that happened after it.
+Write an updated summary that keeps every fact needed to continue the conversation: the user's goals, preferences and constraints,
+sessions, speakers, times and places that were discussed, decisions made, and calendar actions taken.
+Be concise and factual. Write plain text, no preamble."""
+
+Summarizer = Callable[[Optional[str], str], Awaitable[str]]
+
+
+def item_text(item: Any) -> str:
+    """
+    Get the text of a model input item.
+
+    Args:
+        item: A prompt string or an input item dict (message, tool call or tool output)
+
+    Returns:
+        The item's text content
+    """
+    if isinstance(item, str):
+        return item
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return " ".join(str(item[key]) for key in ("name", "arguments", "output") if key in item)
+
+
+def split_turns(items: List[Any]) -> List[List[Any]]:
+    """
+    Split an input list into turns, each starting with a user message.
+
+    Args:
+        items: Model input items in conversation order
+
+    Returns:
+        List of turns, each a list of items
+    """
+    turns: List[List[Any]] = []
+    for item in items:
+        if not turns or (isinstance(item, dict) and item.get("role") == "user"):
+            turns.append([])
+        turns[-1].append(item)
+    return turns
+
+
+def render_turns(turns: List[List[Any]]) -> str:
+    """
+    Render turns as plain text for the summarizer.
+
+    Args:
+        turns: Turns as returned by split_turns
+
+    Returns:
+        One line per item, prefixed with its role or kind
+    """
+    lines = []
+    for turn in turns:
+        for item in turn:
+            if not isinstance(item, dict):
+                lines.append(f"user: {item}")
+            elif "role" in item:
+                lines.append(f"{item['role']}: {item_text(item)}")
+            elif item.get("type") == "function_call":
+                lines.append(f"tool call: {item.get('name')}({item.get('arguments', '')})")
+            elif "output" in item:
+                lines.append(f"tool output: {str(item['output'])[:TOOL_OUTPUT_PREVIEW_CHARS]}")
+    return "\n".join(lines)
+
+
+class TokenCounter:
+    """
+    Counts tokens with the model's tiktoken encoding.
+
+    The encoding is loaded on first use. tiktoken downloads it once and keeps
+    it in TIKTOKEN_CACHE_DIR, so hosts without internet access need that
+    cache filled beforehand.
+    """
+
+    def __init__(self, model: str = "gpt-4.1-nano"):
+        """
+        Initialize the token counter.
+
+        Args:
+            model: Model whose tokenizer to use
+        """
+        self.model = model
+        self._encoding: Optional[tiktoken.Encoding] = None
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        """
+        Get the model's encoding, loading it on first use.
+
+        Raises:
+            RuntimeError: If the encoding cannot be loaded, e.g. offline with an empty cache
+        """
+        if self._encoding is None:
+            try:
+                try:
+                    encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+            except Exception as e:
+                raise RuntimeError(
+                    f"Failed to load the tiktoken encoding for {self.model} "
+                    f"(offline hosts need a filled TIKTOKEN_CACHE_DIR): {e}"
+                ) from e
+            self._encoding = encoding
+        return self._encoding
+
+    def count_text(self, text: str) -> int:
+        """
+        Count the tokens of a text.
+
+        Args:
+            text: Text to count
+
+        Returns:
+            Number of tokens
+        """
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def count_items(self, items: List[Any]) -> int:
+        """
+        Count the tokens of model input items.
+
+        Args:
+            items: Input items
+
+        Returns:
+            Number of tokens, including per-item overhead
+        """
+        return sum(self.count_text(item_text(item)) + ITEM_TOKEN_OVERHEAD for item in items)
+
+
+class AgentSummarizer:
+    """Folds turns into a running summary with a small summarization agent."""
+
+    def __init__(self, model: str):
+        """
+        Initialize the summarizer.
+
+        Args:
+            model: Model used for summarization
+        """
+        self.agent = Agent(
+            name="Conversation Summarizer",
+            instructions=SUMMARIZER_INSTRUCTIONS,
+            model=model,
+        )
+
+    async def __call__(self, previous_summary: Optional[str], turns_text: str) -> str:
+        """
+        Summarize turns on top of a previous summary.
+
+        Args:
+            previous_summary: The running summary so far, if any
+            turns_text: The turns to fold in, rendered as text
+
+        Returns:
+            The updated summary
+        """
+        prompt = f"Previous summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{turns_text}"
+        result = await Runner.run(self.agent, prompt)
+        return str(result.final_output).strip()
+
+
+class ContextPolicy:
+    """
+    Token-budgeted context window: the last keep_last_turns turns are always
+    sent verbatim, and once the history exceeds token_budget the older turns
+    are folded into a running summary that is sent in their place.
+    """
+
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        summarizer: Optional[Summarizer] = None,
+        token_budget: int = 6000,
+        keep_last_turns: int = 4,
+    ):
+        """
+        Initialize the context policy.
+
+        Args:
+            token_counter: Counter used to measure the history
+            summarizer: Async callable folding turns into a summary (None disables folding)
+            token_budget: History size in tokens above which older turns are folded
+            keep_last_turns: Number of most recent turns never folded
+        """
+        self.token_counter = token_counter
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.keep_last_turns = max(1, keep_last_turns)
+
+    @staticmethod
+    def summary_item(summary: str) -> Dict[str, str]:
+        """
+        Build the input item carrying a running summary.
+
+        Args:
+            summary: The summary text
+
+        Returns:
+            A system message item
+        """
+        return {"role": "system", "content": SUMMARY_PREFIX + summary}
+
+    def foldable_turns(self, items: List[Any], tokens: int) -> List[List[Any]]:
+        """
+        Get the oldest turns to fold into the summary, if the history is over budget.
+
+        Args:
+            items: The verbatim history items
+            tokens: Token count of those items
+
+        Returns:
+            The turns to fold, oldest first (empty if nothing should be folded)
+        """
+        if self.summarizer is None or tokens <= self.token_budget:
+            return []
+        turns = split_turns(items)
+        return turns[:-self.keep_last_turns] if len(turns) > self.keep_last_turns else []
@@ -0,0 +1,154 @@
+import asyncio
+import copy
+from typing import Any, AsyncIterator, List, Sequence
+
+from agents import (
+    Agent, InputGuardrail, InputGuardrailResult, InputGuardrailTripwireTriggered, RunContextWrapper, guardrail_span
+)
+
+from memory.usage_tracking import UsageHooks
+
+_END = object()
+
+
+class InputGuardrailCheck:
+    """
+    An agent's input guardrails, running in the background next to its run.
+
+    The runner's own handling waits for the guardrails together with the
+    first turn and leaves that turn running when a tripwire fires. Here the
+    check is a separate task: the run starts at the same time, and the caller
+    cancels it as soon as wait() raises.
+    """
+
+    def __init__(self, agent: Agent, guardrails: Sequence[InputGuardrail], input: Any):
+        """
+        Start the guardrails on the run's input.
+
+        Args:
+            agent: The agent whose input is checked
+            guardrails: The guardrails to run, all at once
+            input: The runner input of the turn
+        """
+        self.task = asyncio.create_task(self._run(agent, list(guardrails), copy.deepcopy(input)))
+
+    @staticmethod
+    async def _run_guardrail(
+        agent: Agent, guardrail: InputGuardrail, input: Any, context: RunContextWrapper
+    ) -> InputGuardrailResult:
+        with guardrail_span(guardrail.get_name()) as span:
+            result = await guardrail.run(agent, input, context)
+            span.span_data.triggered = result.output.tripwire_triggered
+            return result
+
+    async def _run(self, agent: Agent, guardrails: List[InputGuardrail], input: Any) -> List[InputGuardrailResult]:
+        context = RunContextWrapper(context=None)
+        tasks = [asyncio.create_task(self._run_guardrail(agent, guardrail, input, context)) for guardrail in guardrails]
+        results = []
+        try:
+            for done in asyncio.as_completed(tasks):
+                result = await done
+                if result.output.tripwire_triggered:
+                    raise InputGuardrailTripwireTriggered(result)
+                results.append(result)
+            return results
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def done(self) -> bool:
+        """Whether every guardrail has passed or one has tripped."""
+        return self.task.done()
+
+    async def wait(self) -> List[InputGuardrailResult]:
+        """
+        Wait for the guardrails to finish.
+
+        Returns:
+            The results of the guardrails, all of which passed
+
+        Raises:
+            InputGuardrailTripwireTriggered: If a guardrail tripped
+        """
+        return await asyncio.shield(self.task)
+
+    def cancel(self) -> None:
+        """Stop guardrails that are still running."""
+        self.task.cancel()
+
+
+class GuardedUsageHooks(UsageHooks):
+    """
+    Usage hooks that hold handoffs, and agents with tools, until the input
+    guardrails have passed.
+
+    Only the starting agent's first model call overlaps with the guardrails.
+    The runner awaits these hooks before the next agent starts, so specialist
+    agents never call a model or a tool (e.g. a Google Calendar action) for
+    input that is then rejected. A starting agent with tools waits for the
+    guardrails too, since its tool calls could not be stopped otherwise.
+    """
+
+    def __init__(self, check: InputGuardrailCheck):
+        super().__init__()
+        self.check = check
+
+    async def on_agent_start(self, context: Any, agent: Any) -> None:
+        if agent.tools or agent.mcp_servers:
+            await self.check.wait()
+        await super().on_agent_start(context, agent)
+
+    async def on_handoff(self, context: Any, from_agent: Any, to_agent: Any) -> None:
+        self._mark_handoff()
+        await self.check.wait()
+        await super().on_handoff(context, from_agent, to_agent)
+
+
+async def hold_until_passed(events: AsyncIterator[Any], check: InputGuardrailCheck) -> AsyncIterator[Any]:
+    """
+    Re-yield a streamed run's events, holding them until the input guardrails have passed.
+
+    Events produced while the guardrails are running are buffered and flushed
+    at once when they pass, so nothing generated for rejected input reaches
+    the client. The guardrails are awaited as soon as they finish, not when
+    the next event arrives.
+
+    Args:
+        events: The run's stream_events()
+        check: The guardrails running alongside the run
+
+    Yields:
+        The run's events, unchanged and in order
+
+    Raises:
+        InputGuardrailTripwireTriggered: If a guardrail tripped
+    """
+    iterator = events.__aiter__()
+    held = []
+    next_event = None
+    try:
+        while not check.done():
+            if next_event is None:
+                next_event = asyncio.ensure_future(anext(iterator, _END))
+            await asyncio.wait({next_event, check.task}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event.done():
+                event = next_event.result()
+                next_event = None
+                if event is _END:
+                    break
+                held.append(event)
+        await check.wait()
+    except BaseException:
+        if next_event is not None:
+            next_event.cancel()
+        raise
+
+    for event in held:
+        yield event
+    if next_event is not None:
+        event = await next_event
+        if event is _END:
+            return
+        yield event
+    async for event in iterator:
+        yield event
@@ -0,0 +1,306 @@
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from memory.response_cache import normalize_prompt
+
+# Label of turns the main agent answered itself; the router never dispatches it
+MAIN_LABEL = "main"
+
+
+class RoutingRule(NamedTuple):
+    """A pattern that sends matching prompts straight to a specialist agent."""
+    agent: str
+    pattern: "re.Pattern[str]"
+
+
+def rule(agent: str, pattern: str) -> RoutingRule:
+    """Build a rule matched against the normalized prompt (lowercase, no accents or punctuation)."""
+    return RoutingRule(agent, re.compile(pattern))
+
+
+# Explicit requests for a specialist. Questions the main agent can answer
+# from the agenda in its own instructions are deliberately not matched.
+DEFAULT_RULES: Tuple[RoutingRule, ...] = (
+    rule("Scheduling Agent", r"\b(add|put|book|save|block)\b.*\b(calendar|agenda|schedule)\b"),
+    rule("Scheduling Agent", r"\b(plan|build|organi[sz]e|make|create)\b.*\b(my|a) (day|agenda|schedule|itinerary)\b"),
+    rule("Scheduling Agent", r"\b(personali[sz]ed|custom) (agenda|schedule|itinerary)\b"),
+    rule("Scheduling Agent", r"\b(mon planning|mon agenda|mon calendrier)\b"),
+    rule("Summarization Agent", r"\b(summari[sz]e|summary|recap|tl dr|tldr|key takeaways|resume moi|resumer|synthese)\b"),
+    rule("Networking Agent", r"\b(who should i (meet|talk to)|network(ing)? with|connect with|introduce me|people to meet)\b"),
+)
+
+
+class RouteDecision(NamedTuple):
+    """Where a turn starts: a specialist agent, or the main agent when agent is None."""
+    agent: Optional[str]
+    confidence: float
+    source: str  # "rule", "classifier", "ambiguous" or "fallback"
+
+
+def _features(text: str) -> List[str]:
+    """Unigrams and bigrams of the normalized text"""
+    words = normalize_prompt(text).split()
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class NaiveBayesIntentClassifier:
+    """
+    Multinomial naive Bayes over word unigrams and bigrams, with Laplace smoothing.
+
+    Follows the scikit-learn fit / predict / predict_proba shape and is
+    saved as JSON, so it trains in milliseconds on logged turns and needs
+    no extra dependency.
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        """
+        Initialize an untrained classifier.
+
+        Args:
+            alpha: Additive smoothing of feature counts
+        """
+        self.alpha = alpha
+        self.class_counts: Dict[str, int] = {}
+        self.feature_counts: Dict[str, Dict[str, int]] = {}
+        self._prepare()
+
+    def _prepare(self) -> None:
+        """Precompute log priors and the per-class normalizers"""
+        self.vocabulary = {feature for counts in self.feature_counts.values() for feature in counts}
+        total = sum(self.class_counts.values())
+        self._log_priors = {label: math.log(count / total) for label, count in self.class_counts.items()}
+        self._log_denominators = {
+            label: math.log(sum(counts.values()) + self.alpha * len(self.vocabulary))
+            for label, counts in self.feature_counts.items()
+        }
+
+    @property
+    def classes(self) -> List[str]:
+        return sorted(self.class_counts)
+
+    def fit(self, texts: Sequence[str], labels: Sequence[str]) -> "NaiveBayesIntentClassifier":
+        """
+        Train on prompts and the agent that handled each of them.
+
+        Args:
+            texts: User prompts
+            labels: Agent name per prompt, or MAIN_LABEL
+
+        Returns:
+            self
+        """
+        self.class_counts = dict(Counter(labels))
+        self.feature_counts = {label: {} for label in self.class_counts}
+        for text, label in zip(texts, labels):
+            counts = self.feature_counts[label]
+            for feature in _features(text):
+                counts[feature] = counts.get(feature, 0) + 1
+        self._prepare()
+        return self
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """
+        Get the posterior probability of each class for a prompt.
+
+        Args:
+            text: User prompt
+
+        Returns:
+            Dict mapping each class to its probability (empty if untrained)
+        """
+        features = [feature for feature in _features(text) if feature in self.vocabulary]
+        scores = {}
+        for label, log_prior in self._log_priors.items():
+            counts = self.feature_counts[label]
+            denominator = self._log_denominators[label]
+            scores[label] = log_prior + sum(
+                math.log(counts.get(feature, 0) + self.alpha) - denominator for feature in features
+            )
+        if not scores:
+            return {}
+        top = max(scores.values())
+        exp_scores = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp_scores.values())
+        return {label: value / total for label, value in exp_scores.items()}
+
+    def predict(self, text: str) -> Optional[str]:
+        """Get the most probable class for a prompt, or None if untrained"""
+        probabilities = self.predict_proba(text)
+        return max(probabilities, key=probabilities.get) if probabilities else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "class_counts": self.class_counts, "feature_counts": self.feature_counts}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NaiveBayesIntentClassifier":
+        classifier = cls(alpha=data.get("alpha", 1.0))
+        classifier.class_counts = data["class_counts"]
+        classifier.feature_counts = data["feature_counts"]
+        classifier._prepare()
+        return classifier
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesIntentClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def labelled_turns(rows: Iterable[Dict], main_agent: str) -> Iterator[Tuple[str, str]]:
+    """
+    Pair logged user prompts with the agent the main agent chose for them.
+
+    The label comes from the usage stored on the assistant reply: the
+    specialist that spent tokens after a handoff, or MAIN_LABEL when the main
+    agent answered itself. Turns that did not start with the main agent
+    (routed or cached turns) and replies without usage are skipped, so the
+    router is never trained on its own decisions.
+
+    Args:
+        rows: Export rows (GET /chat/export), messages of a conversation in order
+        main_agent: Name of the main agent as recorded in usage
+
+    Yields:
+        (prompt, label) pairs
+    """
+    prompt = None
+    for row in rows:
+        if row.get("type", "message") != "message":
+            prompt = None
+            continue
+        if row["role"] == "user":
+            prompt = row["content"]
+            continue
+        agents = set((row.get("usage") or {}).get("agents") or {})
+        if prompt is not None and main_agent in agents:
+            specialists = agents - {main_agent}
+            if len(specialists) <= 1:
+                yield prompt, specialists.pop() if specialists else MAIN_LABEL
+        prompt = None
+
+
+class IntentRouter:
+    """
+    Decides locally which agent should start a turn.
+
+    Rules are checked first; a prompt matching the rules of exactly one
+    available specialist is dispatched to it. Otherwise the optional
+    classifier may dispatch the prompt when it is confident enough. All
+    other prompts fall back to the main agent, which decides on handoffs
+    itself.
+
+    Dispatching directly saves the main agent's model call that would
+    only have handed the turn off. Its duration is measured on fallback
+    turns that ended in a handoff, to estimate the time saved.
+    """
+
+    def __init__(
+        self,
+        agents: Sequence[str],
+        rules: Sequence[RoutingRule] = DEFAULT_RULES,
+        classifier: Optional[NaiveBayesIntentClassifier] = None,
+        min_confidence: float = 0.9,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            agents: Names of the specialist agents the main agent can hand off to;
+                rules and classes for other agents are ignored
+            rules: Routing rules, checked in order
+            classifier: Trained classifier for prompts no rule matches (None uses rules only)
+            min_confidence: Minimum classifier probability to dispatch a prompt
+        """
+        self.agents = set(agents)
+        self.rules = [r for r in rules if r.agent in self.agents]
+        self.classifier = classifier
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._decisions: Counter = Counter()
+        self._routed_agents: Counter = Counter()
+        self._route_seconds = 0.0
+        self._handoffs = 0
+        self._handoff_seconds = 0.0
+
+    def route(self, prompt: str) -> RouteDecision:
+        """
+        Decide where a prompt's turn starts.
+
+        Args:
+            prompt: The user prompt
+
+        Returns:
+            RouteDecision naming the specialist agent, or agent None for the main agent
+        """
+        start = time.perf_counter()
+        decision = self._decide(prompt)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._decisions[decision.source] += 1
+            self._route_seconds += elapsed
+            if decision.agent is not None:
+                self._routed_agents[decision.agent] += 1
+        return decision
+
+    def _decide(self, prompt: str) -> RouteDecision:
+        text = normalize_prompt(prompt)
+        matched = {r.agent for r in self.rules if r.pattern.search(text)}
+        if len(matched) == 1:
+            return RouteDecision(matched.pop(), 1.0, "rule")
+        if len(matched) > 1:
+            return RouteDecision(None, 0.0, "ambiguous")
+
+        if self.classifier is not None:
+            probabilities = self.classifier.predict_proba(prompt)
+            if probabilities:
+                label = max(probabilities, key=probabilities.get)
+                if label in self.agents and probabilities[label] >= self.min_confidence:
+                    return RouteDecision(label, probabilities[label], "classifier")
+        return RouteDecision(None, 0.0, "fallback")
+
+    def record_handoff(self, seconds: float) -> None:
+        """
+        Record how long the main agent took to hand off a fallback turn.
+
+        Args:
+            seconds: Time from the start of the run to the handoff
+        """
+        with self._lock:
+            self._handoffs += 1
+            self._handoff_seconds += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get routing counters and the estimated latency saved.
+
+        Returns:
+            Dict with turns per decision source, routed turns per agent, the
+            average routing time, the main agent's average handoff time and
+            the time saved by the routed turns at that average
+        """
+        with self._lock:
+            turns = sum(self._decisions.values())
+            routed = self._decisions["rule"] + self._decisions["classifier"]
+            avg_handoff_ms = self._handoff_seconds / self._handoffs * 1000 if self._handoffs else None
+            return {
+                "classifier": self.classifier is not None,
+                "turns": turns,
+                "routed": routed,
+                "routed_rate": routed / turns if turns else 0.0,
+                "decisions": {
+                    source: self._decisions[source] for source in ("rule", "classifier", "ambiguous", "fallback")
+                },
+                "routed_agents": dict(self._routed_agents),
+                "avg_route_us": self._route_seconds / turns * 1e6 if turns else 0.0,
+                "main_handoffs": self._handoffs,
+                "avg_handoff_ms": avg_handoff_ms,
+                "estimated_saved_ms": routed * avg_handoff_ms if avg_handoff_ms is not None else None,
+            }
@@ -0,0 +1,225 @@
+import hashlib
+import math
+import re
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional, Set
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt so trivially different phrasings share a cache key.
+
+    Args:
+        prompt: The user prompt
+
+    Returns:
+        Lowercase words without accents or punctuation, separated by single spaces
+    """
+    text = unicodedata.normalize("NFKD", prompt.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(TOKEN_PATTERN.findall(text))
+
+
+def context_fingerprint(instructions: str) -> str:
+    """
+    Hash the agent context an answer depends on.
+
+    Args:
+        instructions: The agent's full instructions, including the user profile
+
+    Returns:
+        Hex digest identifying the context
+    """
+    return hashlib.sha256(instructions.encode("utf-8")).hexdigest()[:16]
+
+
+class CachedResponse:
+    """A cached first-turn answer."""
+
+    def __init__(self, prompt: str, fingerprint: str, answer: str):
+        """
+        Initialize the cached response.
+
+        Args:
+            prompt: The normalized prompt
+            fingerprint: Context fingerprint the answer was produced under
+            answer: The agent's final output
+        """
+        self.prompt = prompt
+        self.fingerprint = fingerprint
+        self.answer = answer
+        self.terms = Counter(prompt.split())
+        self.created_at = time.monotonic()
+
+
+class ResponseCache:
+    """
+    LRU cache of answers to first-turn prompts, keyed by the normalized prompt
+    and the fingerprint of the agent context. Entries expire after ttl_seconds.
+
+    With a similarity_threshold, a prompt with no exact entry is also matched
+    against the cached prompts of the same context by TF-IDF cosine similarity,
+    so near-duplicate questions ("where is stage one" / "where's stage one?")
+    share an answer.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600, similarity_threshold: float = 0.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached answers
+            ttl_seconds: Drop answers older than this (0 disables expiry)
+            similarity_threshold: Minimum cosine similarity of a near-duplicate
+                match, between 0 and 1 (0 disables near-duplicate matching)
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        # Inverted index from term to the keys of the prompts containing it
+        self._postings: Dict[str, Set[tuple]] = {}
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_expired(self, entry: CachedResponse, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.created_at > self.ttl_seconds
+
+    def get(self, prompt: str, fingerprint: str) -> Optional[str]:
+        """
+        Get the cached answer to a first-turn prompt.
+
+        Args:
+            prompt: The user prompt
+            fingerprint: Fingerprint of the current agent context
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        normalized = normalize_prompt(prompt)
+        key = (normalized, fingerprint)
+        entry = self._live_entry(key)
+        if entry is None and self.similarity_threshold > 0:
+            key = self._most_similar(normalized, fingerprint)
+            entry = self._live_entry(key) if key is not None else None
+            if entry is not None:
+                self.similar_hits += 1
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry.answer
+
+    def put(self, prompt: str, fingerprint: str, answer: str) -> None:
+        """
+        Cache the answer to a first-turn prompt.
+
+        Args:
+            prompt: The user prompt
+            fingerprint: Fingerprint of the agent context the answer was produced under
+            answer: The agent's final output
+        """
+        normalized = normalize_prompt(prompt)
+        if not normalized:
+            return
+        key = (normalized, fingerprint)
+        self._remove(key)
+        entry = CachedResponse(normalized, fingerprint, answer)
+        self._entries[key] = entry
+        for term in entry.terms:
+            self._postings.setdefault(term, set()).add(key)
+        self.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached answers."""
+        self._entries.clear()
+        self._postings.clear()
+
+    def _live_entry(self, key: tuple) -> Optional[CachedResponse]:
+        """Get an entry, dropping it if it has expired"""
+        entry = self._entries.get(key)
+        if entry is not None and self._is_expired(entry, time.monotonic()):
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _remove(self, key: tuple) -> Optional[CachedResponse]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for term in entry.terms:
+                keys = self._postings.get(term)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._postings[term]
+        return entry
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self._entries)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _vector(self, terms: Counter) -> Dict[str, float]:
+        return {term: count * self._idf(term) for term, count in terms.items()}
+
+    def _most_similar(self, normalized: str, fingerprint: str) -> Optional[tuple]:
+        """
+        Find the cached prompt of the same context most similar to a prompt.
+
+        Only prompts sharing at least one term are scored.
+
+        Returns:
+            Key of the best match at or above the similarity threshold, or None
+        """
+        terms = Counter(normalized.split())
+        candidates: Set[tuple] = set()
+        for term in terms:
+            candidates.update(key for key in self._postings.get(term, ()) if key[1] == fingerprint)
+        if not candidates:
+            return None
+
+        query = self._vector(terms)
+        query_norm = math.sqrt(sum(weight * weight for weight in query.values()))
+        best_key, best_score = None, self.similarity_threshold
+        for key in candidates:
+            vector = self._vector(self._entries[key].terms)
+            dot = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+            score = dot / (query_norm * norm) if query_norm and norm else 0.0
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict with hits (of which similar_hits), misses, hit_rate, stores, evictions, expirations and entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
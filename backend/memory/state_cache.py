@@ -0,0 +1,223 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class ConversationState:
+    """
+    The state the agent needs to continue a conversation: the model input of
+    the last run (to_input_list() of its result) and the plain text history.
+    Turns folded away by the context policy are replaced by a running summary.
+    """
+
+    def __init__(
+        self,
+        input_items: List[Any],
+        history: List[Dict[str, str]],
+        tokens: int = 0,
+        summary: Optional[str] = None,
+        summary_tokens: int = 0,
+        folded_tokens: int = 0,
+        folded_turns: int = 0,
+        last_turn_stats: Optional[Dict[str, Any]] = None,
+        last_turn_usage: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize the conversation state.
+
+        Args:
+            input_items: Verbatim input items to continue the conversation from
+            history: Turns as {"role", "content"} dicts
+            tokens: Token count of input_items
+            summary: Running summary of the turns folded out of input_items
+            summary_tokens: Token count of the summary item
+            folded_tokens: Token count the folded turns had verbatim
+            folded_turns: Number of turns folded into the summary
+            last_turn_stats: Context statistics of the latest turn
+            last_turn_usage: Token usage of the latest turn, in total and per agent
+        """
+        self.input_items = input_items
+        self.history = history
+        self.tokens = tokens
+        self.summary = summary
+        self.summary_tokens = summary_tokens
+        self.folded_tokens = folded_tokens
+        self.folded_turns = folded_turns
+        self.last_turn_stats = last_turn_stats
+        self.last_turn_usage = last_turn_usage
+        self.size_bytes = self._estimate_size()
+        self.last_access = time.monotonic()
+
+    def _estimate_size(self) -> int:
+        """
+        Estimate the memory held by this state from its serialized size.
+
+        Returns:
+            Approximate size in bytes
+        """
+        return (
+            len(json.dumps(self.input_items, default=str))
+            + len(json.dumps(self.history))
+            + len(self.summary or "")
+        )
+
+
+class ConversationStateCache:
+    """
+    LRU cache of conversation states, bounded by entry count, total estimated
+    size and idle time. The least recently used states are evicted first.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of conversations kept
+            max_bytes: Maximum total estimated size of the kept states
+            ttl_seconds: Drop states idle for longer than this (0 disables expiry)
+        """
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._states: "OrderedDict[str, ConversationState]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, group_id: str) -> bool:
+        return group_id in self._states
+
+    def keys(self) -> List[str]:
+        """
+        Get the cached group IDs, least recently used first.
+
+        Returns:
+            List of group IDs
+        """
+        return list(self._states.keys())
+
+    def items(self) -> List[tuple]:
+        """
+        Get the cached (group_id, state) pairs without touching their recency.
+
+        Returns:
+            List of (group_id, ConversationState) pairs
+        """
+        return list(self._states.items())
+
+    def _is_expired(self, state: ConversationState, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - state.last_access > self.ttl_seconds
+
+    def get(self, group_id: str) -> Optional[ConversationState]:
+        """
+        Get the state of a conversation and mark it as recently used.
+
+        Args:
+            group_id: Group ID of the conversation
+
+        Returns:
+            The cached state, or None on a miss (including expired states)
+        """
+        now = time.monotonic()
+        state = self._states.get(group_id)
+        if state is not None and self._is_expired(state, now):
+            self._remove(group_id)
+            self.expirations += 1
+            state = None
+        if state is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        state.last_access = now
+        self._states.move_to_end(group_id)
+        return state
+
+    def peek(self, group_id: str) -> Optional[ConversationState]:
+        """
+        Get the state of a conversation without counting a lookup or changing its recency.
+
+        Args:
+            group_id: Group ID of the conversation
+
+        Returns:
+            The cached state, or None if it is not cached
+        """
+        return self._states.get(group_id)
+
+    def put(self, group_id: str, state: ConversationState) -> None:
+        """
+        Store the state of a conversation, evicting others to stay within the limits.
+
+        Args:
+            group_id: Group ID of the conversation
+            state: The conversation's new state
+        """
+        self._remove(group_id)
+        self._states[group_id] = state
+        self._total_bytes += state.size_bytes
+        self._evict()
+
+    def pop(self, group_id: str) -> Optional[ConversationState]:
+        """
+        Remove the state of a conversation.
+
+        Args:
+            group_id: Group ID of the conversation
+
+        Returns:
+            The removed state, or None if it was not cached
+        """
+        return self._remove(group_id)
+
+    def clear(self) -> None:
+        """Remove all states."""
+        self._states.clear()
+        self._total_bytes = 0
+
+    def _remove(self, group_id: str) -> Optional[ConversationState]:
+        state = self._states.pop(group_id, None)
+        if state is not None:
+            self._total_bytes -= state.size_bytes
+        return state
+
+    def _evict(self) -> None:
+        """Drop expired states, then least recently used ones until within the limits."""
+        now = time.monotonic()
+        # States are ordered by last access, so expired ones are at the front
+        while self._states and self._is_expired(next(iter(self._states.values())), now):
+            self._remove(next(iter(self._states)))
+            self.expirations += 1
+        # The most recent state is always kept, even if it alone exceeds max_bytes
+        while len(self._states) > 1 and (
+            len(self._states) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            group_id = next(iter(self._states))
+            self._remove(group_id)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict with hits, misses, evictions, expirations, hit_rate, entries and bytes
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._states),
+            "bytes": self._total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
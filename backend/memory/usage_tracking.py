@@ -0,0 +1,92 @@
+import time
+from typing import Any, Dict, Optional
+
+from agents import RunHooks
+
+USAGE_FIELDS = ("requests", "input_tokens", "cached_input_tokens", "output_tokens", "total_tokens")
+
+
+def read_usage(usage: Any) -> Dict[str, int]:
+    """
+    Read the counters of an SDK Usage object.
+
+    Args:
+        usage: The run's Usage (context_wrapper.usage), or None
+
+    Returns:
+        Dict with requests, input_tokens, cached_input_tokens, output_tokens and total_tokens
+    """
+    if usage is None:
+        return dict.fromkeys(USAGE_FIELDS, 0)
+    details = getattr(usage, "input_tokens_details", None)
+    return {
+        "requests": usage.requests or 0,
+        "input_tokens": usage.input_tokens or 0,
+        "cached_input_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "output_tokens": usage.output_tokens or 0,
+        "total_tokens": usage.total_tokens or 0,
+    }
+
+
+def empty_turn_usage() -> Dict[str, Any]:
+    """Usage of a turn that made no model requests, e.g. one answered from the response cache."""
+    return {**dict.fromkeys(USAGE_FIELDS, 0), "agents": {}}
+
+
+class UsageHooks(RunHooks):
+    """
+    Run hooks attributing token usage to the agent that spent it.
+
+    The SDK only accumulates usage for the whole run. Each time the current
+    agent changes (start, handoff, final output), the usage added since the
+    previous change is credited to the agent that was running. The time
+    until the first handoff is kept as well. Use one instance per run.
+    """
+
+    def __init__(self):
+        self.agents: Dict[str, Dict[str, int]] = {}
+        self.first_handoff_seconds: Optional[float] = None
+        self._started = time.perf_counter()
+        self._current_agent: Optional[str] = None
+        self._seen = dict.fromkeys(USAGE_FIELDS, 0)
+
+    def _attribute(self, usage: Any) -> None:
+        """Credit the usage added since the last call to the current agent"""
+        current = read_usage(usage)
+        if self._current_agent is not None:
+            delta = {field: current[field] - self._seen[field] for field in USAGE_FIELDS}
+            if any(delta.values()):
+                totals = self.agents.setdefault(self._current_agent, dict.fromkeys(USAGE_FIELDS, 0))
+                for field in USAGE_FIELDS:
+                    totals[field] += delta[field]
+        self._seen = current
+
+    async def on_agent_start(self, context: Any, agent: Any) -> None:
+        self._attribute(context.usage)
+        self._current_agent = agent.name
+
+    def _mark_handoff(self) -> None:
+        """Note the time of the run's first handoff"""
+        if self.first_handoff_seconds is None:
+            self.first_handoff_seconds = time.perf_counter() - self._started
+
+    async def on_handoff(self, context: Any, from_agent: Any, to_agent: Any) -> None:
+        self._mark_handoff()
+        self._attribute(context.usage)
+        self._current_agent = to_agent.name
+
+    async def on_agent_end(self, context: Any, agent: Any, output: Any) -> None:
+        self._attribute(context.usage)
+
+    def turn_usage(self, usage: Any) -> Dict[str, Any]:
+        """
+        Get the usage of the finished run, in total and per agent.
+
+        Args:
+            usage: The run's final Usage (result.context_wrapper.usage)
+
+        Returns:
+            Dict with the USAGE_FIELDS totals and "agents" mapping agent names to their share
+        """
+        self._attribute(usage)
+        return {**read_usage(usage), "agents": {name: dict(totals) for name, totals in self.agents.items()}}
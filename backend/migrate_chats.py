@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Import an existing chats.json into the SQLite chat storage
+"""
+
+import argparse
+import json
+import logging
+
+from config import settings
+from services.chat_sqlite_storage import SQLiteChatStorageService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", default="chats.json", help="Path to the chats.json file to import")
+    parser.add_argument("--target", default=settings.chat_sqlite_path, help="SQLite database file to import into")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, settings.log_level))
+
+    with open(args.source, "r") as f:
+        data = json.load(f)
+
+    storage = SQLiteChatStorageService(args.target)
+    imported = storage.import_conversations(data.get("conversations", {}))
+    print(f"Imported {imported} conversations from {args.source} into {storage.storage_path}")
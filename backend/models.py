@@ -7,12 +7,38 @@ class MessageRequest(BaseModel):
     """Request model for creating a message"""
     message: str = Field(..., description="The user's message", min_length=1)
     id: Optional[str] = Field(None, description="Optional conversation ID for continuing existing chat")
+    expected_version: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Number of messages the client has seen in the conversation; the request is rejected with 409 if it has changed since"
+    )
+
+class TokenUsage(BaseModel):
+    """Token counts of one or more model requests"""
+    requests: int = Field(0, description="Number of model requests")
+    input_tokens: int = Field(0, description="Input tokens, including cached ones")
+    cached_input_tokens: int = Field(0, description="Input tokens served from the prompt cache")
+    output_tokens: int = Field(0, description="Output tokens")
+    total_tokens: int = Field(0, description="Input plus output tokens")
+
+    def add(self, other: "TokenUsage") -> None:
+        """Add another usage's counts to this one"""
+        self.requests += other.requests
+        self.input_tokens += other.input_tokens
+        self.cached_input_tokens += other.cached_input_tokens
+        self.output_tokens += other.output_tokens
+        self.total_tokens += other.total_tokens
+
+class TurnUsage(TokenUsage):
+    """Token usage of one agent turn, in total and per agent"""
+    agents: Dict[str, TokenUsage] = Field(default_factory=dict, description="Usage of each agent that ran in the turn")
 
 class MessageResponse(BaseModel):
     """Response model for message creation"""
     id: str = Field(..., description="Conversation ID")
     openai_id: str = Field(..., description="OpenAI response ID")
     message: str = Field(..., description="The chatbot's response message")
+    usage: Optional[TurnUsage] = Field(None, description="Token usage of the turn")
 
 class LinkedInProfileRequest(BaseModel):
     """Request model for LinkedIn profile scraping"""
@@ -42,6 +68,7 @@ class ChatMessage(BaseModel):
     content: str = Field(..., description="Message content")
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="Message timestamp")
     openai_id: Optional[str] = Field(None, description="OpenAI response ID if applicable")
+    usage: Optional[TurnUsage] = Field(None, description="Token usage of the turn that produced an assistant message")
 
 class ConversationSummary(BaseModel):
     """Model for conversation summary in list view"""
@@ -76,6 +103,70 @@ class ConversationListResponse(BaseModel):
     has_next: bool
     has_previous: bool
 
+class ChatHistoryCursorResponse(BaseModel):
+    """Response model for a cursor-paginated window of chat history"""
+    messages: List[ChatMessage]
+    limit: int
+    older_cursor: Optional[str] = Field(None, description="Pass as 'before' to fetch older messages")
+    newer_cursor: Optional[str] = Field(None, description="Pass as 'after' to fetch newer messages")
+    has_older: bool
+    has_newer: bool
+
+class ConversationCursorResponse(BaseModel):
+    """Response model for a cursor-paginated window of the conversation list"""
+    conversations: List[ConversationSummary]
+    limit: int
+    older_cursor: Optional[str] = Field(None, description="Pass as 'before' to fetch older conversations")
+    newer_cursor: Optional[str] = Field(None, description="Pass as 'after' to fetch more recently active conversations")
+    has_older: bool
+    has_newer: bool
+
+class ChatSearchHit(BaseModel):
+    """A message matching a chat search"""
+    conversation_id: str = Field(..., description="Conversation containing the message")
+    message_id: str = Field(..., description="Matching message ID")
+    role: str = Field(..., description="Message role: user or assistant")
+    timestamp: datetime = Field(..., description="Message timestamp")
+    snippet: str = Field(..., description="Excerpt of the message with matched terms wrapped in **")
+    score: float = Field(..., description="BM25 relevance score, higher is better")
+
+class ChatSearchResponse(BaseModel):
+    """Response model for chat search results with pagination"""
+    query: str
+    results: List[ChatSearchHit]
+    total_results: int
+    page: int
+    limit: int
+    total_pages: int
+    has_next: bool
+    has_previous: bool
+
+class ConversationUsageResponse(BaseModel):
+    """Token usage of a conversation, summed over its stored assistant messages"""
+    conversation_id: str
+    turns: int = Field(..., description="Assistant messages with recorded usage")
+    usage: TokenUsage
+    agents: Dict[str, TokenUsage]
+
+class UsageTotals(BaseModel):
+    """Token usage summed over a set of turns, in total and per agent"""
+    turns: int
+    cached_turns: int = Field(..., description="Turns answered without model requests (response cache)")
+    usage: TokenUsage
+    agents: Dict[str, TokenUsage]
+    avg_input_tokens_per_turn: float
+    avg_output_tokens_per_turn: float
+
+class UsageSummaryResponse(UsageTotals):
+    """Token usage of every turn stored in the chat storage"""
+    conversations: int = Field(..., description="Conversations with at least one recorded turn")
+    since: Optional[datetime] = Field(None, description="Timestamp of the earliest recorded turn")
+
+class WorkerUsageSummaryResponse(UsageTotals):
+    """Token usage of the turns handled by one worker process since it started"""
+    worker_pid: int
+    since: datetime = Field(..., description="When the worker process started")
+
 class HealthResponse(BaseModel):
     """Response model for health check"""
     status: str
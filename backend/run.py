@@ -1,16 +1,27 @@
 #!/usr/bin/env python3
 """
 Startup script for the Chatbot Backend API
+
+Set API_WORKERS > 1 to serve requests from several worker processes. The
+chat and user storage backends coordinate through lock files (or SQLite's
+own locking), so all workers can share the same data directory. Auto-reload
+only supports a single process and is turned off in multi-worker mode.
+The agenda snapshot is brought up to date before the workers start.
 """
 
 import uvicorn
+from agenda import load_snapshot
 from config import settings
 
 if __name__ == "__main__":
+    workers = max(1, settings.api_workers)
+    # Compile the agenda snapshot once, before the workers start and load it
+    load_snapshot()
     uvicorn.run(
         "main:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=settings.api_reload,
+        reload=settings.api_reload and workers == 1,
+        workers=workers,
         log_level=settings.log_level.lower()
-    ) 
\ No newline at end of file
+    ) 
@@ -2,14 +2,24 @@
 
 from .openai_service import OpenAIService, openai_service
 from .chat_storage import ChatStorageService, chat_storage
+from .chat_log_storage import LogChatStorageService
+from .chat_sqlite_storage import SQLiteChatStorageService
+from .chat_search import ChatSearchIndex
+from .write_batcher import GroupCommitWriter
 from .linkedin_service import LinkedInService, linkedin_service
 from .user_storage import UserStorageService, user_storage
+from .prompt_registry import PromptRegistry
+from .async_storage import AsyncChatStorage, AsyncUserStorage, async_chat_storage, async_user_storage, chat_writer
 from .conversation_service import ConversationService, conversation_service
 
 __all__ = [
     "OpenAIService", "openai_service", 
-    "ChatStorageService", "chat_storage", 
+    "ChatStorageService", "chat_storage", "LogChatStorageService", "SQLiteChatStorageService",
+    "ChatSearchIndex",
+    "GroupCommitWriter", "chat_writer",
     "LinkedInService", "linkedin_service", 
     "UserStorageService", "user_storage",
+    "PromptRegistry",
+    "AsyncChatStorage", "AsyncUserStorage", "async_chat_storage", "async_user_storage",
     "ConversationService", "conversation_service"
 ] 
\ No newline at end of file
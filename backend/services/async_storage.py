@@ -0,0 +1,274 @@
+import asyncio
+import functools
+import json
+import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence
+
+from config import settings
+from models import (
+    ChatMessage, ChatHistoryResponse, PaginationParams, ConversationListResponse,
+    ChatHistoryCursorResponse, ConversationCursorResponse, ChatSearchResponse, ConversationUsageResponse,
+    UsageSummaryResponse
+)
+from .chat_storage import ConversationVersionConflictError, chat_storage
+from .user_storage import user_storage
+from .write_batcher import GroupCommitWriter
+from .metrics import CHAT_STORAGE_SECONDS
+from .usage_accounting import summarize_conversation_usage, summarize_usage
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncChatStorage:
+    """Awaitable chat storage interface that keeps disk I/O off the event loop
+
+    Blocking storage calls run on a bounded thread pool. Operations on the
+    same conversation are serialized with a per-conversation asyncio lock, so
+    a history read always sees the writes that were acknowledged before it.
+    """
+
+    def __init__(self, storage, writer, executor: ThreadPoolExecutor):
+        """
+        Initialize the async chat storage
+
+        Args:
+            storage: Synchronous chat storage service
+            writer: GroupCommitWriter used for message writes
+            executor: Thread pool that runs blocking storage calls
+        """
+        self.storage = storage
+        self.writer = writer
+        self._executor = executor
+        # Locks are dropped automatically once no request holds or awaits them
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def _lock_for(self, conversation_id: str) -> asyncio.Lock:
+        """Get the lock serializing operations on a conversation"""
+        lock = self._locks.get(conversation_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[conversation_id] = lock
+        return lock
+
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking storage call on the I/O thread pool, timing it by operation name"""
+        loop = asyncio.get_running_loop()
+        with CHAT_STORAGE_SECONDS.time(operation=getattr(func, "__name__", "call")):
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def save_message(
+        self,
+        conversation_id: str,
+        message: ChatMessage,
+        expected_version: Optional[int] = None
+    ) -> None:
+        """Save a message, returning once it has been durably written
+
+        Raises ConversationVersionConflictError if expected_version is set and
+        the conversation has changed since, e.g. from another worker process.
+        """
+        async with self._lock_for(conversation_id):
+            with CHAT_STORAGE_SECONDS.time(operation="save_message"):
+                await self.writer.save_message(conversation_id, message, expected_version)
+
+    async def save_turn(
+        self,
+        conversation_id: str,
+        messages: Sequence[ChatMessage],
+        expected_version: Optional[int] = None
+    ) -> None:
+        """Save the messages of a turn together, all or none, returning once they have been durably written
+
+        Raises ConversationVersionConflictError if expected_version is set and
+        the conversation has changed since, in which case nothing is saved.
+        """
+        async with self._lock_for(conversation_id):
+            with CHAT_STORAGE_SECONDS.time(operation="save_turn"):
+                await self.writer.save_turn(conversation_id, messages, expected_version)
+
+    async def check_version(self, conversation_id: str, expected_version: Optional[int]) -> None:
+        """Fail fast if a conversation is no longer at expected_version; the write checks again
+
+        Raises ConversationVersionConflictError if expected_version is set and
+        the conversation has a different number of messages.
+        """
+        if expected_version is None:
+            return
+        history = await self.get_conversation_messages(conversation_id, PaginationParams(page=1, limit=1))
+        if history.total_messages != expected_version:
+            raise ConversationVersionConflictError(conversation_id, expected_version, history.total_messages)
+
+    async def get_conversation_messages(
+        self,
+        conversation_id: str,
+        pagination: PaginationParams
+    ) -> ChatHistoryResponse:
+        """Get messages from a conversation with pagination"""
+        async with self._lock_for(conversation_id):
+            return await self._run(self.storage.get_conversation_messages, conversation_id, pagination)
+
+    async def get_all_conversations(self, pagination: PaginationParams) -> ConversationListResponse:
+        """Get all conversations with pagination, sorted by latest message timestamp"""
+        return await self._run(self.storage.get_all_conversations, pagination)
+
+    async def get_conversation_messages_by_cursor(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> ChatHistoryCursorResponse:
+        """Get a window of messages around a cursor, defaulting to the newest messages"""
+        async with self._lock_for(conversation_id):
+            return await self._run(
+                self.storage.get_conversation_messages_by_cursor, conversation_id, limit, before, after
+            )
+
+    async def get_conversations_by_cursor(
+        self,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> ConversationCursorResponse:
+        """Get a window of conversations around a cursor, defaulting to the most recently active"""
+        return await self._run(self.storage.get_conversations_by_cursor, limit, before, after)
+
+    @property
+    def search_enabled(self) -> bool:
+        """Whether the storage backend maintains a full-text search index"""
+        return getattr(self.storage, "search_index", None) is not None
+
+    async def search(self, query: str, pagination: PaginationParams) -> ChatSearchResponse:
+        """Full-text search over message content, best matches first"""
+        return await self._run(self.storage.search_index.search, query, pagination)
+
+    @staticmethod
+    def _export_bound(value: Optional[datetime]) -> Optional[str]:
+        """Normalize a time filter to the naive UTC ISO format used for stored timestamps"""
+        if value is None:
+            return None
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat()
+
+    def _ndjson_chunks(
+        self,
+        conversation_ids: Optional[List[str]],
+        since: Optional[str],
+        until: Optional[str],
+        chunk_size: int
+    ) -> Iterator[str]:
+        """Group export rows into NDJSON chunks of up to chunk_size lines"""
+        lines = []
+        for row in self.storage.iter_export(conversation_ids, since, until):
+            lines.append(json.dumps(row, default=str))
+            if len(lines) >= chunk_size:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    async def export_ndjson(
+        self,
+        conversation_ids: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        chunk_size: int = 500
+    ) -> AsyncIterator[str]:
+        """Stream conversations and messages as NDJSON, reading the store on the I/O thread pool"""
+        chunks = self._ndjson_chunks(conversation_ids, self._export_bound(since), self._export_bound(until), chunk_size)
+        while True:
+            chunk = await self._run(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+
+    def _conversation_usage(self, conversation_id: str) -> ConversationUsageResponse:
+        """Sum a conversation's recorded usage from its export rows"""
+        return summarize_conversation_usage(conversation_id, self.storage.iter_export([conversation_id]))
+
+    async def get_conversation_usage(self, conversation_id: str) -> ConversationUsageResponse:
+        """Get the token usage of a conversation, summed over its assistant messages"""
+        async with self._lock_for(conversation_id):
+            return await self._run(self._conversation_usage, conversation_id)
+
+    def _usage_summary(self) -> UsageSummaryResponse:
+        """Sum the recorded usage of every conversation from the store's export rows"""
+        return summarize_usage(self.storage.iter_export())
+
+    async def get_usage_summary(self) -> UsageSummaryResponse:
+        """Get the token usage of all conversations, summed over their stored assistant messages"""
+        return await self._run(self._usage_summary)
+
+    async def conversation_exists(self, conversation_id: str) -> bool:
+        """Check if a conversation exists"""
+        return await self._run(self.storage.conversation_exists, conversation_id)
+
+    async def run_compaction(self, interval_seconds: float, idle_seconds: float) -> None:
+        """Periodically move idle conversations to the archive tier until cancelled"""
+        if not hasattr(self.storage, "compact"):
+            logger.info("Chat storage backend does not support compaction")
+            return
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self._run(self.storage.compact, idle_seconds)
+            except Exception as e:
+                logger.error(f"Chat storage compaction failed: {e}")
+
+    async def close(self) -> None:
+        """Flush pending writes"""
+        await self.writer.close()
+
+
+class AsyncUserStorage:
+    """Awaitable user profile storage interface that keeps disk I/O off the event loop"""
+
+    def __init__(self, storage, executor: ThreadPoolExecutor):
+        """
+        Initialize the async user storage
+
+        Args:
+            storage: Synchronous user storage service
+            executor: Thread pool that runs blocking storage calls
+        """
+        self.storage = storage
+        self._executor = executor
+        self._lock = asyncio.Lock()
+
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking storage call on the I/O thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def save_profile(self, profile_url: str, profile_data: Dict[str, Any]) -> None:
+        """Save LinkedIn profile data to storage"""
+        async with self._lock:
+            await self._run(self.storage.save_profile, profile_url, profile_data)
+
+    async def get_profile(self) -> Optional[Dict[str, Any]]:
+        """Get the saved profile data"""
+        async with self._lock:
+            return await self._run(self.storage.get_profile)
+
+
+# Bounded pool shared by all blocking storage calls
+storage_executor = ThreadPoolExecutor(
+    max_workers=settings.storage_io_max_workers,
+    thread_name_prefix="storage-io"
+)
+
+# Global writer instance for the message persistence path, flushing on the same pool
+chat_writer = GroupCommitWriter(
+    chat_storage,
+    flush_interval_ms=settings.chat_write_flush_interval_ms,
+    max_batch_size=settings.chat_write_max_batch_size,
+    executor=storage_executor,
+)
+
+# Global async storage instances
+async_chat_storage = AsyncChatStorage(chat_storage, chat_writer, storage_executor)
+async_user_storage = AsyncUserStorage(user_storage, storage_executor)
@@ -0,0 +1,174 @@
+import gzip
+import json
+import os
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ChatArchive:
+    """Compressed archive tier for idle conversations
+
+    Each compaction run writes one gzip segment holding a batch of
+    conversations, one {"id": ..., "messages": [...]} JSON line each. A small
+    index file maps every archived conversation to its segment together with
+    its last message and message count, so conversation summaries can be
+    served without decompressing anything. Writers are expected to hold the
+    chat storage file lock; the index is reloaded whenever another process
+    has rewritten it.
+    """
+
+    SEGMENT_PREFIX = "batch-"
+    SEGMENT_SUFFIX = ".jsonl.gz"
+    INDEX_FILE = "index.json"
+
+    def __init__(self, archive_dir: str = "chat_archive"):
+        """Initialize the archive and load its index"""
+        self.archive_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), archive_dir)
+        self.index_path = os.path.join(self.archive_dir, self.INDEX_FILE)
+        self._lock = threading.RLock()
+        # conversation_id -> {"segment": file name, "message_count": int, "last_message": record}
+        self._index: Dict[str, Dict] = {}
+        # Identity of the index file last loaded, to pick up rewrites by other processes
+        self._index_signature = None
+        self._ensure_archive_dir()
+        self._load_index()
+
+    def _ensure_archive_dir(self) -> None:
+        """Ensure the archive directory exists"""
+        try:
+            os.makedirs(self.archive_dir, exist_ok=True)
+        except Exception as e:
+            logger.error(f"Failed to create chat archive directory: {e}")
+            raise
+
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Get the identity of the current index file, which changes on every rewrite"""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load_index(self) -> None:
+        """Load the archive index from disk"""
+        signature = self._file_signature()
+        if signature is None:
+            self._index = {}
+            self._index_signature = None
+            return
+        try:
+            with open(self.index_path, 'r') as f:
+                self._index = json.load(f)
+            self._index_signature = signature
+            logger.info(f"Loaded chat archive index with {len(self._index)} conversations")
+        except Exception as e:
+            logger.error(f"Failed to load chat archive index: {e}")
+            raise
+
+    def _refresh_index(self) -> None:
+        """Reload the index if another process has rewritten it since it was loaded"""
+        if self._file_signature() != self._index_signature:
+            self._load_index()
+
+    def _save_index(self) -> None:
+        """Atomically write the archive index and delete segments it no longer references"""
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self._index, f, separators=(",", ":"))
+        os.replace(temp_path, self.index_path)
+        self._index_signature = self._file_signature()
+
+        live_segments = {entry["segment"] for entry in self._index.values()}
+        for name in os.listdir(self.archive_dir):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX) and name not in live_segments:
+                os.remove(os.path.join(self.archive_dir, name))
+                logger.info(f"Removed empty archive segment {name}")
+
+    def __contains__(self, conversation_id: str) -> bool:
+        with self._lock:
+            self._refresh_index()
+            return conversation_id in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh_index()
+            return len(self._index)
+
+    def conversation_ids(self) -> List[str]:
+        """Get the IDs of all archived conversations"""
+        with self._lock:
+            self._refresh_index()
+            return list(self._index.keys())
+
+    def summaries(self) -> Iterator[Tuple[str, Dict, int]]:
+        """Yield (conversation_id, last message record, message count) for every archived conversation"""
+        with self._lock:
+            self._refresh_index()
+            entries = list(self._index.items())
+        for conversation_id, entry in entries:
+            yield conversation_id, entry["last_message"], entry["message_count"]
+
+    def archive(self, conversations: Dict[str, List[Dict]]) -> None:
+        """
+        Write a batch of conversations to a new compressed segment
+
+        Args:
+            conversations: Mapping of conversation ID to its message records
+        """
+        if not conversations:
+            return
+        with self._lock:
+            self._refresh_index()
+            name = f"{self.SEGMENT_PREFIX}{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}{self.SEGMENT_SUFFIX}"
+            path = os.path.join(self.archive_dir, name)
+            temp_path = f"{path}.tmp"
+            with gzip.open(temp_path, 'wt', encoding="utf-8") as f:
+                for conversation_id, messages in conversations.items():
+                    f.write(json.dumps({"id": conversation_id, "messages": messages}, separators=(",", ":"), default=str))
+                    f.write("\n")
+            os.replace(temp_path, path)
+
+            for conversation_id, messages in conversations.items():
+                self._index[conversation_id] = {
+                    "segment": name,
+                    "message_count": len(messages),
+                    "last_message": messages[-1],
+                }
+            self._save_index()
+            logger.info(f"Archived {len(conversations)} conversations to {name}")
+
+    def load_messages(self, conversation_id: str) -> Optional[List[Dict]]:
+        """Read the message records of an archived conversation, or None if it is not archived"""
+        with self._lock:
+            self._refresh_index()
+            entry = self._index.get(conversation_id)
+        if entry is None:
+            return None
+
+        # Lines start with the conversation ID, so only the matching line is parsed
+        prefix = '{"id":' + json.dumps(conversation_id) + ','
+        path = os.path.join(self.archive_dir, entry["segment"])
+        try:
+            with gzip.open(path, 'rt', encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith(prefix):
+                        return json.loads(line)["messages"]
+        except FileNotFoundError:
+            # Another process moved the conversation back to hot storage and dropped the segment
+            logger.info(f"Archive segment {entry['segment']} was removed while reading {conversation_id}")
+            return None
+        logger.error(f"Archived conversation {conversation_id} missing from segment {entry['segment']}")
+        return None
+
+    def remove(self, conversation_ids: List[str]) -> None:
+        """Drop conversations from the archive, e.g. once they have been moved back to hot storage"""
+        with self._lock:
+            self._refresh_index()
+            removed = [conv_id for conv_id in conversation_ids if self._index.pop(conv_id, None) is not None]
+            if removed:
+                self._save_index()
+                logger.info(f"Removed {len(removed)} conversations from the archive")
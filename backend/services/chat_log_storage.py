@@ -0,0 +1,412 @@
+import json
+import os
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+import math
+
+from models import (
+    ChatMessage, ChatHistoryResponse, PaginationParams, ConversationListResponse,
+    ChatHistoryCursorResponse, ConversationCursorResponse
+)
+from .chat_storage import (
+    MessageWrite, ConversationVersionConflictError, check_expected_version, index_saved_messages,
+    message_to_record, record_to_message, build_conversation_summary,
+    message_cursor_window, build_message_cursor_response,
+    conversation_cursor_key, build_conversation_cursor_response,
+    export_conversation_records
+)
+from .conversation_index import ConversationSummaryIndex
+from .chat_search import ChatSearchIndex
+from .file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+
+# (segment number, byte offset, record length) of a single message record
+RecordLocation = Tuple[int, int, int]
+
+# Number of records read per seek batch while exporting
+EXPORT_READ_BATCH = 256
+
+
+class LogChatStorageService:
+    """Service for managing chat storage in an append-only segmented log
+
+    Every message is appended as one JSON line to the active segment file.
+    An in-memory index mapping each conversation to the location of its
+    records is rebuilt from the segments at startup, so writes are O(1)
+    and reads seek straight to the requested records.
+
+    Several worker processes can share one log directory: appends are
+    serialized by a lock file, and each process indexes records appended
+    by the others before it writes or reads.
+    """
+
+    SEGMENT_PREFIX = "segment-"
+    SEGMENT_SUFFIX = ".jsonl"
+
+    def __init__(
+        self,
+        log_dir: str = "chat_log",
+        segment_max_bytes: int = 16 * 1024 * 1024,
+        fsync: bool = True,
+        search_index: Optional[ChatSearchIndex] = None
+    ):
+        """Initialize the log storage service and rebuild the offset index"""
+        self.log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), log_dir)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+        self.search_index = search_index
+        self._lock = threading.RLock()
+        # conversation_id -> locations of its message records, in write order
+        self._index: Dict[str, List[RecordLocation]] = {}
+        # Conversation summaries ordered by last message time
+        self._summary_index = ConversationSummaryIndex()
+        # Position up to which the log has been indexed; the tail segment is the active one
+        self._scan_segment = 0
+        self._scan_offset = 0
+        self._active_segment = 0
+        self._active_file = None
+        self._ensure_log_dir()
+        self._file_lock = FileLock(os.path.join(self.log_dir, ".lock"))
+        self._rebuild_index()
+
+    def _ensure_log_dir(self) -> None:
+        """Ensure the log directory exists"""
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+        except Exception as e:
+            logger.error(f"Failed to create chat log directory: {e}")
+            raise
+
+    def _segment_path(self, segment: int) -> str:
+        """Get the file path of a segment"""
+        return os.path.join(self.log_dir, f"{self.SEGMENT_PREFIX}{segment:06d}{self.SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> List[int]:
+        """List existing segment numbers in ascending order"""
+        segments = []
+        for name in os.listdir(self.log_dir):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(self.SEGMENT_SUFFIX):
+                number = name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)]
+                if number.isdigit():
+                    segments.append(int(number))
+        return sorted(segments)
+
+    def _index_record(self, record: Dict, location: RecordLocation) -> None:
+        """Add a record location to the in-memory index"""
+        conversation_id = record["conversation_id"]
+        locations = self._index.setdefault(conversation_id, [])
+        locations.append(location)
+        self._summary_index.update(build_conversation_summary(conversation_id, record, len(locations)))
+
+    def _catch_up(self, truncate_torn: bool = False) -> int:
+        """
+        Index records appended since the last scan, including those written by other processes
+
+        Args:
+            truncate_torn: Cut off an incomplete record at the tail of the log. Only safe
+                while holding the file lock, when no writer can be in the middle of an append
+
+        Returns:
+            Number of records indexed
+        """
+        segments = [segment for segment in self._list_segments() if segment >= self._scan_segment]
+        record_count = 0
+        for segment in segments:
+            path = self._segment_path(segment)
+            is_tail = segment == segments[-1]
+            offset = self._scan_offset if segment == self._scan_segment else 0
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete record")
+                        record = json.loads(line)
+                    except ValueError as e:
+                        # A torn write can only be at the tail of the last segment, where
+                        # another process may also still be appending
+                        if is_tail:
+                            if truncate_torn:
+                                logger.warning(f"Truncating torn record at {path}:{offset}: {e}")
+                            break
+                        logger.error(f"Corrupt record at {path}:{offset}: {e}")
+                        raise
+                    self._index_record(record, (segment, offset, len(line)))
+                    offset += len(line)
+                    record_count += 1
+            if is_tail and truncate_torn and offset != os.path.getsize(path):
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+            self._scan_segment, self._scan_offset = segment, offset
+        return record_count
+
+    def _refresh(self) -> None:
+        """Cheaply check for records appended by other processes and index them"""
+        try:
+            unchanged = (
+                os.path.getsize(self._segment_path(self._scan_segment)) == self._scan_offset
+                and not os.path.exists(self._segment_path(self._scan_segment + 1))
+            )
+        except FileNotFoundError:
+            unchanged = False
+        if not unchanged:
+            self._catch_up()
+
+    def _rebuild_index(self) -> None:
+        """Scan all segments and rebuild the in-memory offset index"""
+        with self._file_lock, self._lock:
+            record_count = self._catch_up(truncate_torn=True)
+            if self._scan_segment == 0:
+                self._scan_segment, self._scan_offset = 1, 0
+            self._open_active_segment()
+        logger.info(
+            f"Rebuilt chat log index: {record_count} messages in "
+            f"{len(self._index)} conversations across {self._scan_segment} segments"
+        )
+
+    def _open_active_segment(self) -> None:
+        """Open the tail segment for appending"""
+        if self._active_file is not None:
+            self._active_file.close()
+        self._active_segment = self._scan_segment
+        self._active_file = open(self._segment_path(self._active_segment), 'ab')
+
+    def _sync_active_segment(self) -> None:
+        """Flush the active segment to the OS and, if configured, to disk"""
+        self._active_file.flush()
+        if self.fsync:
+            os.fsync(self._active_file.fileno())
+
+    def _roll_segment_if_needed(self, incoming_bytes: int) -> None:
+        """Start a new segment once the active one would exceed the size limit"""
+        if self._scan_offset > 0 and self._scan_offset + incoming_bytes > self.segment_max_bytes:
+            self._sync_active_segment()
+            self._scan_segment, self._scan_offset = self._scan_segment + 1, 0
+            self._open_active_segment()
+            logger.info(f"Rolled chat log to segment {self._active_segment}")
+
+    def _read_records(self, locations: List[RecordLocation]) -> List[Dict]:
+        """Read the records at the given locations, grouping reads per segment"""
+        records = []
+        open_files = {}
+        try:
+            for segment, offset, length in locations:
+                f = open_files.get(segment)
+                if f is None:
+                    f = open_files[segment] = open(self._segment_path(segment), 'rb')
+                f.seek(offset)
+                records.append(json.loads(f.read(length)))
+        finally:
+            for f in open_files.values():
+                f.close()
+        return records
+
+    def save_message(
+        self,
+        conversation_id: str,
+        message: ChatMessage,
+        expected_version: Optional[int] = None
+    ) -> None:
+        """Append a message to the specified conversation, optionally only if it is still at expected_version"""
+        conflict = self.save_messages([MessageWrite(conversation_id, (message,), expected_version)])[0]
+        if conflict is not None:
+            raise conflict
+
+    def save_messages(self, items: List[MessageWrite]) -> List[Optional[ConversationVersionConflictError]]:
+        """
+        Append a batch of message writes with a single flush
+
+        Args:
+            items: Writes to apply in order
+
+        Returns:
+            For each write, None if it was saved or the version conflict that rejected it
+        """
+        try:
+            encoded = []
+            for write in items:
+                lines = []
+                for message in write.messages:
+                    record = message_to_record(message)
+                    record["conversation_id"] = write.conversation_id
+                    line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+                    lines.append((record, line.encode("utf-8")))
+                encoded.append((write, lines))
+
+            results = []
+            saved = set()
+            saved_records = []
+            with self._file_lock, self._lock:
+                # Index other workers' appends first: versions must be current and the
+                # tail of the log is where this batch will be written
+                self._catch_up(truncate_torn=True)
+                if self._active_segment != self._scan_segment:
+                    self._open_active_segment()
+
+                for write, lines in encoded:
+                    conflict = check_expected_version(write, len(self._index.get(write.conversation_id, [])))
+                    results.append(conflict)
+                    if conflict is not None:
+                        continue
+                    for record, line in lines:
+                        self._roll_segment_if_needed(len(line))
+                        self._active_file.write(line)
+                        self._index_record(record, (self._active_segment, self._scan_offset, len(line)))
+                        self._scan_offset += len(line)
+                        saved_records.append((write.conversation_id, record))
+                    saved.add(write.conversation_id)
+                if saved:
+                    self._sync_active_segment()
+
+            index_saved_messages(self.search_index, saved_records)
+
+            for conversation_id in saved:
+                logger.info(f"Message saved to conversation {conversation_id}")
+            return results
+
+        except Exception as e:
+            logger.error(f"Failed to save message: {e}")
+            raise
+
+    def get_conversation_messages(
+        self,
+        conversation_id: str,
+        pagination: PaginationParams
+    ) -> ChatHistoryResponse:
+        """Get messages from a conversation with pagination"""
+        try:
+            with self._lock:
+                self._refresh()
+                locations = self._index.get(conversation_id, [])
+                total_messages = len(locations)
+                start_index = (pagination.page - 1) * pagination.limit
+                page_locations = locations[start_index:start_index + pagination.limit]
+
+            total_pages = math.ceil(total_messages / pagination.limit) if total_messages > 0 else 0
+
+            messages = []
+            for record in self._read_records(page_locations):
+                record.pop("conversation_id", None)
+                messages.append(record_to_message(record))
+
+            return ChatHistoryResponse(
+                messages=messages,
+                total_messages=total_messages,
+                page=pagination.page,
+                limit=pagination.limit,
+                total_pages=total_pages,
+                has_next=pagination.page < total_pages,
+                has_previous=pagination.page > 1
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to get conversation messages: {e}")
+            raise
+
+    def get_all_conversations(self, pagination: PaginationParams) -> ConversationListResponse:
+        """Get all conversations with pagination, sorted by latest message timestamp"""
+        try:
+            start_index = (pagination.page - 1) * pagination.limit
+            with self._lock:
+                self._refresh()
+                total_conversations = len(self._summary_index)
+                conversations = self._summary_index.newest(start_index, pagination.limit)
+
+            total_pages = math.ceil(total_conversations / pagination.limit) if total_conversations > 0 else 0
+
+            return ConversationListResponse(
+                conversations=conversations,
+                total_conversations=total_conversations,
+                page=pagination.page,
+                limit=pagination.limit,
+                total_pages=total_pages,
+                has_next=pagination.page < total_pages,
+                has_previous=pagination.page > 1
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to get all conversations: {e}")
+            raise
+
+    def get_conversation_messages_by_cursor(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> ChatHistoryCursorResponse:
+        """Get a window of messages around a cursor, defaulting to the newest messages"""
+        try:
+            with self._lock:
+                self._refresh()
+                locations = self._index.get(conversation_id, [])
+                total_messages = len(locations)
+                start, end = message_cursor_window(total_messages, limit, before, after)
+                window_locations = locations[start:end]
+
+            messages = []
+            for record in self._read_records(window_locations):
+                record.pop("conversation_id", None)
+                messages.append(record_to_message(record))
+            return build_message_cursor_response(messages, start, end, total_messages, limit)
+
+        except Exception as e:
+            logger.error(f"Failed to get conversation messages by cursor: {e}")
+            raise
+
+    def get_conversations_by_cursor(
+        self,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> ConversationCursorResponse:
+        """Get a window of conversations around a cursor, defaulting to the most recently active"""
+        try:
+            before_key = conversation_cursor_key(before) if before is not None else None
+            after_key = conversation_cursor_key(after) if after is not None else None
+            with self._lock:
+                self._refresh()
+                conversations, has_older, has_newer = self._summary_index.window(limit, before_key, after_key)
+            return build_conversation_cursor_response(conversations, limit, has_older, has_newer)
+
+        except Exception as e:
+            logger.error(f"Failed to get conversations by cursor: {e}")
+            raise
+
+    def _iter_conversation_records(self, conversation_id: str) -> Iterator[Dict]:
+        """Yield the records of a conversation, reading them in bounded batches"""
+        with self._lock:
+            locations = list(self._index.get(conversation_id, []))
+        for start in range(0, len(locations), EXPORT_READ_BATCH):
+            yield from self._read_records(locations[start:start + EXPORT_READ_BATCH])
+
+    def iter_export(
+        self,
+        conversation_ids: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """Yield conversations and messages as export rows, reading records incrementally"""
+        with self._lock:
+            self._refresh()
+            if conversation_ids is None:
+                conversation_ids = list(self._index.keys())
+        for conversation_id in conversation_ids:
+            yield from export_conversation_records(
+                conversation_id, self._iter_conversation_records(conversation_id), since, until
+            )
+
+    def conversation_exists(self, conversation_id: str) -> bool:
+        """Check if a conversation exists"""
+        with self._lock:
+            self._refresh()
+            return conversation_id in self._index
+
+    def close(self) -> None:
+        """Close the active segment file"""
+        with self._lock:
+            if self._active_file is not None:
+                self._active_file.close()
+                self._active_file = None
@@ -0,0 +1,224 @@
+import os
+import re
+import logging
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+import math
+
+from models import ChatSearchHit, ChatSearchResponse, PaginationParams
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content,
+    conversation_id UNINDEXED,
+    message_id UNINDEXED,
+    role UNINDEXED,
+    timestamp UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Rows inserted per statement batch while backfilling
+REBUILD_BATCH_SIZE = 1000
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression
+
+    Every word must appear in the message; the last word also matches as a
+    prefix so partially typed queries find results. Words are quoted so FTS5
+    operators in user input are treated as plain text.
+
+    Returns:
+        The MATCH expression, or None if the query has no searchable words
+    """
+    tokens = TOKEN_PATTERN.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class ChatSearchIndex:
+    """Full-text index over chat message content, stored in a SQLite FTS5 table
+
+    The chat storage backends add every saved message, so the index is kept
+    up to date incrementally. Searches are ranked with BM25 and only touch
+    the posting lists of the query terms, independent of the store's size.
+    """
+
+    def __init__(self, index_file: str = "chat_search.db"):
+        """Initialize the search index"""
+        self.index_file = index_file
+        self.index_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), index_file)
+        self._local = threading.local()
+        self._ensure_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection for the current thread, opening it if needed"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, isolation_level=None, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # The chat store is the source of truth, so the index trades durability for speed
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self) -> None:
+        """Ensure the index database exists with the FTS table"""
+        try:
+            self._connect().executescript(SCHEMA)
+        except Exception as e:
+            logger.error(f"Failed to initialize chat search index: {e}")
+            raise
+
+    @staticmethod
+    def _row_values(conversation_id: str, record: Dict) -> tuple:
+        """Get the FTS column values of a message record"""
+        timestamp = record["timestamp"]
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.isoformat()
+        return record["content"], conversation_id, record["id"], record["role"], timestamp
+
+    def _insert(self, conn: sqlite3.Connection, rows: List[tuple]) -> None:
+        """Insert FTS rows"""
+        conn.executemany(
+            "INSERT INTO messages_fts (content, conversation_id, message_id, role, timestamp) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+
+    def add_messages(self, records: Iterable[Tuple[str, Dict]]) -> None:
+        """
+        Index newly saved messages in a single transaction
+
+        Args:
+            records: (conversation_id, message record) pairs
+        """
+        try:
+            rows = [self._row_values(conversation_id, record) for conversation_id, record in records]
+            if not rows:
+                return
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._insert(conn, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            logger.error(f"Failed to index messages for search: {e}")
+            raise
+
+    def rebuild_if_empty(self, export_rows: Iterable[Dict]) -> int:
+        """
+        Backfill an empty index from a chat storage export
+
+        The emptiness check and the backfill run in one write transaction, so
+        when several workers start at once only one of them backfills.
+
+        Args:
+            export_rows: Rows from a chat storage's iter_export()
+
+        Returns:
+            Number of messages indexed
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM messages_fts LIMIT 1").fetchone() is not None:
+                conn.execute("ROLLBACK")
+                return 0
+            indexed = 0
+            batch = []
+            for row in export_rows:
+                if row["type"] != "message":
+                    continue
+                batch.append(self._row_values(row["conversation_id"], row))
+                if len(batch) >= REBUILD_BATCH_SIZE:
+                    self._insert(conn, batch)
+                    indexed += len(batch)
+                    batch = []
+            if batch:
+                self._insert(conn, batch)
+                indexed += len(batch)
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            logger.error(f"Failed to rebuild chat search index: {e}")
+            raise
+
+        if indexed:
+            logger.info(f"Backfilled chat search index with {indexed} messages")
+        return indexed
+
+    def search(self, query: str, pagination: PaginationParams) -> ChatSearchResponse:
+        """
+        Search message content, best matches first
+
+        Args:
+            query: Free-text query; all words must match
+            pagination: Page and page size of the results
+
+        Returns:
+            ChatSearchResponse with ranked hits and snippets
+        """
+        try:
+            match = build_match_query(query)
+            total_results = 0
+            results = []
+            if match is not None:
+                conn = self._connect()
+                total_results = conn.execute(
+                    "SELECT COUNT(*) FROM messages_fts WHERE messages_fts MATCH ?", (match,)
+                ).fetchone()[0]
+                rows = conn.execute(
+                    """
+                    SELECT conversation_id, message_id, role, timestamp,
+                           snippet(messages_fts, 0, '**', '**', '...', 16) AS snippet,
+                           bm25(messages_fts) AS rank
+                    FROM messages_fts
+                    WHERE messages_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ? OFFSET ?
+                    """,
+                    (match, pagination.limit, (pagination.page - 1) * pagination.limit)
+                ).fetchall() if total_results else []
+                # FTS5's bm25() is negative with lower meaning more relevant
+                results = [
+                    ChatSearchHit(
+                        conversation_id=row["conversation_id"],
+                        message_id=row["message_id"],
+                        role=row["role"],
+                        timestamp=datetime.fromisoformat(row["timestamp"]),
+                        snippet=row["snippet"],
+                        score=-row["rank"]
+                    )
+                    for row in rows
+                ]
+
+            total_pages = math.ceil(total_results / pagination.limit) if total_results > 0 else 0
+            return ChatSearchResponse(
+                query=query,
+                results=results,
+                total_results=total_results,
+                page=pagination.page,
+                limit=pagination.limit,
+                total_pages=total_pages,
+                has_next=pagination.page < total_pages,
+                has_previous=pagination.page > 1
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to search chat messages: {e}")
+            raise
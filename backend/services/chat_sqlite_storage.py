@@ -0,0 +1,433 @@
+import os
+import json
+import logging
+import sqlite3
+import itertools
+import threading
+from typing import Dict, Iterator, List, Optional
+from datetime import datetime
+import math
+
+from models import (
+    ChatMessage, ChatHistoryResponse, PaginationParams, ConversationSummary, ConversationListResponse,
+    ChatHistoryCursorResponse, ConversationCursorResponse
+)
+from .chat_storage import (
+    MessageWrite, ConversationVersionConflictError, check_expected_version, index_saved_messages,
+    message_to_record, record_to_message, truncate_content,
+    message_cursor_window, build_message_cursor_response,
+    conversation_cursor_key, build_conversation_cursor_response,
+    export_conversation_records
+)
+from .chat_search import ChatSearchIndex
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    last_message TEXT NOT NULL,
+    last_message_timestamp TEXT NOT NULL,
+    last_role TEXT NOT NULL,
+    message_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_last_message_timestamp
+    ON conversations (last_message_timestamp, id);
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL,
+    sequence INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    openai_id TEXT,
+    usage TEXT,
+    PRIMARY KEY (conversation_id, sequence)
+) WITHOUT ROWID;
+"""
+
+MESSAGE_COLUMNS = "id, role, content, timestamp, openai_id, usage"
+SUMMARY_COLUMNS = "id, last_message, last_message_timestamp, last_role, message_count"
+
+
+class SQLiteChatStorageService:
+    """Service for managing chat storage in a SQLite database (WAL mode)
+
+    Messages are keyed on (conversation_id, sequence) and conversations carry
+    their last-message summary, indexed on last_message_timestamp, so both
+    history pages and the conversation list are served by indexed queries.
+    """
+
+    def __init__(self, storage_file: str = "chats.db", search_index: Optional[ChatSearchIndex] = None):
+        """Initialize the SQLite storage service"""
+        self.storage_file = storage_file
+        self.storage_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), storage_file)
+        self.search_index = search_index
+        self._local = threading.local()
+        self._ensure_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection for the current thread, opening it if needed"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.storage_path, isolation_level=None, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def _ensure_schema(self) -> None:
+        """Ensure the database exists with the expected tables and indexes"""
+        try:
+            conn = self._connect()
+            conn.executescript(SCHEMA)
+            # Databases created before token usage was recorded lack the column
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(messages)")}
+            if "usage" not in columns:
+                conn.execute("ALTER TABLE messages ADD COLUMN usage TEXT")
+        except Exception as e:
+            logger.error(f"Failed to initialize SQLite chat storage: {e}")
+            raise
+
+    def _insert_message(self, conn: sqlite3.Connection, conversation_id: str, record: Dict) -> None:
+        """Insert one message record and update its conversation summary"""
+        row = conn.execute(
+            """
+            INSERT INTO conversations (id, last_message, last_message_timestamp, last_role, message_count)
+            VALUES (?, ?, ?, ?, 1)
+            ON CONFLICT (id) DO UPDATE SET
+                last_message = excluded.last_message,
+                last_message_timestamp = excluded.last_message_timestamp,
+                last_role = excluded.last_role,
+                message_count = message_count + 1
+            RETURNING message_count
+            """,
+            (conversation_id, truncate_content(record["content"]), record["timestamp"], record["role"])
+        ).fetchone()
+        conn.execute(
+            f"INSERT INTO messages (conversation_id, sequence, {MESSAGE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                conversation_id,
+                row["message_count"] - 1,
+                record["id"],
+                record["role"],
+                record["content"],
+                record["timestamp"],
+                record["openai_id"],
+                json.dumps(record["usage"]) if record.get("usage") else None,
+            )
+        )
+
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> Dict:
+        """Convert a messages row into a message record"""
+        record = dict(row)
+        if record.get("usage"):
+            record["usage"] = json.loads(record["usage"])
+        return record
+
+    @staticmethod
+    def _row_to_summary(row: sqlite3.Row) -> ConversationSummary:
+        """Convert a conversations row into a ConversationSummary"""
+        return ConversationSummary(
+            id=row["id"],
+            last_message=row["last_message"],
+            last_message_timestamp=datetime.fromisoformat(row["last_message_timestamp"]),
+            message_count=row["message_count"],
+            last_role=row["last_role"]
+        )
+
+    def save_message(
+        self,
+        conversation_id: str,
+        message: ChatMessage,
+        expected_version: Optional[int] = None
+    ) -> None:
+        """Save a message to the specified conversation, optionally only if it is still at expected_version"""
+        conflict = self.save_messages([MessageWrite(conversation_id, (message,), expected_version)])[0]
+        if conflict is not None:
+            raise conflict
+
+    def save_messages(self, items: List[MessageWrite]) -> List[Optional[ConversationVersionConflictError]]:
+        """
+        Save a batch of message writes in a single transaction
+
+        Args:
+            items: Writes to apply in order
+
+        Returns:
+            For each write, None if it was saved or the version conflict that rejected it
+        """
+        try:
+            results = []
+            saved = set()
+            saved_records = []
+            conn = self._connect()
+            # IMMEDIATE takes the write lock up front, so version checks cannot race other workers
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for write in items:
+                    if write.expected_version is not None:
+                        row = conn.execute(
+                            "SELECT message_count FROM conversations WHERE id = ?", (write.conversation_id,)
+                        ).fetchone()
+                        conflict = check_expected_version(write, row["message_count"] if row else 0)
+                        if conflict is not None:
+                            results.append(conflict)
+                            continue
+                    for message in write.messages:
+                        record = message_to_record(message)
+                        self._insert_message(conn, write.conversation_id, record)
+                        saved_records.append((write.conversation_id, record))
+                    results.append(None)
+                    saved.add(write.conversation_id)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            index_saved_messages(self.search_index, saved_records)
+            for conversation_id in saved:
+                logger.info(f"Message saved to conversation {conversation_id}")
+            return results
+
+        except Exception as e:
+            logger.error(f"Failed to save message: {e}")
+            raise
+
+    def get_conversation_messages(
+        self,
+        conversation_id: str,
+        pagination: PaginationParams
+    ) -> ChatHistoryResponse:
+        """Get messages from a conversation with pagination"""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            total_messages = row["message_count"] if row else 0
+            total_pages = math.ceil(total_messages / pagination.limit) if total_messages > 0 else 0
+
+            # Sequences are dense, so a page is a primary-key range scan
+            start_index = (pagination.page - 1) * pagination.limit
+            rows = conn.execute(
+                f"""
+                SELECT {MESSAGE_COLUMNS} FROM messages
+                WHERE conversation_id = ? AND sequence >= ? AND sequence < ?
+                ORDER BY sequence
+                """,
+                (conversation_id, start_index, start_index + pagination.limit)
+            ).fetchall() if total_messages > start_index else []
+
+            return ChatHistoryResponse(
+                messages=[record_to_message(self._row_to_record(r)) for r in rows],
+                total_messages=total_messages,
+                page=pagination.page,
+                limit=pagination.limit,
+                total_pages=total_pages,
+                has_next=pagination.page < total_pages,
+                has_previous=pagination.page > 1
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to get conversation messages: {e}")
+            raise
+
+    def get_all_conversations(self, pagination: PaginationParams) -> ConversationListResponse:
+        """Get all conversations with pagination, sorted by latest message timestamp"""
+        try:
+            conn = self._connect()
+            total_conversations = conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+            total_pages = math.ceil(total_conversations / pagination.limit) if total_conversations > 0 else 0
+
+            rows = conn.execute(
+                f"""
+                SELECT {SUMMARY_COLUMNS}
+                FROM conversations
+                ORDER BY last_message_timestamp DESC, id DESC
+                LIMIT ? OFFSET ?
+                """,
+                (pagination.limit, (pagination.page - 1) * pagination.limit)
+            ).fetchall()
+
+            conversations = [self._row_to_summary(r) for r in rows]
+
+            return ConversationListResponse(
+                conversations=conversations,
+                total_conversations=total_conversations,
+                page=pagination.page,
+                limit=pagination.limit,
+                total_pages=total_pages,
+                has_next=pagination.page < total_pages,
+                has_previous=pagination.page > 1
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to get all conversations: {e}")
+            raise
+
+    def get_conversation_messages_by_cursor(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> ChatHistoryCursorResponse:
+        """Get a window of messages around a cursor, defaulting to the newest messages"""
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            total_messages = row["message_count"] if row else 0
+            start, end = message_cursor_window(total_messages, limit, before, after)
+            rows = conn.execute(
+                f"""
+                SELECT {MESSAGE_COLUMNS} FROM messages
+                WHERE conversation_id = ? AND sequence >= ? AND sequence < ?
+                ORDER BY sequence
+                """,
+                (conversation_id, start, end)
+            ).fetchall() if end > start else []
+            messages = [record_to_message(self._row_to_record(r)) for r in rows]
+            return build_message_cursor_response(messages, start, end, total_messages, limit)
+
+        except Exception as e:
+            logger.error(f"Failed to get conversation messages by cursor: {e}")
+            raise
+
+    def get_conversations_by_cursor(
+        self,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> ConversationCursorResponse:
+        """Get a window of conversations around a cursor, defaulting to the most recently active"""
+        try:
+            conn = self._connect()
+            # Fetch one extra row to learn whether more conversations follow the window
+            if before is not None:
+                timestamp, conv_id = conversation_cursor_key(before)
+                rows = conn.execute(
+                    f"""
+                    SELECT {SUMMARY_COLUMNS} FROM conversations
+                    WHERE (last_message_timestamp, id) < (?, ?)
+                    ORDER BY last_message_timestamp DESC, id DESC
+                    LIMIT ?
+                    """,
+                    (timestamp.isoformat(), conv_id, limit + 1)
+                ).fetchall()
+                has_older, has_newer = len(rows) > limit, True
+                rows = rows[:limit]
+            elif after is not None:
+                timestamp, conv_id = conversation_cursor_key(after)
+                rows = conn.execute(
+                    f"""
+                    SELECT {SUMMARY_COLUMNS} FROM conversations
+                    WHERE (last_message_timestamp, id) > (?, ?)
+                    ORDER BY last_message_timestamp ASC, id ASC
+                    LIMIT ?
+                    """,
+                    (timestamp.isoformat(), conv_id, limit + 1)
+                ).fetchall()
+                has_older, has_newer = True, len(rows) > limit
+                rows = list(reversed(rows[:limit]))
+            else:
+                rows = conn.execute(
+                    f"""
+                    SELECT {SUMMARY_COLUMNS} FROM conversations
+                    ORDER BY last_message_timestamp DESC, id DESC
+                    LIMIT ?
+                    """,
+                    (limit + 1,)
+                ).fetchall()
+                has_older, has_newer = len(rows) > limit, False
+                rows = rows[:limit]
+
+            conversations = [self._row_to_summary(r) for r in rows]
+            return build_conversation_cursor_response(conversations, limit, has_older, has_newer)
+
+        except Exception as e:
+            logger.error(f"Failed to get conversations by cursor: {e}")
+            raise
+
+    def iter_export(
+        self,
+        conversation_ids: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """Yield conversations and messages as export rows, streaming from a database cursor"""
+        conditions, params = [], []
+        if conversation_ids is not None:
+            conditions.append(f"conversation_id IN ({', '.join('?' * len(conversation_ids))})")
+            params.extend(conversation_ids)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        # The export may be consumed from several threads, so it gets its own connection
+        conn = sqlite3.connect(self.storage_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT conversation_id, {MESSAGE_COLUMNS} FROM messages
+                {where}
+                ORDER BY conversation_id, sequence
+                """,
+                params
+            )
+            for conversation_id, group in itertools.groupby(rows, key=lambda r: r["conversation_id"]):
+                yield from export_conversation_records(conversation_id, (self._row_to_record(r) for r in group))
+        finally:
+            conn.close()
+
+    def conversation_exists(self, conversation_id: str) -> bool:
+        """Check if a conversation exists"""
+        try:
+            row = self._connect().execute(
+                "SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            return row is not None
+        except Exception as e:
+            logger.error(f"Failed to check conversation existence: {e}")
+            return False
+
+    def import_conversations(self, conversations: Dict[str, Dict]) -> int:
+        """
+        Import conversations in the chats.json format
+
+        Conversations that already exist in the database are skipped, so the
+        import can be safely re-run.
+
+        Args:
+            conversations: Mapping of conversation ID to {"messages": [...]}
+
+        Returns:
+            Number of conversations imported
+        """
+        conn = self._connect()
+        imported = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for conversation_id, conversation in conversations.items():
+                messages = conversation.get("messages", [])
+                if not messages or self.conversation_exists(conversation_id):
+                    continue
+                for record in messages:
+                    self._insert_message(conn, conversation_id, message_to_record(record_to_message(record)))
+                imported += 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        logger.info(f"Imported {imported} conversations into {self.storage_path}")
+        return imported
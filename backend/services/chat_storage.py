@@ -1,34 +1,362 @@
+import base64
 import json
 import os
 import logging
-from typing import Dict, List, Optional
-from datetime import datetime
+import threading
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from datetime import datetime, timedelta
 import math
+import re
 
-from models import ChatMessage, ChatHistoryResponse, PaginationParams, ConversationSummary, ConversationListResponse
+from config import settings
+from models import (
+    ChatMessage, ChatHistoryResponse, PaginationParams, ConversationSummary, ConversationListResponse,
+    ChatHistoryCursorResponse, ConversationCursorResponse
+)
+from .conversation_index import ConversationSummaryIndex, SummaryKey
+from .chat_archive import ChatArchive
+from .chat_search import ChatSearchIndex
+from .file_lock import FileLock
 
 logger = logging.getLogger(__name__)
 
+
+def message_to_record(message: ChatMessage) -> Dict:
+    """Convert a ChatMessage into its JSON-serializable storage record"""
+    record = message.model_dump()
+    record["timestamp"] = message.timestamp.isoformat()
+    return record
+
+
+def record_to_message(record: Dict) -> ChatMessage:
+    """Convert a stored record back into a ChatMessage"""
+    record = record.copy()
+    if isinstance(record.get("timestamp"), str):
+        record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+    return ChatMessage(**record)
+
+
+def truncate_content(content: str, max_length: int = 100) -> str:
+    """Truncate message content for conversation summaries"""
+    if len(content) > max_length:
+        return content[:max_length - 3] + "..."
+    return content
+
+
+def build_conversation_summary(conversation_id: str, last_record: Dict, message_count: int) -> ConversationSummary:
+    """Build the list-view summary of a conversation from its last message record"""
+    timestamp = last_record["timestamp"]
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return ConversationSummary(
+        id=conversation_id,
+        last_message=truncate_content(last_record["content"]),
+        last_message_timestamp=timestamp,
+        message_count=message_count,
+        last_role=last_record["role"]
+    )
+
+
+class MessageWrite(NamedTuple):
+    """Messages to append to a conversation, all of them or none
+
+    expected_version is the conversation's message count the writer last
+    saw; when set, the write only applies if nobody else appended since.
+    """
+    conversation_id: str
+    messages: Tuple[ChatMessage, ...]
+    expected_version: Optional[int] = None
+
+
+class ConversationVersionConflictError(Exception):
+    """Raised when a conversation changed since the version a writer expected"""
+
+    def __init__(self, conversation_id: str, expected_version: int, current_version: int):
+        super().__init__(
+            f"Conversation {conversation_id} is at version {current_version}, expected {expected_version}"
+        )
+        self.conversation_id = conversation_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+def check_expected_version(write: MessageWrite, current_version: int) -> Optional[ConversationVersionConflictError]:
+    """Get the conflict for a write whose expected version does not match, or None if it may apply"""
+    if write.expected_version is None or write.expected_version == current_version:
+        return None
+    return ConversationVersionConflictError(write.conversation_id, write.expected_version, current_version)
+
+
+def index_saved_messages(search_index: Optional[ChatSearchIndex], records: List[Tuple[str, Dict]]) -> None:
+    """Add saved (conversation_id, record) pairs to the search index without failing the save"""
+    if search_index is None or not records:
+        return
+    try:
+        search_index.add_messages(records)
+    except Exception as e:
+        # The messages are already stored; only their searchability is affected
+        logger.error(f"Saved messages could not be indexed for search: {e}")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(payload: Dict) -> str:
+    """Encode a cursor payload as an opaque URL-safe string"""
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """Decode an opaque cursor, raising InvalidCursorError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise InvalidCursorError("Invalid cursor")
+    if not isinstance(payload, dict):
+        raise InvalidCursorError("Invalid cursor")
+    return payload
+
+
+def message_cursor_window(
+    total_messages: int,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None
+) -> Tuple[int, int]:
+    """
+    Resolve message cursors into a [start, end) range of message sequence numbers
+
+    Without cursors the window is the newest limit messages. A 'before' cursor
+    selects the limit messages preceding it, an 'after' cursor the limit
+    messages following it.
+    """
+    try:
+        if before is not None:
+            end = min(int(decode_cursor(before)["s"]), total_messages)
+            return max(end - limit, 0), max(end, 0)
+        if after is not None:
+            start = max(int(decode_cursor(after)["s"]), 0)
+            return min(start, total_messages), min(start + limit, total_messages)
+    except (KeyError, TypeError, ValueError):
+        raise InvalidCursorError("Invalid cursor")
+    return max(total_messages - limit, 0), total_messages
+
+
+def build_message_cursor_response(
+    messages: List[ChatMessage],
+    start: int,
+    end: int,
+    total_messages: int,
+    limit: int
+) -> ChatHistoryCursorResponse:
+    """Build the cursor response for messages in the [start, end) sequence range"""
+    return ChatHistoryCursorResponse(
+        messages=messages,
+        limit=limit,
+        older_cursor=encode_cursor({"s": start}) if start > 0 else None,
+        newer_cursor=encode_cursor({"s": end}),
+        has_older=start > 0,
+        has_newer=end < total_messages
+    )
+
+
+def conversation_cursor_key(cursor: str) -> SummaryKey:
+    """Decode a conversation cursor into its (last message timestamp, conversation ID) key"""
+    payload = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(payload["t"]), str(payload["i"])
+    except (KeyError, TypeError, ValueError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def build_conversation_cursor_response(
+    conversations: List[ConversationSummary],
+    limit: int,
+    has_older: bool,
+    has_newer: bool
+) -> ConversationCursorResponse:
+    """Build the cursor response for a newest-first window of conversations"""
+    def cursor_for(summary: ConversationSummary) -> str:
+        return encode_cursor({"t": summary.last_message_timestamp.isoformat(), "i": summary.id})
+
+    return ConversationCursorResponse(
+        conversations=conversations,
+        limit=limit,
+        older_cursor=cursor_for(conversations[-1]) if conversations and has_older else None,
+        newer_cursor=cursor_for(conversations[0]) if conversations else None,
+        has_older=has_older,
+        has_newer=has_newer
+    )
+
+
+def export_conversation_records(
+    conversation_id: str,
+    records: Iterable[Dict],
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Iterator[Dict]:
+    """
+    Yield export rows for one conversation: a conversation header followed by its messages
+
+    Messages are filtered to since <= timestamp < until (ISO strings). The
+    header is only emitted if at least one message matches.
+    """
+    header_sent = False
+    for record in records:
+        timestamp = record["timestamp"]
+        if (since is not None and timestamp < since) or (until is not None and timestamp >= until):
+            continue
+        if not header_sent:
+            yield {"type": "conversation", "id": conversation_id}
+            header_sent = True
+        row = {"type": "message", "conversation_id": conversation_id}
+        row.update((key, value) for key, value in record.items() if key != "conversation_id")
+        yield row
+
+
+JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _JSONStreamReader:
+    """Reads consecutive JSON values from a text file while holding only a bounded window of it"""
+
+    def __init__(self, file, chunk_size: int):
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self) -> None:
+        """Append the next chunk, at least as large as the pending text so retries stay linear"""
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        chunk = self._file.read(max(self._chunk_size, len(self._buffer)))
+        if not chunk:
+            self._eof = True
+        self._buffer += chunk
+
+    def next_char(self) -> str:
+        """Skip whitespace and return the next character without consuming it"""
+        while True:
+            self._pos = JSON_WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._eof:
+                raise ValueError("Unexpected end of JSON file")
+            self._read_more()
+
+    def expect(self, char: str) -> None:
+        """Consume the next character, which must be char"""
+        found = self.next_char()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON file, found {found!r}")
+        self._pos += 1
+
+    def decode(self):
+        """Decode the next complete JSON value (a string or an object), reading until it is complete"""
+        self.next_char()
+        while True:
+            try:
+                value, self._pos = self._decoder.raw_decode(self._buffer, self._pos)
+                return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+                self._read_more()
+
+
+def iter_json_conversations(path: str, chunk_size: int = 64 * 1024) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield the conversations of a chats.json file one at a time
+
+    The file is parsed incrementally, so memory use is bounded by the largest
+    conversation rather than the size of the file.
+
+    Args:
+        path: Path to a file shaped like {"conversations": {id: {"messages": [...]}}}
+        chunk_size: Number of characters read at a time
+
+    Returns:
+        Iterator of (conversation_id, conversation data) in file order
+
+    Raises:
+        ValueError: If the file is not a valid chat storage file
+    """
+    with open(path, 'r') as f:
+        reader = _JSONStreamReader(f, chunk_size)
+        reader.expect("{")
+        if reader.next_char() == "}":
+            return
+        while True:
+            key = reader.decode()
+            reader.expect(":")
+            if key != "conversations":
+                reader.decode()
+            else:
+                reader.expect("{")
+                if reader.next_char() != "}":
+                    while True:
+                        conversation_id = reader.decode()
+                        reader.expect(":")
+                        yield conversation_id, reader.decode()
+                        if reader.next_char() != ",":
+                            break
+                        reader.expect(",")
+                reader.expect("}")
+            if reader.next_char() != ",":
+                break
+            reader.expect(",")
+        reader.expect("}")
+
+
 class ChatStorageService:
-    """Service for managing chat storage in JSON file"""
+    """Service for managing chat storage in JSON file
     
-    def __init__(self, storage_file: str = "chats.json"):
+    When an archive is configured, compact() moves idle conversations out of
+    the hot JSON file into compressed archive segments. Reads fall back to the
+    archive transparently, and a new message moves a conversation back.
+    """
+    
+    def __init__(
+        self,
+        storage_file: str = "chats.json",
+        archive: Optional[ChatArchive] = None,
+        search_index: Optional[ChatSearchIndex] = None
+    ):
         """Initialize the chat storage service"""
         self.storage_file = storage_file
         self.storage_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), storage_file)
+        self.archive = archive
+        self.search_index = search_index
+        # Serializes read-modify-write cycles across I/O threads and worker processes
+        self._file_lock = FileLock(f"{self.storage_path}.lock")
+        # Guards the summary index across I/O threads
+        self._lock = threading.RLock()
         self._ensure_storage_file()
+        # Conversation summaries ordered by last message time, kept in sync by save_message
+        # and rebuilt whenever another process has rewritten the storage file
+        self._summary_index = ConversationSummaryIndex()
+        self._data_signature = None
+        self._sync_summary_index()
     
     def _ensure_storage_file(self) -> None:
         """Ensure the storage file exists with proper structure"""
-        if not os.path.exists(self.storage_path):
-            initial_data = {"conversations": {}}
-            try:
-                with open(self.storage_path, 'w') as f:
-                    json.dump(initial_data, f, indent=2)
-                logger.info(f"Created new chat storage file: {self.storage_path}")
-            except Exception as e:
-                logger.error(f"Failed to create storage file: {e}")
-                raise
+        with self._file_lock:
+            if not os.path.exists(self.storage_path):
+                initial_data = {"conversations": {}}
+                try:
+                    with open(self.storage_path, 'w') as f:
+                        json.dump(initial_data, f, indent=2)
+                    logger.info(f"Created new chat storage file: {self.storage_path}")
+                except Exception as e:
+                    logger.error(f"Failed to create storage file: {e}")
+                    raise
     
     def _load_data(self) -> Dict:
         """Load data from storage file"""
@@ -42,29 +370,129 @@ class ChatStorageService:
     def _save_data(self, data: Dict) -> None:
         """Save data to storage file"""
         try:
-            with open(self.storage_path, 'w') as f:
+            # Write to a temporary file and swap it in so readers never see a partial file
+            temp_path = f"{self.storage_path}.tmp"
+            with open(temp_path, 'w') as f:
                 json.dump(data, f, indent=2, default=str)
+            os.replace(temp_path, self.storage_path)
             logger.debug("Chat data saved successfully")
         except Exception as e:
             logger.error(f"Failed to save storage file: {e}")
             raise
     
-    def save_message(self, conversation_id: str, message: ChatMessage) -> None:
-        """Save a message to the specified conversation"""
+    def _build_summary_index(self, data: Dict) -> None:
+        """Rebuild the conversation summary index from loaded storage data and the archive"""
+        self._summary_index.clear()
+        if self.archive is not None:
+            for conv_id, last_record, message_count in self.archive.summaries():
+                self._summary_index.update(build_conversation_summary(conv_id, last_record, message_count))
+        for conv_id, conv_data in data.get("conversations", {}).items():
+            messages = conv_data.get("messages", [])
+            if messages:  # Skip empty conversations
+                self._summary_index.update(build_conversation_summary(conv_id, messages[-1], len(messages)))
+    
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Get the identity of the current storage file, which changes on every rewrite"""
         try:
-            data = self._load_data()
-            
-            if conversation_id not in data["conversations"]:
-                data["conversations"][conversation_id] = {"messages": []}
-            
-            # Convert message to dict for JSON storage
-            message_dict = message.model_dump()
-            message_dict["timestamp"] = message.timestamp.isoformat()
-            
-            data["conversations"][conversation_id]["messages"].append(message_dict)
-            self._save_data(data)
+            stat = os.stat(self.storage_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    def _sync_summary_index(self, data: Optional[Dict] = None) -> None:
+        """
+        Rebuild the summary index if the storage file was rewritten by another process
+        
+        Args:
+            data: Storage data already loaded while holding the file lock, if any
+        """
+        with self._lock:
+            # Stat before loading: a rewrite in between only causes a redundant rebuild later
+            signature = self._file_signature()
+            if signature == self._data_signature:
+                return
+            self._build_summary_index(data if data is not None else self._load_data())
+            self._data_signature = signature
+    
+    def _get_messages_data(self, data: Dict, conversation_id: str) -> List[Dict]:
+        """Get the message records of a conversation from hot storage or the archive"""
+        if conversation_id in data["conversations"]:
+            return data["conversations"][conversation_id]["messages"]
+        if self.archive is not None:
+            return self.archive.load_messages(conversation_id) or []
+        return []
+    
+    def save_message(
+        self,
+        conversation_id: str,
+        message: ChatMessage,
+        expected_version: Optional[int] = None
+    ) -> None:
+        """Save a message to the specified conversation, optionally only if it is still at expected_version"""
+        conflict = self.save_messages([MessageWrite(conversation_id, (message,), expected_version)])[0]
+        if conflict is not None:
+            raise conflict
+    
+    def save_messages(self, items: List[MessageWrite]) -> List[Optional[ConversationVersionConflictError]]:
+        """
+        Save a batch of message writes with a single file rewrite
+        
+        Args:
+            items: Writes to apply in order
             
-            logger.info(f"Message saved to conversation {conversation_id}")
+        Returns:
+            For each write, None if it was saved or the version conflict that rejected it
+        """
+        try:
+            with self._file_lock:
+                data = self._load_data()
+                self._sync_summary_index(data)
+                rehydrated = []
+                results = []
+                saved = set()
+                saved_records = []
+                
+                for write in items:
+                    conversation_id = write.conversation_id
+                    conversation = data["conversations"].get(conversation_id)
+                    archived = None
+                    if conversation is None:
+                        # New messages bring an archived conversation back to hot storage
+                        archived = self.archive.load_messages(conversation_id) if self.archive is not None else None
+                    messages = conversation["messages"] if conversation is not None else archived or []
+                    
+                    conflict = check_expected_version(write, len(messages))
+                    results.append(conflict)
+                    if conflict is not None:
+                        continue
+                    
+                    if conversation is None:
+                        data["conversations"][conversation_id] = {"messages": messages}
+                        if archived is not None:
+                            rehydrated.append(conversation_id)
+                    # Convert messages to dicts for JSON storage
+                    for message in write.messages:
+                        record = message_to_record(message)
+                        messages.append(record)
+                        saved_records.append((conversation_id, record))
+                    saved.add(conversation_id)
+                
+                if not saved:
+                    return results
+                
+                self._save_data(data)
+                if rehydrated:
+                    self.archive.remove(rehydrated)
+                
+                with self._lock:
+                    for conversation_id in saved:
+                        messages = data["conversations"][conversation_id]["messages"]
+                        self._summary_index.update(build_conversation_summary(conversation_id, messages[-1], len(messages)))
+                    self._data_signature = self._file_signature()
+                index_saved_messages(self.search_index, saved_records)
+                for conversation_id in saved:
+                    logger.info(f"Message saved to conversation {conversation_id}")
+                return results
             
         except Exception as e:
             logger.error(f"Failed to save message: {e}")
@@ -79,19 +507,8 @@ class ChatStorageService:
         try:
             data = self._load_data()
             
-            if conversation_id not in data["conversations"]:
-                # Return empty response for non-existent conversation
-                return ChatHistoryResponse(
-                    messages=[],
-                    total_messages=0,
-                    page=pagination.page,
-                    limit=pagination.limit,
-                    total_pages=0,
-                    has_next=False,
-                    has_previous=False
-                )
-            
-            messages_data = data["conversations"][conversation_id]["messages"]
+            # Non-existent conversations yield an empty page
+            messages_data = self._get_messages_data(data, conversation_id)
             total_messages = len(messages_data)
             
             # Calculate pagination
@@ -103,14 +520,7 @@ class ChatStorageService:
             paginated_messages_data = messages_data[start_index:end_index]
             
             # Convert to ChatMessage objects
-            messages = []
-            for msg_data in paginated_messages_data:
-                # Parse timestamp back to datetime
-                msg_data_copy = msg_data.copy()
-                if isinstance(msg_data_copy["timestamp"], str):
-                    msg_data_copy["timestamp"] = datetime.fromisoformat(msg_data_copy["timestamp"])
-                
-                messages.append(ChatMessage(**msg_data_copy))
+            messages = [record_to_message(msg_data) for msg_data in paginated_messages_data]
             
             return ChatHistoryResponse(
                 messages=messages,
@@ -129,57 +539,14 @@ class ChatStorageService:
     def get_all_conversations(self, pagination: PaginationParams) -> ConversationListResponse:
         """Get all conversations with pagination, sorted by latest message timestamp"""
         try:
-            data = self._load_data()
-            conversations_data = data.get("conversations", {})
-            
-            if not conversations_data:
-                # Return empty response if no conversations exist
-                return ConversationListResponse(
-                    conversations=[],
-                    total_conversations=0,
-                    page=pagination.page,
-                    limit=pagination.limit,
-                    total_pages=0,
-                    has_next=False,
-                    has_previous=False
-                )
-            
-            # Create conversation summaries with last message info
-            conversation_summaries = []
-            for conv_id, conv_data in conversations_data.items():
-                messages = conv_data.get("messages", [])
-                if not messages:
-                    continue  # Skip empty conversations
-                
-                # Get last message
-                last_message = messages[-1]
-                last_timestamp = datetime.fromisoformat(last_message["timestamp"])
-                
-                # Truncate last message content for summary (max 100 chars)
-                last_content = last_message["content"]
-                if len(last_content) > 100:
-                    last_content = last_content[:97] + "..."
-                
-                conversation_summary = ConversationSummary(
-                    id=conv_id,
-                    last_message=last_content,
-                    last_message_timestamp=last_timestamp,
-                    message_count=len(messages),
-                    last_role=last_message["role"]
-                )
-                conversation_summaries.append(conversation_summary)
-            
-            # Sort by last message timestamp (newest first)
-            conversation_summaries.sort(key=lambda x: x.last_message_timestamp, reverse=True)
-            
-            total_conversations = len(conversation_summaries)
+            start_index = (pagination.page - 1) * pagination.limit
+            self._sync_summary_index()
+            with self._lock:
+                total_conversations = len(self._summary_index)
+                paginated_conversations = self._summary_index.newest(start_index, pagination.limit)
             
             # Apply pagination
             total_pages = math.ceil(total_conversations / pagination.limit) if total_conversations > 0 else 0
-            start_index = (pagination.page - 1) * pagination.limit
-            end_index = start_index + pagination.limit
-            
-            paginated_conversations = conversation_summaries[start_index:end_index]
             
             return ConversationListResponse(
                 conversations=paginated_conversations,
@@ -195,14 +562,152 @@ class ChatStorageService:
             logger.error(f"Failed to get all conversations: {e}")
             raise
     
+    def get_conversation_messages_by_cursor(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> ChatHistoryCursorResponse:
+        """Get a window of messages around a cursor, defaulting to the newest messages"""
+        try:
+            data = self._load_data()
+            messages_data = self._get_messages_data(data, conversation_id)
+            start, end = message_cursor_window(len(messages_data), limit, before, after)
+            messages = [record_to_message(msg_data) for msg_data in messages_data[start:end]]
+            return build_message_cursor_response(messages, start, end, len(messages_data), limit)
+        except Exception as e:
+            logger.error(f"Failed to get conversation messages by cursor: {e}")
+            raise
+    
+    def get_conversations_by_cursor(
+        self,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> ConversationCursorResponse:
+        """Get a window of conversations around a cursor, defaulting to the most recently active"""
+        try:
+            before_key = conversation_cursor_key(before) if before is not None else None
+            after_key = conversation_cursor_key(after) if after is not None else None
+            self._sync_summary_index()
+            with self._lock:
+                conversations, has_older, has_newer = self._summary_index.window(limit, before_key, after_key)
+            return build_conversation_cursor_response(conversations, limit, has_older, has_newer)
+        except Exception as e:
+            logger.error(f"Failed to get conversations by cursor: {e}")
+            raise
+    
+    def iter_export(
+        self,
+        conversation_ids: Optional[List[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        Yield conversations and messages as export rows
+
+        chats.json is parsed incrementally, one conversation at a time, so
+        memory use stays flat however large the file grows. Archived
+        conversations follow the hot ones.
+        """
+        wanted = set(conversation_ids) if conversation_ids is not None else None
+        exported = set()
+        for conversation_id, conv_data in iter_json_conversations(self.storage_path):
+            if wanted is not None and conversation_id not in wanted:
+                continue
+            exported.add(conversation_id)
+            yield from export_conversation_records(conversation_id, conv_data.get("messages", []), since, until)
+        if self.archive is None:
+            return
+        remaining = conversation_ids if conversation_ids is not None else self.archive.conversation_ids()
+        for conversation_id in remaining:
+            if conversation_id in exported:
+                continue
+            exported.add(conversation_id)
+            messages = self.archive.load_messages(conversation_id) or []
+            yield from export_conversation_records(conversation_id, messages, since, until)
+    
     def conversation_exists(self, conversation_id: str) -> bool:
         """Check if a conversation exists"""
         try:
             data = self._load_data()
-            return conversation_id in data["conversations"]
+            return conversation_id in data["conversations"] or (
+                self.archive is not None and conversation_id in self.archive
+            )
         except Exception as e:
             logger.error(f"Failed to check conversation existence: {e}")
             return False
+    
+    def compact(self, idle_seconds: float) -> int:
+        """
+        Move conversations idle for longer than idle_seconds to the archive
+        
+        Args:
+            idle_seconds: Minimum time since a conversation's last message
+            
+        Returns:
+            Number of conversations archived
+        """
+        if self.archive is None:
+            return 0
+        try:
+            cutoff = (datetime.utcnow() - timedelta(seconds=idle_seconds)).isoformat()
+            with self._file_lock:
+                data = self._load_data()
+                self._sync_summary_index(data)
+                idle = {
+                    conv_id: conv_data["messages"]
+                    for conv_id, conv_data in data["conversations"].items()
+                    if conv_data.get("messages") and conv_data["messages"][-1]["timestamp"] < cutoff
+                }
+                if not idle:
+                    return 0
+                
+                # Archive first so a conversation is always readable from at least one tier
+                self.archive.archive(idle)
+                for conv_id in idle:
+                    del data["conversations"][conv_id]
+                self._save_data(data)
+                # Archived conversations keep their summaries, so the index is already current
+                with self._lock:
+                    self._data_signature = self._file_signature()
+            
+            logger.info(f"Compacted {len(idle)} idle conversations into the archive")
+            return len(idle)
+            
+        except Exception as e:
+            logger.error(f"Failed to compact chat storage: {e}")
+            raise
+
+def _create_backend(search_index: Optional[ChatSearchIndex]):
+    """Create the chat storage backend selected by settings.chat_storage_backend"""
+    backend = settings.chat_storage_backend.lower()
+    if backend == "log":
+        from .chat_log_storage import LogChatStorageService
+        return LogChatStorageService(
+            log_dir=settings.chat_log_dir,
+            segment_max_bytes=settings.chat_log_segment_max_bytes,
+            fsync=settings.chat_log_fsync,
+            search_index=search_index,
+        )
+    if backend == "sqlite":
+        from .chat_sqlite_storage import SQLiteChatStorageService
+        return SQLiteChatStorageService(settings.chat_sqlite_path, search_index=search_index)
+    if backend != "json":
+        logger.warning(f"Unknown chat storage backend '{backend}', falling back to json")
+    archive = ChatArchive(settings.chat_archive_dir) if settings.chat_archive_enabled else None
+    return ChatStorageService(settings.chat_json_path, archive=archive, search_index=search_index)
+
+
+def create_chat_storage():
+    """Create the configured chat storage service, with its search index when enabled"""
+    search_index = ChatSearchIndex(settings.chat_search_path) if settings.chat_search_enabled else None
+    storage = _create_backend(search_index)
+    if search_index is not None:
+        # Index messages stored before search was enabled
+        search_index.rebuild_if_empty(storage.iter_export())
+    return storage
 
 # Global storage service instance
-chat_storage = ChatStorageService() 
\ No newline at end of file
+chat_storage = create_chat_storage() 
\ No newline at end of file
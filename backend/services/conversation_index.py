@@ -0,0 +1,92 @@
+import bisect
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+
+from models import ConversationSummary
+
+# (last message timestamp, conversation ID) - unique sort key of a conversation
+SummaryKey = Tuple[datetime, str]
+
+
+class ConversationSummaryIndex:
+    """In-memory conversation summaries ordered by last message time
+
+    Keys are kept in an ascending sorted list, so the most recently active
+    conversations sit at the tail: an update is a bisect plus a move towards
+    the end of the list, and a page of the newest conversations is a slice.
+    """
+
+    def __init__(self):
+        """Initialize an empty index"""
+        self._summaries: Dict[str, ConversationSummary] = {}
+        self._keys: List[SummaryKey] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._summaries
+
+    def get(self, conversation_id: str) -> Optional[ConversationSummary]:
+        """Get the summary of a conversation"""
+        return self._summaries.get(conversation_id)
+
+    def update(self, summary: ConversationSummary) -> None:
+        """Insert or replace the summary of a conversation"""
+        self.remove(summary.id)
+        self._summaries[summary.id] = summary
+        key = (summary.last_message_timestamp, summary.id)
+        # New messages are almost always the newest, so append when possible
+        if not self._keys or self._keys[-1] < key:
+            self._keys.append(key)
+        else:
+            bisect.insort(self._keys, key)
+
+    def remove(self, conversation_id: str) -> None:
+        """Remove a conversation from the index if present"""
+        summary = self._summaries.pop(conversation_id, None)
+        if summary is None:
+            return
+        key = (summary.last_message_timestamp, conversation_id)
+        position = bisect.bisect_left(self._keys, key)
+        del self._keys[position]
+
+    def clear(self) -> None:
+        """Remove all conversations from the index"""
+        self._summaries.clear()
+        self._keys.clear()
+
+    def newest(self, offset: int, limit: int) -> List[ConversationSummary]:
+        """Get summaries ordered from newest to oldest, skipping the first offset"""
+        end = len(self._keys) - offset
+        start = max(end - limit, 0)
+        if end <= 0:
+            return []
+        return [self._summaries[conv_id] for _, conv_id in reversed(self._keys[start:end])]
+
+    def window(
+        self,
+        limit: int,
+        before: Optional[SummaryKey] = None,
+        after: Optional[SummaryKey] = None
+    ) -> Tuple[List[ConversationSummary], bool, bool]:
+        """
+        Get up to limit summaries next to a key, newest first
+
+        With before, returns the newest summaries older than it; with after,
+        the oldest summaries newer than it; otherwise the newest summaries.
+
+        Returns:
+            Tuple of (summaries, has_older, has_newer)
+        """
+        if before is not None:
+            end = bisect.bisect_left(self._keys, before)
+            start = max(end - limit, 0)
+        elif after is not None:
+            start = bisect.bisect_right(self._keys, after)
+            end = min(start + limit, len(self._keys))
+        else:
+            end = len(self._keys)
+            start = max(end - limit, 0)
+        summaries = [self._summaries[conv_id] for _, conv_id in reversed(self._keys[start:end])]
+        return summaries, start > 0, end < len(self._keys)
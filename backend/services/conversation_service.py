@@ -1,23 +1,38 @@
-from agents import Agent, FileSearchTool
+from agents import Agent, FileSearchTool, InputGuardrailTripwireTriggered, add_trace_processor
 from memory.context_manager import ConversationManager
+from memory.state_cache import ConversationStateCache
+from memory.context_policy import AgentSummarizer, ContextPolicy, TokenCounter
+from memory.response_cache import ResponseCache
+from memory.intent_router import IntentRouter, NaiveBayesIntentClassifier
 from config import settings
-from typing import Dict, Any, Optional
+from models import WorkerUsageSummaryResponse
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional
 import logging
 import os
 import time
-import json
 import sys
 from agents.mcp import MCPServerStdio
+from .async_storage import async_chat_storage
+from .chat_storage import ConversationVersionConflictError
+from .turn_scheduler import TurnRejectedError, TurnScheduler
+from .prompt_registry import PromptRegistry
+from .metrics import CHAT_TURN_STAGE_SECONDS
+from .trace_metrics import MetricsTracingProcessor
+from .usage_accounting import usage_ledger
+from .user_storage import user_storage
 # Add parent directory to path to access conference_agent
 parent_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
 # Import main_agent from conference_agent
-from conference_agent.agent import main_agent
+from conference_agent.agent import guardrail_agent, main_agent
 
 logger = logging.getLogger(__name__)
 
+# Reply to messages rejected by the input guardrail
+GUARDRAIL_REFUSAL = "I'm sorry, I can only help with VivaTech Conference related questions."
+
 
 class ConversationService:
     """Service for managing conversations using the ConversationManager"""
@@ -29,33 +44,79 @@ class ConversationService:
             if not os.getenv("OPENAI_API_KEY") and settings.openai_api_key:
                 os.environ["OPENAI_API_KEY"] = settings.openai_api_key
 
-            # Read instructions from file
-            instructions = self._load_instructions()
-
-            # Load user info and append to instructions if available
-            user_info = self._load_user_info()
-            final_instructions = instructions
-            if user_info:
-                final_instructions = instructions + f"\n\nUser info:\n{user_info}"
+            # Instructions, user info and the agenda are cached by the registry and
+            # reloaded when their files change; each turn gets the agenda sections
+            # relevant to its message
+            self.prompt_registry = PromptRegistry(
+                top_k=settings.prompt_retrieval_top_k if settings.prompt_retrieval_enabled else None
+            )
+            user_storage.add_listener(self.prompt_registry.invalidate_user_info)
 
             # Use main_agent from conference_agent but update instructions and name
             self.agent = main_agent
-            # Update the agent's name and instructions for VivaTech 2025
+            # Update the agent's name; instructions are assembled on every run
             self.agent.name = "VivaTech 2025 Assistant"
-            self.agent.instructions = final_instructions
-
-            # Initialize the conversation manager with the agent
+            self.agent.instructions = self.prompt_registry.dynamic_instructions
+            # The VivaTech topic guardrail runs alongside the agent's first model call
+            if not settings.input_guardrail_enabled:
+                self.agent.input_guardrails = []
+            elif settings.input_guardrail_model:
+                guardrail_agent.model = settings.input_guardrail_model
+
+            # Agent, tool and MCP latencies are recorded from the SDK's tracing spans
+            add_trace_processor(MetricsTracingProcessor())
+
+            # Initialize the conversation manager with the agent; evicted conversations
+            # are rebuilt from chat storage on their next turn, long ones are
+            # summarized down to the context token budget, repeated first
+            # questions are answered from the response cache, and clear
+            # requests for a specialist skip the main agent's handoff
             self.conversation_manager = ConversationManager(
                 agent=self.agent,
                 workflow_name="VivaTechConversation",
                 default_group_id="default",
+                state_cache=ConversationStateCache(
+                    max_entries=settings.conversation_cache_max_entries,
+                    max_bytes=settings.conversation_cache_max_bytes,
+                    ttl_seconds=settings.conversation_cache_ttl_seconds,
+                ),
+                history_loader=self._load_stored_history,
+                instructions_fingerprint=self.prompt_registry.fingerprint,
+                context_policy=ContextPolicy(
+                    token_counter=TokenCounter(settings.default_model),
+                    summarizer=(
+                        AgentSummarizer(settings.context_summary_model or settings.default_model)
+                        if settings.context_summarization_enabled
+                        else None
+                    ),
+                    token_budget=settings.context_token_budget,
+                    keep_last_turns=settings.context_keep_last_turns,
+                ),
+                response_cache=(
+                    ResponseCache(
+                        max_entries=settings.response_cache_max_entries,
+                        ttl_seconds=settings.response_cache_ttl_seconds,
+                        similarity_threshold=settings.response_cache_similarity_threshold,
+                    )
+                    if settings.response_cache_enabled
+                    else None
+                ),
+                intent_router=self._create_intent_router() if settings.intent_router_enabled else None,
+            )
+
+            # Turns of one conversation run one at a time; agent runs overall are capped
+            self.turn_scheduler = TurnScheduler(
+                max_concurrent=settings.agent_max_concurrent_runs,
+                max_queued=settings.agent_max_queued_runs,
+                max_queued_per_conversation=settings.agent_max_queued_per_conversation,
+                queue_timeout_seconds=settings.agent_queue_timeout_seconds,
             )
 
             self._initialized = True
             logger.info(
                 "Conversation service initialized successfully with VivaTech 2025 instructions using main_agent"
             )
-            if user_info:
+            if self.prompt_registry.has_user_info():
                 logger.info(
                     "User profile information loaded and included in agent instructions"
                 )
@@ -65,129 +126,57 @@ class ConversationService:
             self._initialized = False
             raise
 
-    def _load_user_info(self) -> Optional[str]:
-        """Load user information from user.json file and format for instructions"""
-        try:
-            # Get the path to user.json (should be in the backend directory)
-            user_json_path = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), "user.json"
-            )
-
-            if not os.path.exists(user_json_path):
-                logger.info("No user.json file found - proceeding without user info")
-                return None
-
-            with open(user_json_path, "r", encoding="utf-8") as f:
-                user_data = json.load(f)
-
-            # Check if user_data is empty or doesn't have essential fields
-            if not user_data or not user_data.get("firstName"):
-                logger.info(
-                    "user.json is empty or missing essential fields - proceeding without user info"
-                )
-                return None
-
-            # Extract relevant fields for the AI assistant
-            user_info_parts = []
-
-            # Basic info
-            if user_data.get("firstName") and user_data.get("lastName"):
-                user_info_parts.append(
-                    f"Name: {user_data['firstName']} {user_data['lastName']}"
-                )
-
-            # Professional info
-            if user_data.get("headline"):
-                user_info_parts.append(
-                    f"Professional headline: {user_data['headline']}"
-                )
-
-            if user_data.get("jobTitle") and user_data.get("companyName"):
-                user_info_parts.append(
-                    f"Current position: {user_data['jobTitle']} at {user_data['companyName']}"
-                )
-
-            # Contact info
-            if user_data.get("email"):
-                user_info_parts.append(f"Email: {user_data['email']}")
-
-            # Location
-            if user_data.get("addressWithCountry"):
-                user_info_parts.append(f"Location: {user_data['addressWithCountry']}")
-
-            # About section
-            if user_data.get("about"):
-                user_info_parts.append(f"About: {user_data['about']}")
-
-            # LinkedIn profile
-            if user_data.get("linkedinUrl"):
-                user_info_parts.append(f"LinkedIn: {user_data['linkedinUrl']}")
-
-            # Recent experience (just the current one)
-            experiences = user_data.get("experiences", [])
-            if experiences and len(experiences) > 0:
-                current_exp = experiences[0]  # First one is usually current
-                if current_exp.get("title") and current_exp.get("subtitle"):
-                    duration = current_exp.get("caption", "")
-                    user_info_parts.append(
-                        f"Current role: {current_exp['title']} at {current_exp['subtitle']} ({duration})"
-                    )
-
-            if user_info_parts:
-                user_info_text = "\n".join(user_info_parts)
-                logger.info(f"Loaded user info with {len(user_info_parts)} fields")
-                return user_info_text
-            else:
-                logger.info("No relevant user info fields found")
-                return None
-
-        except json.JSONDecodeError as e:
-            logger.error(f"Error parsing user.json: {e}")
-            return None
-        except Exception as e:
-            logger.error(f"Error loading user info: {e}")
-            return None
-
-    def _load_instructions(self) -> str:
-        """Load instructions from the instructions.txt file"""
-        try:
-            # Get the path to instructions.txt (should be in the backend directory)
-            instructions_path = os.path.join(
-                os.path.dirname(os.path.dirname(__file__)), "instructions.txt"
-            )
-
-            if os.path.exists(instructions_path):
-                with open(instructions_path, "r", encoding="utf-8") as f:
-                    instructions = f.read().strip()
+    def _create_intent_router(self) -> IntentRouter:
+        """Create the intent router over the agent's handoffs, with the trained classifier if there is one"""
+        classifier = None
+        if os.path.exists(settings.intent_router_model_path):
+            try:
+                classifier = NaiveBayesIntentClassifier.load(settings.intent_router_model_path)
                 logger.info(
-                    f"Loaded instructions from {instructions_path} ({len(instructions)} characters)"
+                    f"Loaded intent classifier from {settings.intent_router_model_path} "
+                    f"with classes {classifier.classes}"
                 )
-                return instructions
-            else:
-                logger.warning(
-                    f"Instructions file not found at {instructions_path}, using default instructions"
-                )
-                return self._get_default_instructions()
+            except Exception as e:
+                logger.warning(f"Failed to load intent classifier, routing with rules only: {e}")
+        return IntentRouter(
+            agents=[agent.name for agent in self.agent.handoffs],
+            classifier=classifier,
+            min_confidence=settings.intent_router_min_confidence,
+        )
+
+    async def _load_stored_history(self, conversation_id: str) -> List[Dict[str, str]]:
+        """Load the most recent stored messages of a conversation, oldest first"""
+        history = await async_chat_storage.get_conversation_messages_by_cursor(
+            conversation_id, settings.conversation_rehydrate_max_messages
+        )
+        logger.info(
+            f"Rehydrating conversation {conversation_id} from {len(history.messages)} stored messages"
+        )
+        return [{"role": message.role, "content": message.content} for message in history.messages]
+
+    def load_tokenizer(self) -> None:
+        """
+        Load the encoding used to budget conversation context
 
-        except Exception as e:
-            logger.error(f"Error loading instructions from file: {e}")
-            return self._get_default_instructions()
-
-    def _get_default_instructions(self) -> str:
-        """Get default instructions if file is not available"""
-        return """You are an AI assistant for VivaTech 2025.
-You provide clear, friendly, and accurate general information about the event.
-You can answer questions about dates, location, themes, stages, award ceremonies, main topics, networking events,
-and highlight special features such as women in tech, sustainability, AI, and startups.
-Guide users to relevant areas of the program and help them get the most out of their VivaTech experience.
-Always be welcoming and helpful in your responses."""
+        Raises:
+            RuntimeError: If the encoding cannot be loaded
+        """
+        self.conversation_manager.context_policy.token_counter.encoding
 
     def is_initialized(self) -> bool:
         """Check if the service is properly initialized"""
         return self._initialized
 
+    def _attach_calendar_server(self, google_calendar_server: Optional[MCPServerStdio]) -> None:
+        """Give the scheduling handoff agent access to the Google Calendar MCP server"""
+        self.agent.handoffs[0].mcp_servers = [google_calendar_server] if google_calendar_server else []
+
     async def create_response(
-        self, message: str, conversation_id: str, google_calendar_server: Optional[MCPServerStdio] = None
+        self,
+        message: str,
+        conversation_id: str,
+        google_calendar_server: Optional[MCPServerStdio] = None,
+        persist_turn: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
         """
         Create a response using the ConversationManager
@@ -195,11 +184,18 @@ Always be welcoming and helpful in your responses."""
         Args:
             message: User input message
             conversation_id: Conversation ID (group_id for context manager)
+            google_calendar_server: Google Calendar MCP server for the scheduling agent
+            persist_turn: Called with the response data before the turn gives up its
+                slot, so turns of a conversation are stored in the order they ran
 
         Returns:
-            Dict containing response_id and message
+            Dict containing response_id, message and the turn's token usage
+
+        Raises:
+            TurnRejectedError: If the turn scheduler is saturated
+            ConversationVersionConflictError: If persist_turn found the conversation changed
         """
-        self.conversation_manager.main_agent.handoffs[0].mcp_servers = [google_calendar_server]
+        self._attach_calendar_server(google_calendar_server)
         # Start total timing
         total_start_time = time.perf_counter()
 
@@ -209,28 +205,47 @@ Always be welcoming and helpful in your responses."""
 
             logger.info(f"Creating response for conversation {conversation_id}")
 
-            # Time the conversation manager execution
-            cm_start_time = time.perf_counter()
-
-            # Use the conversation manager to execute with the correct parameter name
-            response_text = await self.conversation_manager.execute(
-                prompt=message, group_id=conversation_id
-            )
-
-            cm_end_time = time.perf_counter()
-            cm_duration = cm_end_time - cm_start_time
-
-            # Time the response data creation
-            response_start_time = time.perf_counter()
-
-            # Create response data in expected format
-            response_data = {
-                "response_id": conversation_id,  # Use conversation_id as response_id
-                "message": response_text,
-            }
-
-            response_end_time = time.perf_counter()
-            response_duration = response_end_time - response_start_time
+            # Wait for the conversation's previous turn and a free run slot
+            queue_start_time = time.perf_counter()
+            async with self.turn_scheduler.slot(conversation_id):
+                # Time the conversation manager execution
+                cm_start_time = time.perf_counter()
+                queue_duration = cm_start_time - queue_start_time
+
+                # Use the conversation manager to execute with the correct parameter name
+                try:
+                    response_text = await self.conversation_manager.execute(
+                        prompt=message, group_id=conversation_id
+                    )
+                    usage = self.conversation_manager.get_turn_usage(conversation_id)
+                except InputGuardrailTripwireTriggered as e:
+                    self._log_guardrail_rejection(conversation_id, e)
+                    response_text, usage = GUARDRAIL_REFUSAL, None
+
+                cm_end_time = time.perf_counter()
+                cm_duration = cm_end_time - cm_start_time
+
+                # Time the response data creation
+                response_start_time = time.perf_counter()
+
+                # Create response data in expected format
+                response_data = {
+                    "response_id": conversation_id,  # Use conversation_id as response_id
+                    "message": response_text,
+                    "usage": usage,
+                }
+                usage_ledger.record(conversation_id, usage)
+
+                response_end_time = time.perf_counter()
+                response_duration = response_end_time - response_start_time
+
+                if persist_turn is not None:
+                    try:
+                        await persist_turn(response_data)
+                    except ConversationVersionConflictError:
+                        # The turn was not stored; rebuild the context from storage next time
+                        self.clear_conversation(conversation_id)
+                        raise
 
             # Calculate total time
             total_end_time = time.perf_counter()
@@ -238,6 +253,7 @@ Always be welcoming and helpful in your responses."""
 
             # Log detailed timing information
             logger.info(f"⏱️  TIMING ANALYSIS for conversation {conversation_id}:")
+            logger.info(f"   🚦 Turn queue wait: {queue_duration:.3f} seconds")
             logger.info(
                 f"   📝 ConversationManager.execute(): {cm_duration:.3f} seconds"
             )
@@ -245,17 +261,19 @@ Always be welcoming and helpful in your responses."""
                 f"   📦 Response data creation: {response_duration:.6f} seconds"
             )
             logger.info(f"   🎯 TOTAL function time: {total_duration:.3f} seconds")
+            self._log_turn_context(conversation_id)
 
-            # Also log at INFO level for easy monitoring
-            print(
-                f"🚀 PERFORMANCE: Total response time = {total_duration:.3f}s (CM execute = {cm_duration:.3f}s)"
-            )
+            CHAT_TURN_STAGE_SECONDS.observe(queue_duration, stage="queue_wait")
+            CHAT_TURN_STAGE_SECONDS.observe(cm_duration, stage="agent")
+            CHAT_TURN_STAGE_SECONDS.observe(total_duration, stage="total")
 
             logger.info(
                 f"Response created successfully for conversation {conversation_id}"
             )
             return response_data
 
+        except (TurnRejectedError, ConversationVersionConflictError):
+            raise
         except Exception as e:
             total_end_time = time.perf_counter()
             total_duration = total_end_time - total_start_time
@@ -264,6 +282,135 @@ Always be welcoming and helpful in your responses."""
             )
             raise Exception(f"Failed to create response: {str(e)}")
 
+    async def create_response_stream(
+        self, message: str, conversation_id: str, google_calendar_server: Optional[MCPServerStdio] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Create a response using the ConversationManager, streaming events as they are produced
+
+        Args:
+            message: User input message
+            conversation_id: Conversation ID (group_id for context manager)
+
+        Yields:
+            Event dicts from ConversationManager.execute_streamed; the final
+            "done" event also carries the response_id
+
+        Raises:
+            TurnRejectedError: If the turn scheduler is saturated
+        """
+        self._attach_calendar_server(google_calendar_server)
+        total_start_time = time.perf_counter()
+        first_token_time = None
+
+        try:
+            if not self._initialized:
+                raise Exception("Conversation service not properly initialized")
+
+            logger.info(f"Creating streamed response for conversation {conversation_id}")
+
+            # The slot is held until the stream ends or the client disconnects
+            async with self.turn_scheduler.slot(conversation_id):
+                queue_duration = time.perf_counter() - total_start_time
+                logger.info(f"   🚦 Turn queue wait: {queue_duration:.3f} seconds")
+                CHAT_TURN_STAGE_SECONDS.observe(queue_duration, stage="queue_wait")
+                try:
+                    async for event in self.conversation_manager.execute_streamed(
+                        prompt=message, group_id=conversation_id
+                    ):
+                        if event["type"] == "token" and first_token_time is None:
+                            first_token_time = time.perf_counter()
+                            logger.info(
+                                f"   ⚡ Time to first token: {first_token_time - total_start_time:.3f} seconds"
+                            )
+                            CHAT_TURN_STAGE_SECONDS.observe(first_token_time - total_start_time, stage="first_token")
+                        if event["type"] == "done":
+                            event = {**event, "response_id": conversation_id}
+                            usage_ledger.record(conversation_id, event.get("usage"))
+                        yield event
+                except InputGuardrailTripwireTriggered as e:
+                    # Nothing generated for the message has been streamed yet
+                    self._log_guardrail_rejection(conversation_id, e)
+                    yield {"type": "token", "delta": GUARDRAIL_REFUSAL}
+                    yield {"type": "done", "message": GUARDRAIL_REFUSAL, "usage": None, "response_id": conversation_id}
+
+            total_duration = time.perf_counter() - total_start_time
+            logger.info(f"⏱️  TIMING ANALYSIS for streamed conversation {conversation_id}:")
+            logger.info(f"   🎯 TOTAL stream time: {total_duration:.3f} seconds")
+            CHAT_TURN_STAGE_SECONDS.observe(total_duration, stage="total_stream")
+            self._log_turn_context(conversation_id)
+            logger.info(
+                f"Streamed response created successfully for conversation {conversation_id}"
+            )
+
+        except TurnRejectedError:
+            raise
+        except Exception as e:
+            total_duration = time.perf_counter() - total_start_time
+            logger.error(
+                f"Error creating streamed response after {total_duration:.3f} seconds: {e}"
+            )
+            raise Exception(f"Failed to create response: {str(e)}")
+
+    def _log_turn_context(self, conversation_id: str) -> None:
+        """Log the context window statistics of a conversation's latest turn"""
+        stats = self.conversation_manager.get_turn_stats(conversation_id)
+        if stats:
+            logger.info(
+                f"   🧮 Context tokens sent: {stats['tokens_sent']} "
+                f"(full history {stats['tokens_full_history']}, saved {stats['tokens_saved']}, "
+                f"{stats['summarized_turns']} turns summarized)"
+            )
+
+    @staticmethod
+    def _log_guardrail_rejection(conversation_id: str, error: InputGuardrailTripwireTriggered) -> None:
+        """Log why the input guardrail rejected a conversation's message"""
+        result = error.guardrail_result
+        reasoning = getattr(result.output.output_info, "reasoning", result.output.output_info)
+        logger.info(
+            f"Input guardrail {result.guardrail.get_name()} rejected message for conversation "
+            f"{conversation_id}: {reasoning}"
+        )
+
+    def check_turn_admission(self, conversation_id: str) -> None:
+        """
+        Fail fast if a new turn for the conversation would be rejected by the scheduler
+
+        Args:
+            conversation_id: Conversation ID
+
+        Raises:
+            TurnRejectedError: If the turn queue is full or the conversation has too many turns waiting
+        """
+        self.turn_scheduler.check_admission(conversation_id)
+
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """
+        Get the turn scheduler's load and wait time metrics
+
+        Returns:
+            Dict with running and queued turns, rejections and queue wait times
+        """
+        return self.turn_scheduler.snapshot()
+
+    def get_routing_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the intent router's decisions and the estimated latency saved
+
+        Returns:
+            Dict with routed and fallback turns, or None if routing is disabled
+        """
+        return self.conversation_manager.get_routing_stats()
+
+    def get_worker_usage_summary(self) -> WorkerUsageSummaryResponse:
+        """
+        Get token usage totals of the turns handled by this worker since it started
+
+        Returns:
+            WorkerUsageSummaryResponse with totals and per-agent usage
+        """
+        return usage_ledger.summary()
+
     def get_conversation_history(self, conversation_id: str) -> list:
         """
         Get conversation history for a specific conversation
@@ -285,6 +432,20 @@ Always be welcoming and helpful in your responses."""
         """
         self.conversation_manager.clear_history(conversation_id)
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get the conversation state cache counters
+
+        Returns:
+            Dict with hits, misses, evictions and rehydrations, plus context window
+            totals and first-turn response cache counters
+        """
+        return {
+            **self.conversation_manager.get_cache_stats(),
+            "context": self.conversation_manager.get_context_stats(),
+            "responses": self.conversation_manager.get_response_cache_stats(),
+        }
+
     def get_active_conversations(self) -> list:
         """
         Get list of active conversation IDs
@@ -0,0 +1,61 @@
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+if fcntl is None:
+    logger.warning("fcntl is unavailable; storage file locks only protect a single process")
+
+
+class FileLock:
+    """Exclusive advisory lock on a lock file, shared by threads and processes
+
+    Threads within a process are serialized by a re-entrant thread lock and
+    processes by flock() on the lock file, so storage files can be safely
+    read-modify-written by several uvicorn workers at once.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the lock
+
+        Args:
+            path: Path of the lock file, created on first use
+        """
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_EX)
+            self._depth += 1
+        except Exception:
+            if self._fd is not None and self._depth == 0:
+                os.close(self._fd)
+                self._fd = None
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._depth -= 1
+            if self._depth == 0:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self._thread_lock.release()
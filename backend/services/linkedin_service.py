@@ -1,7 +1,10 @@
 import httpx
 import logging
+import time
 from typing import Dict, Any
 
+from .metrics import APIFY_SCRAPE_SECONDS
+
 logger = logging.getLogger(__name__)
 
 class LinkedInService:
@@ -36,12 +39,21 @@ class LinkedInService:
             
             # Make request to Apify API
             async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    self.apify_url,
-                    params={"token": self.apify_token, "method": "POST"},
-                    headers={"Content-Type": "application/json"},
-                    json=request_data
-                )
+                scrape_start = time.perf_counter()
+                outcome = "error"
+                try:
+                    response = await client.post(
+                        self.apify_url,
+                        params={"token": self.apify_token, "method": "POST"},
+                        headers={"Content-Type": "application/json"},
+                        json=request_data
+                    )
+                    outcome = str(response.status_code)
+                except httpx.TimeoutException:
+                    outcome = "timeout"
+                    raise
+                finally:
+                    APIFY_SCRAPE_SECONDS.observe(time.perf_counter() - scrape_start, outcome=outcome)
                 
                 logger.info(f"Apify API response status: {response.status_code}")
                 
@@ -0,0 +1,296 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Latency buckets in seconds, from fast storage reads up to long agent runs
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format label pairs as {name="value",...}, or an empty string without labels"""
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Base class for a metric family with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        """Get the label values in labelnames order"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        """Render the metric family in the Prometheus text format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increase the count for a label set"""
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(Metric):
+    """Observation counts per bucket, plus their sum and count, per label set"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (non-cumulative, last is +Inf), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for a label set"""
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the with block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._series.items())
+        lines = []
+        label_names = self.labelnames + ("le",)
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(label_names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together for scraping"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create and register a counter"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Returns:
+            The /metrics response body
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the metrics recorded across the backend
+metrics_registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route, until the last byte of the response is sent",
+    ("method", "route", "status"),
+)
+CHAT_TURN_STAGE_SECONDS = metrics_registry.histogram(
+    "chat_turn_stage_duration_seconds",
+    "Time spent in each stage of a chat turn (queue_wait, agent, total, first_token, total_stream)",
+    ("stage",),
+)
+CHAT_STORAGE_SECONDS = metrics_registry.histogram(
+    "chat_storage_operation_duration_seconds",
+    "Chat storage call latency by operation, including the wait for a free I/O thread",
+    ("operation",),
+)
+CHAT_STORAGE_FLUSH_SECONDS = metrics_registry.histogram(
+    "chat_storage_flush_duration_seconds",
+    "Duration of group-commit flushes of message writes",
+)
+AGENT_RUN_SECONDS = metrics_registry.histogram(
+    "agent_run_duration_seconds",
+    "Time each agent spent handling a turn, from its agent span",
+    ("agent",),
+)
+AGENT_LLM_SECONDS = metrics_registry.histogram(
+    "agent_llm_response_duration_seconds",
+    "Model response latency by agent",
+    ("agent",),
+)
+AGENT_TOOL_SECONDS = metrics_registry.histogram(
+    "agent_tool_call_duration_seconds",
+    "Function tool call duration by agent and tool, excluding MCP tools",
+    ("agent", "tool"),
+)
+AGENT_MCP_CALL_SECONDS = metrics_registry.histogram(
+    "agent_mcp_call_duration_seconds",
+    "MCP tool call duration by server and tool",
+    ("server", "tool"),
+)
+AGENT_MCP_LIST_TOOLS_SECONDS = metrics_registry.histogram(
+    "agent_mcp_list_tools_duration_seconds",
+    "Duration of listing an MCP server's tools",
+    ("server",),
+)
+AGENT_GUARDRAIL_SECONDS = metrics_registry.histogram(
+    "agent_guardrail_duration_seconds",
+    "Input guardrail check duration by guardrail and whether it tripped",
+    ("guardrail", "triggered"),
+)
+AGENT_HANDOFFS = metrics_registry.counter(
+    "agent_handoffs_total",
+    "Handoffs between agents",
+    ("from_agent", "to_agent"),
+)
+AGENT_TOKENS = metrics_registry.counter(
+    "agent_tokens_total",
+    "Tokens spent by agent and kind (input excluding cached, cached_input, output)",
+    ("agent", "kind"),
+)
+AGENT_SPAN_ERRORS = metrics_registry.counter(
+    "agent_span_errors_total",
+    "Agent, tool and MCP spans that ended with an error, by span type",
+    ("type",),
+)
+APIFY_SCRAPE_SECONDS = metrics_registry.histogram(
+    "apify_scrape_duration_seconds",
+    "Apify LinkedIn scrape request duration by outcome (HTTP status or error)",
+    ("outcome",),
+)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware observing HTTP_REQUEST_SECONDS for every request
+
+    Requests are labelled with the matched route template (e.g.
+    /chat/{conversation_id}) rather than the raw path, so the number of
+    series stays bounded. Streaming responses are timed until their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = "500"
+        recorded = False
+
+        def record() -> None:
+            nonlocal recorded
+            if recorded:
+                return
+            recorded = True
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                record()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Also covers requests that failed or disconnected before the last chunk
+            record()
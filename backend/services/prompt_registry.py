@@ -0,0 +1,310 @@
+import json
+import os
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from agenda import AgendaSection, AgendaSnapshot, SectionRetriever, format_sections, load_snapshot
+from memory.response_cache import context_fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INSTRUCTIONS = """You are an AI assistant for VivaTech 2025.
+You provide clear, friendly, and accurate general information about the event.
+You can answer questions about dates, location, themes, stages, award ceremonies, main topics, networking events,
+and highlight special features such as women in tech, sustainability, AI, and startups.
+Guide users to relevant areas of the program and help them get the most out of their VivaTech experience.
+Always be welcoming and helpful in your responses."""
+
+# Heading of the agenda sections appended to the instructions
+PROGRAM_HEADING = "VivaTech Program (sections relevant to the user's message)"
+
+# (mtime_ns, size) of a file, or None if it does not exist
+FileSignature = Optional[Tuple[int, int]]
+
+
+def format_user_info(user_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Format a stored user profile for the agent instructions
+
+    Args:
+        user_data: Profile as saved in user.json
+
+    Returns:
+        One "Field: value" line per known field, or None if the profile has no usable fields
+    """
+    # Check if user_data is empty or doesn't have essential fields
+    if not user_data or not user_data.get("firstName"):
+        return None
+
+    # Extract relevant fields for the AI assistant
+    user_info_parts = []
+
+    # Basic info
+    if user_data.get("firstName") and user_data.get("lastName"):
+        user_info_parts.append(f"Name: {user_data['firstName']} {user_data['lastName']}")
+
+    # Professional info
+    if user_data.get("headline"):
+        user_info_parts.append(f"Professional headline: {user_data['headline']}")
+
+    if user_data.get("jobTitle") and user_data.get("companyName"):
+        user_info_parts.append(f"Current position: {user_data['jobTitle']} at {user_data['companyName']}")
+
+    # Contact info
+    if user_data.get("email"):
+        user_info_parts.append(f"Email: {user_data['email']}")
+
+    # Location
+    if user_data.get("addressWithCountry"):
+        user_info_parts.append(f"Location: {user_data['addressWithCountry']}")
+
+    # About section
+    if user_data.get("about"):
+        user_info_parts.append(f"About: {user_data['about']}")
+
+    # LinkedIn profile
+    if user_data.get("linkedinUrl"):
+        user_info_parts.append(f"LinkedIn: {user_data['linkedinUrl']}")
+
+    # Recent experience (just the current one)
+    experiences = user_data.get("experiences", [])
+    if experiences:
+        current_exp = experiences[0]  # First one is usually current
+        if current_exp.get("title") and current_exp.get("subtitle"):
+            duration = current_exp.get("caption", "")
+            user_info_parts.append(
+                f"Current role: {current_exp['title']} at {current_exp['subtitle']} ({duration})"
+            )
+
+    return "\n".join(user_info_parts) if user_info_parts else None
+
+
+class PromptRegistry:
+    """Assembles the main agent's instructions from cached fragments
+
+    The base instructions, the formatted user profile and the agenda are
+    read once and kept in memory. Each lookup only compares the files'
+    modification times with the cached ones, so edits to instructions.txt or
+    the agenda and profile updates (from this or another worker process)
+    take effect on the next turn without a restart. invalidate_user_info()
+    drops the profile immediately.
+
+    Instead of the whole agenda, each turn's instructions include only the
+    top_k agenda sections (stage blocks of a day) that a BM25 ranker finds
+    most relevant to the user's message.
+    """
+
+    def __init__(
+        self,
+        instructions_file: str = "instructions.txt",
+        user_file: str = "user.json",
+        agenda_file: str = os.path.join("data", "vivatech_agenda.md"),
+        top_k: Optional[int] = 3,
+    ):
+        """
+        Initialize the prompt registry
+
+        Args:
+            instructions_file: Base instructions, relative to the backend directory
+            user_file: Stored user profile
+            agenda_file: Agenda markdown whose sections are retrieved per turn
+            top_k: Agenda sections included per turn (None includes the whole agenda)
+        """
+        base_dir = os.path.dirname(os.path.dirname(__file__))
+        self.instructions_path = os.path.join(base_dir, instructions_file)
+        self.user_path = os.path.join(base_dir, user_file)
+        self.agenda_path = os.path.join(base_dir, agenda_file)
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._instructions: Optional[str] = None
+        self._instructions_signature: FileSignature = None
+        self._user_info: Optional[str] = None
+        self._user_signature: FileSignature = None
+        self._user_loaded = False
+        self._agenda_hash = ""
+        self._agenda_signature: FileSignature = None
+        self._agenda_loaded = False
+        self._retriever: Optional[SectionRetriever] = None
+        self._overview: Optional[str] = None
+        self._prompt: Optional[str] = None
+        self._fingerprint: Optional[str] = None
+        self.reloads = 0
+
+    @staticmethod
+    def _file_signature(path: str) -> FileSignature:
+        """Get the modification time and size of a file"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load_instructions(self) -> str:
+        """Load instructions from the instructions.txt file"""
+        try:
+            if os.path.exists(self.instructions_path):
+                with open(self.instructions_path, "r", encoding="utf-8") as f:
+                    instructions = f.read().strip()
+                logger.info(
+                    f"Loaded instructions from {self.instructions_path} ({len(instructions)} characters)"
+                )
+                return instructions
+            else:
+                logger.warning(
+                    f"Instructions file not found at {self.instructions_path}, using default instructions"
+                )
+                return DEFAULT_INSTRUCTIONS
+
+        except Exception as e:
+            logger.error(f"Error loading instructions from file: {e}")
+            return DEFAULT_INSTRUCTIONS
+
+    def _load_user_info(self) -> Optional[str]:
+        """Load user information from user.json file and format for instructions"""
+        try:
+            if not os.path.exists(self.user_path):
+                logger.info("No user.json file found - proceeding without user info")
+                return None
+
+            with open(self.user_path, "r", encoding="utf-8") as f:
+                user_data = json.load(f)
+
+            user_info = format_user_info(user_data)
+            if user_info:
+                logger.info(f"Loaded user info with {len(user_info.splitlines())} fields")
+            else:
+                logger.info("user.json has no usable profile fields - proceeding without user info")
+            return user_info
+
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing user.json: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Error loading user info: {e}")
+            return None
+
+    def _load_agenda(self) -> Optional[AgendaSnapshot]:
+        """Load the compiled agenda snapshot, or None if the agenda file is missing"""
+        try:
+            return load_snapshot(self.agenda_path)
+        except FileNotFoundError:
+            logger.warning(f"Agenda file not found at {self.agenda_path}, instructions will not include the program")
+            return None
+        except Exception as e:
+            logger.error(f"Error loading agenda from file: {e}")
+            return None
+
+    @staticmethod
+    def _format_overview(sections: List[AgendaSection]) -> Optional[str]:
+        """List the stages of each day, so the agent knows the whole program's outline"""
+        stages_by_day: Dict[str, List[str]] = {}
+        for section in sections:
+            stages_by_day.setdefault(section.day, []).append(section.stage)
+        if not stages_by_day:
+            return None
+        days = "\n".join(f"- {day}: {', '.join(stages)}" for day, stages in stages_by_day.items())
+        return f"Program stages by day:\n{days}"
+
+    def _refresh(self) -> None:
+        """Reload the fragments whose files changed and reassemble the prompt if needed"""
+        instructions_signature = self._file_signature(self.instructions_path)
+        user_signature = self._file_signature(self.user_path)
+        agenda_signature = self._file_signature(self.agenda_path)
+        if (
+            self._prompt is not None
+            and self._user_loaded
+            and self._agenda_loaded
+            and instructions_signature == self._instructions_signature
+            and user_signature == self._user_signature
+            and agenda_signature == self._agenda_signature
+        ):
+            return
+
+        with self._lock:
+            changed = False
+            if self._instructions is None or instructions_signature != self._instructions_signature:
+                self._instructions = self._load_instructions()
+                self._instructions_signature = instructions_signature
+                changed = True
+            if not self._user_loaded or user_signature != self._user_signature:
+                self._user_info = self._load_user_info()
+                self._user_signature = user_signature
+                self._user_loaded = True
+                changed = True
+            if not self._agenda_loaded or agenda_signature != self._agenda_signature:
+                snapshot = self._load_agenda()
+                self._agenda_hash = snapshot.source_hash if snapshot is not None else ""
+                self._retriever = snapshot.retriever if snapshot is not None else SectionRetriever([])
+                self._overview = self._format_overview(self._retriever.sections)
+                self._agenda_signature = agenda_signature
+                self._agenda_loaded = True
+                changed = True
+            if changed or self._prompt is None:
+                prompt = self._instructions
+                if self._overview:
+                    prompt += f"\n\n{self._overview}"
+                if self._user_info:
+                    prompt += f"\n\nUser info:\n{self._user_info}"
+                # Retrieved sections depend only on the message and the agenda, so both files key the answers
+                self._fingerprint = context_fingerprint(f"{prompt}\n\n{self.top_k}\n{self._agenda_hash}")
+                self._prompt = prompt
+                self.reloads += 1
+
+    def select_sections(self, query: Optional[str]) -> List[AgendaSection]:
+        """
+        Get the agenda sections to include for a user message
+
+        Args:
+            query: The user message, or None when it is unknown
+
+        Returns:
+            The top_k most relevant sections, or every section when top_k is None or the message is unknown
+        """
+        self._refresh()
+        retriever = self._retriever
+        if retriever is None:
+            return []
+        if self.top_k is None or query is None:
+            return retriever.sections
+        return retriever.retrieve(query, self.top_k)
+
+    def get_instructions(self, query: Optional[str] = None) -> str:
+        """
+        Get the assembled instructions: the base instructions, the user profile
+        and the agenda sections relevant to the user message
+
+        Args:
+            query: The user message of the turn (None includes the whole agenda)
+
+        Returns:
+            The instructions for the main agent
+        """
+        sections = self.select_sections(query)
+        if not sections:
+            return self._prompt
+        return f"{self._prompt}\n\n{PROGRAM_HEADING}\n\n{format_sections(sections)}"
+
+    def fingerprint(self) -> str:
+        """
+        Get a hash of the current instructions, for keying cached answers
+
+        Returns:
+            Hex digest of the assembled instructions
+        """
+        self._refresh()
+        return self._fingerprint
+
+    def has_user_info(self) -> bool:
+        """Check whether the instructions include a user profile"""
+        self._refresh()
+        return self._user_info is not None
+
+    def dynamic_instructions(self, run_context: Any, agent: Any) -> str:
+        """Instructions callable for Agent.instructions, resolved on every run for the turn's message"""
+        return self.get_instructions(getattr(run_context.context, "prompt", None))
+
+    def invalidate_user_info(self) -> None:
+        """Drop the cached user profile so the next lookup reloads it"""
+        with self._lock:
+            self._user_loaded = False
@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+from agents.tracing import TracingProcessor
+from agents.tracing.span_data import (
+    AgentSpanData, FunctionSpanData, GuardrailSpanData, HandoffSpanData, MCPListToolsSpanData, ResponseSpanData
+)
+
+from .metrics import (
+    AGENT_GUARDRAIL_SECONDS, AGENT_HANDOFFS, AGENT_LLM_SECONDS, AGENT_MCP_CALL_SECONDS,
+    AGENT_MCP_LIST_TOOLS_SECONDS, AGENT_RUN_SECONDS, AGENT_SPAN_ERRORS, AGENT_TOOL_SECONDS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsTracingProcessor(TracingProcessor):
+    """Turns agent SDK tracing spans into latency histograms
+
+    Registered next to the default exporter, it times agent, model response,
+    function tool, MCP, guardrail and handoff spans as they start and end. Tool and model
+    spans are attributed to the agent whose span is their parent.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # span_id -> (start time, agent name of the span or its parent)
+        self._open_spans: Dict[str, Tuple[float, str]] = {}
+
+    def on_trace_start(self, trace: Any) -> None:
+        pass
+
+    def on_trace_end(self, trace: Any) -> None:
+        pass
+
+    def on_span_start(self, span: Any) -> None:
+        with self._lock:
+            if isinstance(span.span_data, AgentSpanData):
+                agent = span.span_data.name
+            else:
+                parent = self._open_spans.get(span.parent_id)
+                agent = parent[1] if parent is not None else "unknown"
+            self._open_spans[span.span_id] = (time.perf_counter(), agent)
+
+    def on_span_end(self, span: Any) -> None:
+        with self._lock:
+            opened = self._open_spans.pop(span.span_id, None)
+        if opened is None:
+            return
+        started, agent = opened
+        duration = time.perf_counter() - started
+        data = span.span_data
+        try:
+            if isinstance(data, AgentSpanData):
+                AGENT_RUN_SECONDS.observe(duration, agent=agent)
+            elif isinstance(data, ResponseSpanData):
+                AGENT_LLM_SECONDS.observe(duration, agent=agent)
+            elif isinstance(data, FunctionSpanData):
+                if data.mcp_data:
+                    AGENT_MCP_CALL_SECONDS.observe(duration, server=str(data.mcp_data.get("server")), tool=data.name)
+                else:
+                    AGENT_TOOL_SECONDS.observe(duration, agent=agent, tool=data.name)
+            elif isinstance(data, MCPListToolsSpanData):
+                AGENT_MCP_LIST_TOOLS_SECONDS.observe(duration, server=str(data.server))
+            elif isinstance(data, GuardrailSpanData):
+                AGENT_GUARDRAIL_SECONDS.observe(duration, guardrail=data.name, triggered=str(data.triggered).lower())
+            elif isinstance(data, HandoffSpanData):
+                AGENT_HANDOFFS.inc(from_agent=str(data.from_agent), to_agent=str(data.to_agent))
+            if span.error:
+                AGENT_SPAN_ERRORS.inc(type=data.type)
+        except Exception as e:
+            # Span processors must never raise into the agent run
+            logger.error(f"Failed to record span metrics: {e}")
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
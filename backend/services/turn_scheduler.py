@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict
+
+logger = logging.getLogger(__name__)
+
+# Number of recent queue waits kept for the wait time percentiles
+WAIT_SAMPLE_SIZE = 1000
+# Bounds of the Retry-After hint, in seconds
+MIN_RETRY_AFTER_SECONDS = 1
+MAX_RETRY_AFTER_SECONDS = 60
+
+
+class TurnRejectedError(Exception):
+    """Raised when an agent turn is not admitted because the scheduler is saturated"""
+
+    def __init__(self, reason: str, status_code: int, retry_after: int):
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(f"Agent turn rejected ({reason}), retry after {retry_after}s")
+
+
+class TurnSchedulerMetrics:
+    """Admission, queue depth and wait time counters for the turn scheduler"""
+
+    def __init__(self):
+        self.admitted = 0
+        self.completed = 0
+        self.rejected: Dict[str, int] = {}
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    def record_wait(self, duration: float) -> None:
+        """Record how long an admitted turn waited in the queue"""
+        self.admitted += 1
+        self.total_wait_seconds += duration
+        self._waits.append(duration)
+
+    def record_run(self, duration: float) -> None:
+        """Record how long an admitted turn ran"""
+        self.completed += 1
+        self.total_run_seconds += duration
+
+    def record_rejection(self, reason: str) -> None:
+        """Record a rejected turn"""
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    @property
+    def avg_run_seconds(self) -> float:
+        return self.total_run_seconds / self.completed if self.completed else 0.0
+
+    def _wait_percentile(self, percentile: float) -> float:
+        if not self._waits:
+            return 0.0
+        waits = sorted(self._waits)
+        return waits[min(len(waits) - 1, int(percentile * len(waits)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current metrics as a plain dict"""
+        return {
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "rejected": dict(self.rejected),
+            "max_queue_depth": self.max_queue_depth,
+            "avg_wait_ms": 1000 * self.total_wait_seconds / self.admitted if self.admitted else 0.0,
+            "p95_wait_ms": 1000 * self._wait_percentile(0.95),
+            "max_wait_ms": 1000 * max(self._waits, default=0.0),
+            "avg_run_ms": 1000 * self.avg_run_seconds,
+        }
+
+
+class TurnScheduler:
+    """Admission control for agent runs
+
+    Turns of the same conversation run one at a time, in arrival order, so
+    each turn sees the state left by the previous one. Turns of different
+    conversations run in parallel, up to max_concurrent at once. Turns
+    waiting for either are queued; when max_queued are already waiting, or a
+    conversation already has max_queued_per_conversation turns waiting, new
+    turns are rejected immediately instead of piling up behind the LLM.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        max_queued: int = 32,
+        max_queued_per_conversation: int = 2,
+        queue_timeout_seconds: float = 30.0
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_concurrent: Maximum number of agent runs at once
+            max_queued: Maximum number of turns waiting to run
+            max_queued_per_conversation: Maximum number of turns of one conversation waiting to run
+            queue_timeout_seconds: Give up on a queued turn after waiting this long (0 waits indefinitely)
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.max_queued_per_conversation = max(0, max_queued_per_conversation)
+        self.queue_timeout = queue_timeout_seconds
+        self.metrics = TurnSchedulerMetrics()
+        self._slots = None
+        self._conversation_locks: Dict[str, asyncio.Lock] = {}
+        # Turns per conversation that are waiting or running, to drop idle locks
+        self._conversation_turns: Dict[str, int] = {}
+        self._conversation_waiting: Dict[str, int] = {}
+        self._waiting = 0
+        self._running = 0
+
+    def _retry_after(self, queued: int) -> int:
+        """Estimate when a rejected turn could be admitted, from the average run time"""
+        estimate = math.ceil(self.metrics.avg_run_seconds * (queued + 1) / self.max_concurrent)
+        return min(MAX_RETRY_AFTER_SECONDS, max(MIN_RETRY_AFTER_SECONDS, estimate))
+
+    def _reject(self, reason: str, status_code: int, queued: int) -> TurnRejectedError:
+        self.metrics.record_rejection(reason)
+        error = TurnRejectedError(reason, status_code, self._retry_after(queued))
+        logger.warning(f"{error} (running {self._running}, queued {self._waiting})")
+        return error
+
+    def check_admission(self, conversation_id: str) -> None:
+        """
+        Reject a turn right away if it would not be queued
+
+        Lets callers fail fast before doing any work for a turn; slot() checks again.
+
+        Raises:
+            TurnRejectedError: 503 if the queue is full, 429 if the conversation has too many turns waiting
+        """
+        conversation_waiting = self._conversation_waiting.get(conversation_id, 0)
+        conversation_busy = conversation_id in self._conversation_turns
+        if conversation_busy and conversation_waiting >= self.max_queued_per_conversation:
+            raise self._reject("conversation_busy", 429, conversation_waiting)
+        would_wait = conversation_busy or self._waiting > 0 or self._running >= self.max_concurrent
+        if would_wait and self._waiting >= self.max_queued:
+            raise self._reject("queue_full", 503, self._waiting)
+
+    @asynccontextmanager
+    async def slot(self, conversation_id: str) -> AsyncIterator[None]:
+        """
+        Wait for the conversation's turn and a free run slot, then hold both
+
+        Raises:
+            TurnRejectedError: If the turn is not admitted to the queue, or
+                waited longer than the queue timeout (503)
+        """
+        self.check_admission(conversation_id)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        lock = self._conversation_locks.setdefault(conversation_id, asyncio.Lock())
+        self._conversation_turns[conversation_id] = self._conversation_turns.get(conversation_id, 0) + 1
+        self._conversation_waiting[conversation_id] = self._conversation_waiting.get(conversation_id, 0) + 1
+        self._waiting += 1
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, self._waiting)
+        wait_start = time.perf_counter()
+        holds_lock = holds_slot = False
+        try:
+            try:
+                # The conversation lock is taken first so that queued turns of a
+                # busy conversation do not hold run slots other conversations could use
+                await asyncio.wait_for(self._acquire(lock), timeout=self.queue_timeout or None)
+                holds_lock = holds_slot = True
+            except asyncio.TimeoutError:
+                raise self._reject("queue_timeout", 503, self._waiting)
+            finally:
+                self._waiting -= 1
+                self._conversation_waiting[conversation_id] -= 1
+                if not self._conversation_waiting[conversation_id]:
+                    del self._conversation_waiting[conversation_id]
+
+            self.metrics.record_wait(time.perf_counter() - wait_start)
+            self._running += 1
+            run_start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self._running -= 1
+                self.metrics.record_run(time.perf_counter() - run_start)
+        finally:
+            if holds_slot:
+                self._slots.release()
+            if holds_lock:
+                lock.release()
+            self._conversation_turns[conversation_id] -= 1
+            if not self._conversation_turns[conversation_id]:
+                del self._conversation_turns[conversation_id]
+                self._conversation_locks.pop(conversation_id, None)
+
+    async def _acquire(self, lock: asyncio.Lock) -> None:
+        """Acquire the conversation lock, then a run slot, releasing the lock if cancelled meanwhile"""
+        await lock.acquire()
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            lock.release()
+            raise
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the scheduler's current load and metrics
+
+        Returns:
+            Dict with running, queued and active_conversations plus the metrics counters
+        """
+        return {
+            "running": self._running,
+            "queued": self._waiting,
+            "active_conversations": len(self._conversation_turns),
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            **self.metrics.snapshot(),
+        }
@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from models import (
+    ConversationUsageResponse, TokenUsage, TurnUsage, UsageSummaryResponse, WorkerUsageSummaryResponse
+)
+from .metrics import AGENT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+
+class UsageAccumulator:
+    """Sums turn usages the same way for a conversation, the whole store or a worker"""
+
+    def __init__(self):
+        """Initialize empty totals"""
+        self.turns = 0
+        self.cached_turns = 0
+        self.total = TokenUsage()
+        self.agents: Dict[str, TokenUsage] = {}
+
+    def add(self, usage: TurnUsage) -> None:
+        """Add one turn's usage"""
+        self.turns += 1
+        self.cached_turns += int(usage.requests == 0)
+        self.total.add(usage)
+        for agent, agent_usage in usage.agents.items():
+            self.agents.setdefault(agent, TokenUsage()).add(agent_usage)
+
+    def totals(self) -> Dict[str, Any]:
+        """Get copies of the totals with per-turn averages, as UsageTotals fields"""
+        turns = self.turns
+        return {
+            "turns": turns,
+            "cached_turns": self.cached_turns,
+            "usage": self.total.model_copy(),
+            "agents": {agent: usage.model_copy() for agent, usage in self.agents.items()},
+            "avg_input_tokens_per_turn": self.total.input_tokens / turns if turns else 0.0,
+            "avg_output_tokens_per_turn": self.total.output_tokens / turns if turns else 0.0,
+        }
+
+
+def recorded_usages(records: Iterable[Dict]) -> Iterator[Tuple[Dict, TurnUsage]]:
+    """Yield the message records or export rows that carry a turn's usage, with the parsed usage"""
+    for record in records:
+        if record.get("type", "message") != "message" or not record.get("usage"):
+            continue
+        yield record, TurnUsage(**record["usage"])
+
+
+def summarize_conversation_usage(conversation_id: str, records: Iterable[Dict]) -> ConversationUsageResponse:
+    """
+    Sum the usage recorded on a conversation's assistant messages
+
+    Args:
+        conversation_id: Conversation ID
+        records: Stored message records or export rows of the conversation
+
+    Returns:
+        ConversationUsageResponse with the totals and each agent's share
+    """
+    accumulator = UsageAccumulator()
+    for _, usage in recorded_usages(records):
+        accumulator.add(usage)
+    return ConversationUsageResponse(
+        conversation_id=conversation_id,
+        turns=accumulator.turns,
+        usage=accumulator.total,
+        agents=accumulator.agents,
+    )
+
+
+def summarize_usage(rows: Iterable[Dict]) -> UsageSummaryResponse:
+    """
+    Sum the usage recorded on the assistant messages of every conversation
+
+    Args:
+        rows: Export rows of the whole store
+
+    Returns:
+        UsageSummaryResponse with the totals, each agent's share and per-turn averages
+    """
+    accumulator = UsageAccumulator()
+    conversations = set()
+    since = None
+    for row, usage in recorded_usages(rows):
+        accumulator.add(usage)
+        conversations.add(row["conversation_id"])
+        timestamp = str(row["timestamp"])
+        if since is None or timestamp < since:
+            since = timestamp
+    return UsageSummaryResponse(conversations=len(conversations), since=since, **accumulator.totals())
+
+
+class UsageLedger:
+    """Running token usage totals of the turns handled by this worker process
+
+    The totals start empty whenever the process starts and do not include
+    turns handled by other workers; the stored usage summed by
+    summarize_usage is the global view.
+    """
+
+    def __init__(self):
+        """Initialize an empty ledger"""
+        self.since = datetime.utcnow()
+        self._lock = threading.Lock()
+        self._totals = UsageAccumulator()
+
+    def record(self, conversation_id: str, usage: Optional[Dict[str, Any]]) -> None:
+        """
+        Add a turn's usage to the totals
+
+        Args:
+            conversation_id: Conversation the turn belongs to
+            usage: The turn's usage as returned by ConversationManager.get_turn_usage
+        """
+        if not usage:
+            return
+        try:
+            turn_usage = TurnUsage(**usage)
+            with self._lock:
+                self._totals.add(turn_usage)
+            for agent, agent_usage in turn_usage.agents.items():
+                AGENT_TOKENS.inc(agent_usage.input_tokens - agent_usage.cached_input_tokens, agent=agent, kind="input")
+                AGENT_TOKENS.inc(agent_usage.cached_input_tokens, agent=agent, kind="cached_input")
+                AGENT_TOKENS.inc(agent_usage.output_tokens, agent=agent, kind="output")
+            logger.info(
+                f"Turn usage for conversation {conversation_id}: {turn_usage.input_tokens} input "
+                f"({turn_usage.cached_input_tokens} cached), {turn_usage.output_tokens} output tokens "
+                f"in {turn_usage.requests} requests"
+            )
+        except Exception as e:
+            # Accounting must never fail a turn
+            logger.error(f"Failed to record usage for conversation {conversation_id}: {e}")
+
+    def summary(self) -> WorkerUsageSummaryResponse:
+        """
+        Get the totals since this process started
+
+        Returns:
+            WorkerUsageSummaryResponse with totals, per-agent usage and per-turn averages
+        """
+        with self._lock:
+            totals = self._totals.totals()
+        return WorkerUsageSummaryResponse(worker_pid=os.getpid(), since=self.since, **totals)
+
+
+# Global ledger instance
+usage_ledger = UsageLedger()
@@ -1,9 +1,11 @@
 import json
 import os
 import logging
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime
 
+from .file_lock import FileLock
+
 logger = logging.getLogger(__name__)
 
 class UserStorageService:
@@ -13,8 +15,24 @@ class UserStorageService:
         """Initialize the user storage service"""
         self.storage_file = storage_file
         self.storage_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), storage_file)
+        # Serializes writes across I/O threads and worker processes
+        self._file_lock = FileLock(f"{self.storage_path}.lock")
+        # Callbacks run after every write, e.g. to drop cached prompts built from the profile
+        self._listeners: List[Callable[[], None]] = []
         self._ensure_storage_file()
     
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """Register a callback to run after the stored profile changes"""
+        self._listeners.append(callback)
+    
+    def _notify_listeners(self) -> None:
+        """Run the change callbacks, logging failures so they never fail a write"""
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"User storage listener failed: {e}")
+    
     def _ensure_storage_file(self) -> None:
         """Ensure the storage file exists with proper structure"""
         if not os.path.exists(self.storage_path):
@@ -39,9 +57,14 @@ class UserStorageService:
     def _save_data(self, data: Dict) -> None:
         """Save data to storage file"""
         try:
-            with open(self.storage_path, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            # Write to a temporary file and swap it in so readers never see a partial file
+            temp_path = f"{self.storage_path}.tmp"
+            with self._file_lock:
+                with open(temp_path, 'w') as f:
+                    json.dump(data, f, indent=2, default=str)
+                os.replace(temp_path, self.storage_path)
             logger.debug("User data saved successfully")
+            self._notify_listeners()
         except Exception as e:
             logger.error(f"Failed to save user storage file: {e}")
             raise
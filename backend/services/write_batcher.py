@@ -0,0 +1,204 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from models import ChatMessage
+from .chat_storage import MessageWrite
+from .metrics import CHAT_STORAGE_FLUSH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PendingWrite = Tuple[MessageWrite, asyncio.Future]
+
+
+class GroupCommitMetrics:
+    """Batch size and flush latency counters for the group-commit writer"""
+
+    def __init__(self):
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.writes = 0
+        self.messages = 0
+        self.max_batch_writes = 0
+        self.max_batch_messages = 0
+        self.total_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+
+    def record(self, writes: int, messages: int, duration: float, failed: bool = False) -> None:
+        """Record one flush of queued writes, holding messages in total, that took duration seconds"""
+        self.flushes += 1
+        self.failed_flushes += int(failed)
+        self.writes += writes
+        self.messages += messages
+        self.max_batch_writes = max(self.max_batch_writes, writes)
+        self.max_batch_messages = max(self.max_batch_messages, messages)
+        self.total_flush_seconds += duration
+        self.max_flush_seconds = max(self.max_flush_seconds, duration)
+        self.last_flush_seconds = duration
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the current metrics as a plain dict"""
+        return {
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "writes": self.writes,
+            "messages": self.messages,
+            "avg_batch_writes": self.writes / self.flushes if self.flushes else 0.0,
+            "avg_batch_messages": self.messages / self.flushes if self.flushes else 0.0,
+            "max_batch_writes": self.max_batch_writes,
+            "max_batch_messages": self.max_batch_messages,
+            "avg_flush_latency_ms": 1000 * self.total_flush_seconds / self.flushes if self.flushes else 0.0,
+            "max_flush_latency_ms": 1000 * self.max_flush_seconds,
+            "last_flush_latency_ms": 1000 * self.last_flush_seconds,
+        }
+
+
+class GroupCommitWriter:
+    """Write-behind queue that coalesces message writes into group commits
+
+    Callers await save_message or save_turn, which only return once the
+    messages have been persisted. Pending writes from all concurrent requests are flushed
+    together through the storage's save_messages, either when the flush
+    interval elapses or as soon as max_batch_size writes are queued. Writes
+    that arrive while a flush is running are picked up by the next one.
+    """
+
+    def __init__(
+        self,
+        storage,
+        flush_interval_ms: float = 5.0,
+        max_batch_size: int = 64,
+        executor: Optional[Executor] = None
+    ):
+        """
+        Initialize the writer
+
+        Args:
+            storage: Chat storage service exposing save_messages
+            flush_interval_ms: How long to wait for more writes before flushing
+            max_batch_size: Maximum number of writes per flush (a turn's messages are one write)
+            executor: Thread pool that runs the flushes (None uses the event loop's default)
+        """
+        self.storage = storage
+        self._executor = executor
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.metrics = GroupCommitMetrics()
+        self._pending: List[PendingWrite] = []
+        self._has_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._flusher = None
+        self._current_flush = None
+
+    def _ensure_flusher(self) -> None:
+        """Start the background flush task if it is not running"""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._run())
+
+    async def save_message(
+        self,
+        conversation_id: str,
+        message: ChatMessage,
+        expected_version: Optional[int] = None
+    ) -> None:
+        """
+        Queue a message and wait until it has been durably written
+
+        Raises:
+            ConversationVersionConflictError: If expected_version is set and the
+                conversation no longer has that many messages when the batch is written
+        """
+        await self.save_turn(conversation_id, [message], expected_version)
+
+    async def save_turn(
+        self,
+        conversation_id: str,
+        messages: Sequence[ChatMessage],
+        expected_version: Optional[int] = None
+    ) -> None:
+        """
+        Queue messages to be appended together, all or none, and wait until they have been durably written
+
+        Raises:
+            ConversationVersionConflictError: If expected_version is set and the
+                conversation no longer has that many messages when the batch is written
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((MessageWrite(conversation_id, tuple(messages), expected_version), future))
+        self._has_pending.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._batch_full.set()
+        self._ensure_flusher()
+        await future
+
+    async def _run(self) -> None:
+        """Flush pending writes until cancelled"""
+        while True:
+            await self._has_pending.wait()
+            if len(self._pending) < self.max_batch_size and self.flush_interval > 0:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            # Shielded so that stopping the writer never abandons an in-flight flush
+            self._current_flush = asyncio.ensure_future(self._flush_next_batch())
+            await asyncio.shield(self._current_flush)
+
+    async def _flush_next_batch(self) -> None:
+        """Persist the oldest max_batch_size pending writes and resolve their futures"""
+        batch = self._pending[:self.max_batch_size]
+        del self._pending[:self.max_batch_size]
+        if not self._pending:
+            self._has_pending.clear()
+        if len(self._pending) < self.max_batch_size:
+            self._batch_full.clear()
+        if not batch:
+            return
+
+        message_count = sum(len(write.messages) for write, _ in batch)
+        start_time = time.perf_counter()
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                functools.partial(self.storage.save_messages, [write for write, _ in batch])
+            )
+        except Exception as e:
+            self.metrics.record(len(batch), message_count, time.perf_counter() - start_time, failed=True)
+            logger.error(f"Failed to flush {len(batch)} writes ({message_count} messages): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        duration = time.perf_counter() - start_time
+        self.metrics.record(len(batch), message_count, duration)
+        CHAT_STORAGE_FLUSH_SECONDS.observe(duration)
+        logger.debug(f"Flushed {len(batch)} writes ({message_count} messages) in {duration * 1000:.2f} ms")
+        # Version conflicts only reject their own write, not the rest of the batch
+        for (_, future), conflict in zip(batch, results):
+            if future.done():
+                continue
+            if conflict is not None:
+                future.set_exception(conflict)
+            else:
+                future.set_result(None)
+
+    async def close(self) -> None:
+        """Flush all pending writes and stop the background task"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._current_flush is not None:
+            await self._current_flush
+            self._current_flush = None
+        while self._pending:
+            await self._flush_next_batch()
+
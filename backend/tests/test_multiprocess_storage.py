@@ -0,0 +1,109 @@
+"""Concurrency tests for chat storage shared by several worker processes"""
+
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import pytest
+
+WORKERS = 4
+WRITES_PER_WORKER = 40
+SHARED_CONVERSATION = "shared"
+BACKENDS = ["json", "log", "sqlite"]
+
+# Worker processes are spawned so each one imports its own storage, like a uvicorn worker
+spawn = multiprocessing.get_context("spawn")
+
+
+def storage_env(backend: str, data_dir: str) -> Dict[str, str]:
+    """Settings that point every storage file of a backend into data_dir"""
+    return {
+        "CHAT_STORAGE_BACKEND": backend,
+        "CHAT_JSON_PATH": os.path.join(data_dir, "chats.json"),
+        "CHAT_LOG_DIR": os.path.join(data_dir, "chat_log"),
+        "CHAT_SQLITE_PATH": os.path.join(data_dir, "chats.db"),
+        "CHAT_ARCHIVE_DIR": os.path.join(data_dir, "chat_archive"),
+        "CHAT_SEARCH_PATH": os.path.join(data_dir, "chat_search.db"),
+    }
+
+
+def hammer(env: Dict[str, str], worker: int, start) -> None:
+    """Alternate writes to the shared conversation and to the worker's own conversation"""
+    os.environ.update(env)
+    from models import ChatMessage
+    from services.chat_storage import chat_storage
+
+    start.wait()
+    for i in range(WRITES_PER_WORKER):
+        chat_storage.save_message(SHARED_CONVERSATION, ChatMessage(role="user", content=f"{worker}-{i}"))
+        chat_storage.save_message(f"worker-{worker}", ChatMessage(role="user", content=f"{worker}-{i}"))
+
+
+def claim(env: Dict[str, str], worker: int, start) -> bool:
+    """Try to append the first message of a new conversation, at expected version 0"""
+    os.environ.update(env)
+    from models import ChatMessage
+    from services.chat_storage import ConversationVersionConflictError, chat_storage
+
+    start.wait()
+    try:
+        chat_storage.save_message("claimed", ChatMessage(role="user", content=str(worker)), expected_version=0)
+    except ConversationVersionConflictError:
+        return False
+    return True
+
+
+def read_contents(env: Dict[str, str], conversation_ids: List[str]) -> Dict[str, List[str]]:
+    """Read back the message contents of conversations from a fresh process"""
+    os.environ.update(env)
+    from services.chat_storage import chat_storage
+
+    contents: Dict[str, List[str]] = {conversation_id: [] for conversation_id in conversation_ids}
+    for row in chat_storage.iter_export(conversation_ids):
+        if row["type"] == "message":
+            contents[row["conversation_id"]].append(row["content"])
+    return contents
+
+
+def run_workers(target, env: Dict[str, str]) -> None:
+    """Run WORKERS processes of target, released together once they have all started"""
+    start = spawn.Barrier(WORKERS)
+    processes = [spawn.Process(target=target, args=(env, worker, start)) for worker in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+        assert process.exitcode == 0, f"worker exited with {process.exitcode}"
+
+
+def read_back(env: Dict[str, str], conversation_ids: List[str]) -> Dict[str, List[str]]:
+    with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as executor:
+        return executor.submit(read_contents, env, conversation_ids).result(timeout=120)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_concurrent_save_message_loses_no_writes(backend, tmp_path):
+    env = storage_env(backend, str(tmp_path))
+    run_workers(hammer, env)
+
+    private = [f"worker-{worker}" for worker in range(WORKERS)]
+    contents = read_back(env, [SHARED_CONVERSATION] + private)
+
+    expected = [f"{worker}-{i}" for worker in range(WORKERS) for i in range(WRITES_PER_WORKER)]
+    assert Counter(contents[SHARED_CONVERSATION]) == Counter(expected)
+    for worker, conversation_id in enumerate(private):
+        # Each worker's own writes keep the order it made them in
+        assert contents[conversation_id] == [f"{worker}-{i}" for i in range(WRITES_PER_WORKER)]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_expected_version_admits_one_writer(backend, tmp_path):
+    env = storage_env(backend, str(tmp_path))
+    with spawn.Manager() as manager, ProcessPoolExecutor(max_workers=WORKERS, mp_context=spawn) as executor:
+        start = manager.Barrier(WORKERS)
+        claimed = list(executor.map(claim, [env] * WORKERS, range(WORKERS), [start] * WORKERS))
+
+    assert claimed.count(True) == 1
+    assert len(read_back(env, ["claimed"])["claimed"]) == 1
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Train the intent router's classifier on logged turns and report routing accuracy
+
+Reads a chat export (GET /chat/export) and labels each user message with the
+agent the main agent chose for it, taken from the token usage stored on the
+reply. A held-out share of the turns is used to compare the routing rules,
+the classifier and both combined: how many turns each would dispatch
+directly (coverage) and how many of those match the main agent's choice
+(routing accuracy). The classifier is then retrained on all turns and saved
+to INTENT_ROUTER_MODEL_PATH, where the backend loads it on startup.
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from typing import Dict, List, Tuple
+
+from config import settings
+from memory.intent_router import MAIN_LABEL, IntentRouter, NaiveBayesIntentClassifier, labelled_turns
+
+
+def read_export(path: str) -> List[Dict]:
+    """Read the rows of an NDJSON chat export"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_held_out(prompt: str, test_share: float) -> bool:
+    """Deterministically assign a prompt to the test split, so repeated prompts never straddle both"""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2 ** 32 < test_share
+
+
+def evaluate(router: IntentRouter, turns: List[Tuple[str, str]]) -> Dict[str, float]:
+    """
+    Route the turns and compare with the main agent's choices
+
+    Args:
+        router: Router to evaluate
+        turns: (prompt, label) pairs
+
+    Returns:
+        Dict with coverage, routing accuracy, specialist turns missed and routing time
+    """
+    routed = correct = missed = 0
+    start = time.perf_counter()
+    for prompt, label in turns:
+        decision = router.route(prompt)
+        if decision.agent is None:
+            missed += label != MAIN_LABEL
+            continue
+        routed += 1
+        correct += decision.agent == label
+    elapsed = time.perf_counter() - start
+    specialist_turns = sum(label != MAIN_LABEL for _, label in turns)
+    return {
+        "turns": len(turns),
+        "routed": routed,
+        "coverage": routed / len(turns) if turns else 0.0,
+        "routing_accuracy": correct / routed if routed else 0.0,
+        "specialist_recall": correct / specialist_turns if specialist_turns else 0.0,
+        "missed_specialist_turns": missed,
+        "avg_route_us": elapsed / len(turns) * 1e6 if turns else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--export", required=True, help="NDJSON file saved from GET /chat/export")
+    parser.add_argument("--output", default=settings.intent_router_model_path, help="Where to save the classifier")
+    parser.add_argument("--main-agent", default="VivaTech 2025 Assistant", help="Main agent name as recorded in usage")
+    parser.add_argument("--test-share", type=float, default=0.2, help="Share of turns held out for evaluation")
+    parser.add_argument("--min-confidence", type=float, default=settings.intent_router_min_confidence,
+                        help="Minimum classifier probability to dispatch a turn")
+    parser.add_argument("--handoff-ms", type=float,
+                        help="Average time the main agent takes to hand off (avg_handoff_ms of "
+                             "GET /conversations/router/metrics), to estimate the time saved")
+    parser.add_argument("--dry-run", action="store_true", help="Only report, do not save the classifier")
+    args = parser.parse_args()
+
+    turns = list(labelled_turns(read_export(args.export), args.main_agent))
+    if not turns:
+        raise SystemExit(f"No labelled turns in {args.export}; replies need recorded usage from {args.main_agent}")
+    train = [turn for turn in turns if not is_held_out(turn[0], args.test_share)]
+    test = [turn for turn in turns if is_held_out(turn[0], args.test_share)] or train
+    agents = sorted({label for _, label in turns if label != MAIN_LABEL})
+    print(f"{len(turns)} labelled turns ({len(train)} train, {len(test)} test), labels: "
+          + ", ".join(f"{label}={sum(1 for _, l in turns if l == label)}" for label in sorted({l for _, l in turns})))
+
+    classifier = NaiveBayesIntentClassifier().fit([p for p, _ in train], [l for _, l in train])
+    routers = {
+        "rules": IntentRouter(agents),
+        "classifier": IntentRouter(agents, rules=(), classifier=classifier, min_confidence=args.min_confidence),
+        "rules+classifier": IntentRouter(agents, classifier=classifier, min_confidence=args.min_confidence),
+    }
+    print(f"{'router':<18}{'coverage':>10}{'accuracy':>10}{'recall':>9}{'missed':>8}{'route us':>10}"
+          + ("  saved ms/turn" if args.handoff_ms else ""))
+    for name, router in routers.items():
+        result = evaluate(router, test)
+        line = (f"{name:<18}{result['coverage']:>10.1%}{result['routing_accuracy']:>10.1%}"
+                f"{result['specialist_recall']:>9.1%}{result['missed_specialist_turns']:>8}{result['avg_route_us']:>10.1f}")
+        if args.handoff_ms:
+            line += f"{result['coverage'] * args.handoff_ms:>15.1f}"
+        print(line)
+
+    if not args.dry_run:
+        NaiveBayesIntentClassifier().fit([p for p, _ in turns], [l for _, l in turns]).save(args.output)
+        print(f"Saved classifier trained on {len(turns)} turns to {args.output}")